@@ -0,0 +1,324 @@
+#!/usr/bin/env python
+"""Measure cycles of health checks against local stand-in sites.
+
+The sites and the Statuspage API are local stand-ins from `standins.py`: every
+check requests its own site from one server, with a log-normal latency and a
+fraction of server errors, and updates its own component on a fake Statuspage
+API.  Each number of checks runs in a new interpreter, so that its memory is
+measured on its own:
+
+- `wall_s`: the time of each cycle, from submitting the checks until the last
+  status update has been sent.
+- `api_calls`: the Statuspage API calls of each cycle.
+- `p50_ms`, `p99_ms`: percentiles of the time of each check's request.
+- `peak_rss_mb`: the peak resident memory of the interpreter, after the last
+  cycle.
+
+The first cycle also opens every connection, so it is reported separately, and
+the other measurements are the median of the later cycles.  The results are
+written as JSON.  With `--baseline`, they are compared to an earlier JSON file,
+and the exit code is 1 if any measurement is worse than the baseline by more
+than `--tolerance`.
+
+    python benchmarks/cycle.py --output cycle.json
+    python benchmarks/cycle.py --checks 10 100 --baseline cycle.json
+"""
+
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from standins import FakeStatusPage, SiteServer  # noqa: E402
+
+from pi_monitor import (  # noqa: E402
+    AsyncHealthCheckExecutor,
+    HealthCheckExecutor,
+    Notifier,
+    StatusPageOperator,
+    parse_configuration,
+)
+from pi_monitor.async_transport import AsyncPooledSession  # noqa: E402
+from pi_monitor.transport import PooledSession  # noqa: E402
+
+SIZES = (10, 100, 1000, 10000)
+PAGE_ID = "benchmark"
+
+# Measurements which are better when smaller, and are compared with a baseline
+COMPARED = ("wall_s", "api_calls", "p99_ms", "peak_rss_mb")
+
+
+def timed(executor_class):
+    class TimedExecutor(executor_class):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.latencies = []
+            self._latency_lock = threading.Lock()
+
+        def _record(self, start):
+            elapsed = (time.perf_counter() - start) * 1000
+            with self._latency_lock:
+                self.latencies.append(elapsed)
+
+        def _probe(self, check_settings, deadline):
+            start = time.perf_counter()
+            try:
+                return super()._probe(check_settings, deadline)
+            finally:
+                self._record(start)
+
+        async def _probe_async(self, check_settings, deadline):
+            start = time.perf_counter()
+            try:
+                return await super()._probe_async(check_settings, deadline)
+            finally:
+                self._record(start)
+
+    return TimedExecutor
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def api_calls(fake_url):
+    session = PooledSession()
+    try:
+        return session.get(f"{fake_url}/_stats", timeout=5).json()["total"]
+    finally:
+        session.close()
+
+
+def build_settings(args):
+    config = {
+        "status_page": {
+            "api_key": "benchmark",
+            "page_id": PAGE_ID,
+            "base_url": args.api_url,
+            "rate_limit": 100000,
+            "rate_burst": 100000,
+            "backoff_factor": 0,
+        },
+        "http": {"pool_maxsize": args.concurrency},
+        "status_checks": [
+            {
+                "name": f"site-{site}",
+                "url": f"{args.sites_url}/sites/{site}",
+                "status_page": {"component_id": f"component-{site}"},
+            }
+            for site in range(args.size)
+        ],
+    }
+    return parse_configuration(json.dumps(config).encode())
+
+
+def run_size(args):
+    # Runs in its own interpreter, and prints the results as JSON
+    settings = build_settings(args)
+    operator = StatusPageOperator(settings.status_page)
+    session = PooledSession.from_settings(settings.http, args.concurrency)
+    if args.engine == "asyncio":
+        executor = timed(AsyncHealthCheckExecutor)(
+            operator,
+            Notifier(None),
+            args.concurrency,
+            async_session=AsyncPooledSession.from_settings(
+                settings.http, args.concurrency
+            ),
+        )
+        run_cycle = executor.run_cycle
+        pool = None
+    else:
+        executor = timed(HealthCheckExecutor)(operator, Notifier(None), session)
+        pool = ThreadPoolExecutor(max_workers=args.concurrency)
+
+        def run_cycle(checks):
+            executor.execute_health_checks(checks, executor=pool)
+
+    cycles = []
+    try:
+        for _ in range(args.cycles):
+            executor.latencies = []
+            calls = api_calls(args.api_url)
+            start = time.perf_counter()
+            run_cycle(settings.status_checks)
+            executor.flush_status_updates(True)
+            wall = time.perf_counter() - start
+            cycles.append(
+                {
+                    "wall_s": round(wall, 3),
+                    "api_calls": api_calls(args.api_url) - calls,
+                    "p50_ms": round(percentile(executor.latencies, 0.5), 2),
+                    "p99_ms": round(percentile(executor.latencies, 0.99), 2),
+                }
+            )
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        elif hasattr(executor, "close"):
+            executor.close()
+        operator.client.close()
+        session.close()
+
+    # ru_maxrss is in kilobytes on Linux, and in bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    return {"cycles": cycles, "peak_rss_mb": round(peak_rss / 2**20, 1)}
+
+
+def summarize(size, measured):
+    first, later = measured["cycles"][0], measured["cycles"][1:] or measured["cycles"]
+    result = {"checks": size, "first_cycle": first}
+    for name in ("wall_s", "api_calls", "p50_ms", "p99_ms"):
+        result[name] = round(statistics.median(cycle[name] for cycle in later), 3)
+    result["peak_rss_mb"] = measured["peak_rss_mb"]
+    return result
+
+
+def measure(args):
+    sites = SiteServer(args.latency_ms, args.sigma, args.error_rate, args.seed)
+    fake = FakeStatusPage()
+    results = []
+    with sites, fake:
+        for size in args.checks:
+            fake.reset()
+            for site in range(size):
+                fake.add_component(f"component-{site}")
+            command = [
+                sys.executable,
+                __file__,
+                "--run-size",
+                str(size),
+                "--sites-url",
+                sites.base_url,
+                "--api-url",
+                fake.base_url,
+                "--engine",
+                args.engine,
+                "--concurrency",
+                str(args.concurrency),
+                "--cycles",
+                str(args.cycles),
+            ]
+            output = subprocess.run(
+                command, capture_output=True, text=True, check=True
+            ).stdout
+            results.append(summarize(size, json.loads(output)))
+            print(json.dumps(results[-1]), file=sys.stderr)
+    return {
+        "engine": args.engine,
+        "concurrency": args.concurrency,
+        "cycles": args.cycles,
+        "latency_ms": args.latency_ms,
+        "sigma": args.sigma,
+        "error_rate": args.error_rate,
+        "seed": args.seed,
+        "results": results,
+    }
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    earlier = {result["checks"]: result for result in baseline["results"]}
+    for result in results["results"]:
+        before = earlier.get(result["checks"])
+        if before is None:
+            continue
+        for name in COMPARED:
+            if result[name] > before[name] * (1 + tolerance):
+                regressions.append(
+                    f"{result['checks']} checks {name}: {result[name]}, "
+                    f"was {before[name]}"
+                )
+    return regressions
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--checks",
+        type=int,
+        nargs="+",
+        default=list(SIZES),
+        help="The numbers of checks to measure",
+    )
+    parser.add_argument(
+        "--cycles", type=int, default=3, help="Cycles to run for each number"
+    )
+    parser.add_argument(
+        "-e", "--engine", choices=["threads", "asyncio"], default="threads"
+    )
+    parser.add_argument(
+        "-w",
+        "--concurrency",
+        type=int,
+        default=64,
+        help="Maximum number of checks to run at once",
+    )
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=20,
+        help="The median latency of the sites, in milliseconds",
+    )
+    parser.add_argument(
+        "--sigma",
+        type=float,
+        default=0.5,
+        help="The standard deviation of the logarithm of the latency",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.01,
+        help="The fraction of site responses which are server errors",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="The seed of the sites")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare the results to this JSON file")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="The fraction by which a measurement may exceed the baseline",
+    )
+    parser.add_argument("--run-size", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--sites-url", help=argparse.SUPPRESS)
+    parser.add_argument("--api-url", help=argparse.SUPPRESS)
+    return parser
+
+
+def main():
+    args = get_parser().parse_args()
+    if args.run_size is not None:
+        args.size = args.run_size
+        print(json.dumps(run_size(args)))
+        return 0
+
+    results = measure(args)
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,277 @@
+"""Local stand-ins for the sites and the Statuspage API used by the benchmarks.
+
+- `SiteServer` serves many sites from one keep-alive HTTP server, at
+  `/sites/<n>`.  Each response is delayed by a latency drawn from a log-normal
+  distribution, and a fraction of responses are server errors.  Every site draws
+  from its own random generator, seeded from `seed` and the site number, so a
+  run is repeatable and independent of the order in which sites are checked.
+- `FakeStatusPage` implements the parts of the Statuspage v1 pages API which
+  pi-monitor uses, in memory, and counts the calls to each endpoint.  The counts
+  are also served at `/_stats`.
+
+Both servers run on a thread until they are closed, and can be used as context
+managers.
+"""
+
+import itertools
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ERROR_STATUSES = (500, 502, 503)
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    # The backlog is set when the server starts listening, in its constructor
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+class _Server:
+    handler = None
+
+    def __init__(self):
+        self.httpd = _HTTPServer(("127.0.0.1", 0), self.handler)
+        self.httpd.standin = self
+        self.thread = threading.Thread(
+            target=self.httpd.serve_forever, args=(0.05,), daemon=True
+        )
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # The headers and body are written separately, so with Nagle's algorithm a
+    # response on a reused connection waits for the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def send(self, status, body=b"", content_type="text/plain"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def send_json(self, status, value):
+        self.send(status, json.dumps(value).encode(), "application/json")
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length)) if length else {}
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _SiteHandler(_Handler):
+    def do_GET(self):
+        match = re.fullmatch(r"/sites/(\d+)", self.path)
+        if not match:
+            self.send(404, b"Not Found")
+            return
+        delay, status = self.server.standin.respond(int(match.group(1)))
+        time.sleep(delay)
+        self.send(status, b"OK" if status == 200 else b"Error")
+
+    do_HEAD = do_GET
+
+
+class SiteServer(_Server):
+    """Many sites with random latency and errors, served at `/sites/<n>`.
+
+    Attributes:
+        latency_ms: The median latency of a response, in milliseconds.
+        sigma: The standard deviation of the logarithm of the latency, which sets
+            the length of its tail.  The 99th percentile is about
+            `latency_ms * exp(2.33 * sigma)`.
+        error_rate: The fraction of responses which are server errors.
+        seed: The seed of every site's random generator.
+    """
+
+    handler = _SiteHandler
+
+    def __init__(self, latency_ms=20.0, sigma=0.5, error_rate=0.01, seed=0):
+        super().__init__()
+        self.latency_ms = latency_ms
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.seed = seed
+        self._generators = {}
+        self._lock = threading.Lock()
+
+    def url(self, site):
+        """The URL of a site"""
+        return f"{self.base_url}/sites/{site}"
+
+    def respond(self, site):
+        """Draw the latency, in seconds, and the status of a response of a site"""
+        with self._lock:
+            generator = self._generators.get(site)
+            if generator is None:
+                generator = random.Random(f"{self.seed}/{site}")
+                self._generators[site] = generator
+            delay = generator.lognormvariate(math.log(self.latency_ms), self.sigma)
+            failed = generator.random() < self.error_rate
+            status = generator.choice(ERROR_STATUSES) if failed else 200
+        return delay / 1000, status
+
+
+class _StatusPageHandler(_Handler):
+    ROUTES = (
+        ("GET", r"/_stats", "stats"),
+        ("GET", r"/(?P<page>[^/]+)/components", "get_components"),
+        ("GET", r"/(?P<page>[^/]+)/components/(?P<id>[^/]+)", "get_component"),
+        ("PUT", r"/(?P<page>[^/]+)/components/(?P<id>[^/]+)", "update_component"),
+        ("PATCH", r"/(?P<page>[^/]+)/components/(?P<id>[^/]+)", "update_component"),
+        ("GET", r"/(?P<page>[^/]+)/incidents/unresolved", "get_unresolved"),
+        ("POST", r"/(?P<page>[^/]+)/incidents", "create_incident"),
+        ("PATCH", r"/(?P<page>[^/]+)/incidents/(?P<id>[^/]+)", "update_incident"),
+    )
+
+    def _dispatch(self):
+        fake = self.server.standin
+        path = self.path.split("?")[0]
+        if path.startswith(fake.PREFIX):
+            path = path[len(fake.PREFIX) :]
+        for method, pattern, name in self.ROUTES:
+            match = re.fullmatch(pattern, path)
+            if method == self.command and match:
+                arguments = match.groupdict()
+                body = self.read_json() if self.command != "GET" else None
+                status, value = fake.handle(name, arguments, body)
+                self.send_json(status, value)
+                return
+        self.send_json(404, {"error": "Not Found"})
+
+    do_GET = _dispatch
+    do_PUT = _dispatch
+    do_POST = _dispatch
+    do_PATCH = _dispatch
+
+
+class FakeStatusPage(_Server):
+    """An in-memory stand-in for the Statuspage v1 pages API.
+
+    Give pi-monitor `base_url` as its `status_page.base_url`.  Components must
+    be added with `add_component` before they can be read or updated.
+
+    Attributes:
+        calls: The number of calls to each endpoint, by the name of its handler,
+            such as `update_component`.
+    """
+
+    PREFIX = "/v1/pages"
+    handler = _StatusPageHandler
+
+    def __init__(self):
+        super().__init__()
+        self.calls = Counter()
+        self.components = {}
+        self.incidents = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return super().base_url + self.PREFIX
+
+    def add_component(self, component_id, status="operational"):
+        """Add a component to the page"""
+        with self._lock:
+            self.components[component_id] = status
+
+    def reset(self):
+        """Remove every component and incident, and clear the counts"""
+        with self._lock:
+            self.calls.clear()
+            self.components.clear()
+            self.incidents.clear()
+
+    def stats(self):
+        """The number of calls to each endpoint, and in total"""
+        with self._lock:
+            calls = dict(self.calls)
+        return {"calls": calls, "total": sum(calls.values())}
+
+    def handle(self, name, arguments, body):
+        """Handle a request to the API, returning its status and JSON body"""
+        if name == "stats":
+            return 200, self.stats()
+        with self._lock:
+            self.calls[name] += 1
+            return getattr(self, "_" + name)(arguments.get("id"), body)
+
+    def _component(self, component_id):
+        return {
+            "id": component_id,
+            "name": component_id,
+            "status": self.components[component_id],
+        }
+
+    def _get_components(self, _id, _body):
+        return 200, [self._component(component_id) for component_id in self.components]
+
+    def _get_component(self, component_id, _body):
+        if component_id not in self.components:
+            return 404, {"error": "Component not found"}
+        return 200, self._component(component_id)
+
+    def _update_component(self, component_id, body):
+        if component_id not in self.components:
+            return 404, {"error": "Component not found"}
+        self.components[component_id] = body["component"]["status"]
+        return 200, self._component(component_id)
+
+    def _get_unresolved(self, _id, _body):
+        return 200, [
+            incident
+            for incident in self.incidents.values()
+            if incident["status"] != "resolved"
+        ]
+
+    def _create_incident(self, _id, body):
+        details = body["incident"]
+        incident = {
+            "id": f"incident-{next(self._ids)}",
+            "name": details.get("name"),
+            "status": details.get("status", "investigating"),
+            "components": [
+                {"id": component_id} for component_id in details["component_ids"]
+            ],
+        }
+        for component_id, status in details.get("components", {}).items():
+            if component_id in self.components:
+                self.components[component_id] = status
+        self.incidents[incident["id"]] = incident
+        return 201, incident
+
+    def _update_incident(self, incident_id, body):
+        incident = self.incidents.get(incident_id)
+        if incident is None:
+            return 404, {"error": "Incident not found"}
+        incident["status"] = body["incident"].get("status", incident["status"])
+        return 200, incident
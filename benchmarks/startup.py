@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+"""Measure the cold start of pi-monitor.
+
+Each measurement runs in a new interpreter, as `cron` does:
+
+- `interpreter_ms`: starting Python, for reference.
+- `import_ms`: `import pi_monitor`.
+- `cli_import_ms`: importing `pi_monitor.main`, which is what the `pi-monitor`
+  command loads.
+- `first_check_ms`: a complete `pi-monitor` run of one check against a local
+  HTTP server, from starting the process until it exits.
+
+The median of `--runs` runs is written as JSON, with the heavy optional modules
+which the command loaded.  With `--baseline`, the results are compared to an
+earlier JSON file, and the exit code is 1 if any measurement is slower than the
+baseline by more than `--tolerance`.
+
+    python benchmarks/startup.py --runs 10 --output startup.json
+    python benchmarks/startup.py --baseline startup.json
+"""
+
+import argparse
+import http.server
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY_MODULES = (
+    "asyncio",
+    "coloredlogs",
+    "requests",
+    "sendgrid",
+    "smtplib",
+    "yaml",
+)
+
+TIMED_IMPORT = """
+import sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(elapsed * 1000)
+print(",".join(m for m in {modules!r} if m in sys.modules))
+"""
+
+
+class QuietHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"OK")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run_python(args, cwd, importtime=False):
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    command = [sys.executable, *(["-X", "importtime"] if importtime else []), *args]
+    start = time.perf_counter()
+    result = subprocess.run(
+        command, cwd=cwd, env=env, capture_output=True, text=True, check=True
+    )
+    return (time.perf_counter() - start) * 1000, result
+
+
+def timed_import(statement, cwd):
+    code = TIMED_IMPORT.format(statement=statement, modules=HEAVY_MODULES)
+    _, result = run_python(["-c", code], cwd)
+    elapsed, modules = result.stdout.splitlines()[-2:]
+    return float(elapsed), [module for module in modules.split(",") if module]
+
+
+def write_config(directory, port):
+    config = {
+        "status_page": {"api_key": "benchmark", "page_id": "benchmark"},
+        "status_checks": [{"name": "local", "url": f"http://127.0.0.1:{port}/"}],
+    }
+    file = Path(directory) / "monitor.config.json"
+    file.write_text(json.dumps(config))
+    return str(file)
+
+
+def measure(runs):
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    samples = {
+        "interpreter_ms": [],
+        "import_ms": [],
+        "cli_import_ms": [],
+        "first_check_ms": [],
+    }
+    modules = []
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            config = write_config(directory, server.server_address[1])
+            run = ["-c", "from pi_monitor import main; main()", "-c", config]
+            for _ in range(runs):
+                samples["interpreter_ms"].append(
+                    run_python(["-c", "pass"], directory)[0]
+                )
+                samples["import_ms"].append(
+                    timed_import("import pi_monitor", directory)[0]
+                )
+                elapsed, modules = timed_import(
+                    "from pi_monitor import main", directory
+                )
+                samples["cli_import_ms"].append(elapsed)
+                samples["first_check_ms"].append(run_python(run, directory)[0])
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    results = {
+        name: round(statistics.median(values), 2) for name, values in samples.items()
+    }
+    results["runs"] = runs
+    results["modules"] = modules
+    return results
+
+
+def slowest_imports(count):
+    with tempfile.TemporaryDirectory() as directory:
+        _, result = run_python(
+            ["-c", "from pi_monitor import main"], directory, importtime=True
+        )
+    imports = []
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            imports.append((int(parts[1]), parts[2].rstrip()))
+    return sorted(imports, reverse=True)[:count]
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, value in baseline.items():
+        if name.endswith("_ms") and name in results:
+            if results[name] > value * (1 + tolerance):
+                regressions.append(f"{name}: {results[name]:.1f}ms, was {value:.1f}ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Runs of each measurement")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare the results to this JSON file")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="The fraction by which a measurement may exceed the baseline",
+    )
+    parser.add_argument(
+        "--importtime",
+        type=int,
+        metavar="COUNT",
+        help="Also list the COUNT slowest imports of the command, with their "
+        "cumulative time in microseconds",
+    )
+    args = parser.parse_args()
+
+    results = measure(args.runs)
+    if args.importtime:
+        results["slowest_imports"] = slowest_imports(args.importtime)
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
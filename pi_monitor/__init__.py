@@ -1,82 +1,100 @@
-import os
-import yaml
-import logging.config
-import logging
-import logging.handlers
-import coloredlogs
-import argparse
-from .enums import OpLevel
-from .healthchecks import HealthCheckExecutor, HttpGetResult
-from .configuration import (
-    read_configuration,
-    MonitorSettings,
-    NotificationSettings,
-    StatusPageSettings,
-    HealthCheckSettings,
-    StatusPageComponentSettings,
-)
-from .notifications import Notifier
-from .statuspage_io import StatusPageOperator, Incident, StatusResult, IncidentResult
-from .statuspage_io_client import StatusPageClient
-from concurrent.futures import ThreadPoolExecutor
+import importlib
+import typing
 
-
-def get_parser():
-    PARSER = argparse.ArgumentParser()
-    PARSER.add_argument(
-        "-c", "--configfile", help="Configuration File", default="monitor.config.json"
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from .enums import OpLevel
+    from .healthchecks import (
+        AsyncHealthCheckExecutor,
+        HealthCheckExecutor,
+        HttpGetResult,
     )
+    from .configuration import (
+        read_configuration,
+        ConfigurationError,
+        MonitorSettings,
+        NotificationSettings,
+        StatusPageSettings,
+        HealthCheckSettings,
+        StatusPageComponentSettings,
+        HttpSettings,
+        LatencySettings,
+        parse_configuration,
+    )
+    from .config_cache import read_cached_configuration
+    from .notifications import NotificationDigest, NotificationDispatcher, Notifier
+    from .statuspage_io import (
+        StatusPageOperator,
+        Incident,
+        StatusResult,
+        IncidentResult,
+    )
+    from .statuspage_io_client import StatusPageClient
+    from .scheduler import CheckScheduler, ScheduledCheck
+    from .config_watcher import ConfigReloader, ConfigWatcher
+    from .transport import ConnectionStats, PooledSession, RequestTimings
+    from .async_transport import AsyncPooledSession
+    from .ratelimit import PriorityWriteQueue, TokenBucket
+    from .statuspage_cache import ComponentStatusCache, IncidentIndex
+    from .checkstate import CheckState, CheckStateStore
+    from .assertions import AssertionSet, compile_assertions
+    from .latency import LatencyHistogram
+    from .cli import get_parser, main, setup_logging
 
-    return PARSER
-
-
-def setup_logging(
-    default_path="logging.yaml", default_level=logging.INFO, env_key="LOG_CFG"
-):
-    """
-    | **@author:** Prathyush SP
-    | https://gist.github.com/kingspp/9451566a5555fb022215ca2b7b802f19
-    | Logging Setup
-    """
-    path = default_path
-    value = os.getenv(env_key, None)
-    if value:
-        path = value
-    if os.path.exists(path):
-        with open(path, "rt") as f:
-            try:
-                config = yaml.safe_load(f.read())
-                logging.config.dictConfig(config)
-                coloredlogs.install()
-            except Exception as e:
-                print(e)
-                print("Error in Logging Configuration. Using default configuration.")
-                logging.basicConfig(level=default_level)
-                coloredlogs.install(level=default_level)
-    else:
-        logging.basicConfig(level=default_level)
-        coloredlogs.install(level=default_level)
-        print(f"File {default_path} not found. Using default logging configuration.")
-
+# The public classes and functions, by the module which defines them.  A module is
+# imported when one of its names is first used, so that `import pi_monitor` does
+# not load `requests`, `sendgrid` or `asyncio` before they are needed.
+_EXPORTS = {
+    "enums": ("OpLevel",),
+    "healthchecks": (
+        "AsyncHealthCheckExecutor",
+        "HealthCheckExecutor",
+        "HttpGetResult",
+    ),
+    "configuration": (
+        "read_configuration",
+        "ConfigurationError",
+        "MonitorSettings",
+        "NotificationSettings",
+        "StatusPageSettings",
+        "HealthCheckSettings",
+        "StatusPageComponentSettings",
+        "HttpSettings",
+        "LatencySettings",
+        "parse_configuration",
+    ),
+    "config_cache": ("read_cached_configuration",),
+    "notifications": ("NotificationDigest", "NotificationDispatcher", "Notifier"),
+    "statuspage_io": (
+        "StatusPageOperator",
+        "Incident",
+        "StatusResult",
+        "IncidentResult",
+    ),
+    "statuspage_io_client": ("StatusPageClient",),
+    "scheduler": ("CheckScheduler", "ScheduledCheck"),
+    "config_watcher": ("ConfigReloader", "ConfigWatcher"),
+    "transport": ("ConnectionStats", "PooledSession", "RequestTimings"),
+    "async_transport": ("AsyncPooledSession",),
+    "ratelimit": ("PriorityWriteQueue", "TokenBucket"),
+    "statuspage_cache": ("ComponentStatusCache", "IncidentIndex"),
+    "checkstate": ("CheckState", "CheckStateStore"),
+    "assertions": ("AssertionSet", "compile_assertions"),
+    "latency": ("LatencyHistogram",),
+    "cli": ("get_parser", "main", "setup_logging"),
+}
+_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
 
-def main():
-    setup_logging()
-    logger = logging.getLogger(__name__)
+__all__ = list(_MODULES)
 
-    parser = get_parser()
-    args = parser.parse_args()
 
-    logger.info("Reading Configuration File")
-    config_data = read_configuration(args.configfile, MonitorSettings())
+def __getattr__(name: str):
+    module = _MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
 
-    notifier = Notifier(config_data.notification)
-    status_page_operator = StatusPageOperator(config_data.status_page)
-    healtch_check_executor = HealthCheckExecutor(status_page_operator, notifier)
 
-    with ThreadPoolExecutor(max_workers=4) as executor:
-        {
-            executor.submit(
-                healtch_check_executor.execute_health_check, statusCheck
-            ): statusCheck
-            for statusCheck in config_data.status_checks
-        }
+def __dir__():
+    return sorted({*globals(), *_MODULES})
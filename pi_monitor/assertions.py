@@ -0,0 +1,378 @@
+# -*- coding: utf-8 -*-
+"""
+
+Module for content assertions.
+
+This module compiles the `assertions` of a
+[HealthCheckSettings][pi_monitor.HealthCheckSettings] once, when the configuration
+is read, and evaluates them on the response body as it is streamed.  Text
+assertions are checked against each new chunk of the body, and reading stops as
+soon as every assertion has passed.  The body is decoded once, and parsed as JSON
+at most once, no matter how many assertions there are.
+
+Assertions are written as objects with one of the following keys:
+
+- `contains`: The body contains the given text.
+- `regex`: The body matches the given regular expression.
+- `json_path`: The value at the given path, such as `$.checks[0].status`, equals
+  `equals`.  Without `equals`, the path only has to exist.
+
+"""
+
+import json
+import logging
+import re
+from abc import ABC, abstractmethod
+from types import SimpleNamespace
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+# The keys of each kind of assertion, and the other keys it accepts
+_KINDS = {"contains": (), "regex": (), "json_path": ("equals",)}
+_PATH_TOKEN = re.compile(r"\.([A-Za-z_][\w-]*)|\[(\d+)\]|\[(['\"])(.*?)\3\]")
+
+
+class Assertion(ABC):
+    """Assertion Class
+
+    The base class for compiled assertions.
+    """
+
+    @abstractmethod
+    def describe_failure(self) -> str:
+        """Describe why the assertion failed
+
+        Returns:
+            A message describing the failure.
+        """
+
+
+class TextAssertion(Assertion):
+    """TextAssertion Class
+
+    The base class for assertions which are checked incrementally against the
+    decoded body text.
+    """
+
+    @abstractmethod
+    def search(self, body: str, start: int, final: bool) -> bool:
+        """Search the body for a match
+
+        Args:
+            body: The body text read so far
+            start: The position to start searching from
+            final: True if the body is complete.  Otherwise, a match which more of
+                the body could change is not accepted.
+
+        Returns:
+            True if the body matches.
+        """
+
+    @abstractmethod
+    def resume_position(self, body: str) -> int:
+        """The position to start the next search from
+
+        Args:
+            body: The body text read so far, which did not match
+
+        Returns:
+            The earliest position at which a match could start once more of the
+            body has been read.
+        """
+
+
+class ContainsAssertion(TextAssertion):
+    """ContainsAssertion Class
+
+    Passes if the body contains `text`.
+
+    Attributes:
+        text: The text to find.
+    """
+
+    text: str
+
+    def __init__(self, text: str):
+        if not isinstance(text, str) or text == "":
+            raise ValueError("contains must be a non-empty string")
+        self.text = text
+
+    def search(self, body: str, start: int, final: bool) -> bool:
+        return body.find(self.text, start) >= 0
+
+    def resume_position(self, body: str) -> int:
+        return max(len(body) - len(self.text) + 1, 0)
+
+    def describe_failure(self) -> str:
+        return f'body does not contain "{self.text}"'
+
+
+class RegexAssertion(TextAssertion):
+    """RegexAssertion Class
+
+    Passes if the body matches `pattern`.  Each search starts no more than
+    `WINDOW` characters before the newly read part of the body, so a match which
+    spans two chunks of the body must be shorter than `WINDOW` characters.
+
+    Until the body is complete, a match which reaches the end of the text read so
+    far is not accepted, as the rest of the body could change it: `\\bUP\\b`
+    matches the start of `UPGRADE` until the `G` has been read.
+
+    Attributes:
+        pattern: The compiled regular expression.
+    """
+
+    WINDOW = 4096
+
+    pattern: re.Pattern
+
+    def __init__(self, pattern: str):
+        if not isinstance(pattern, str):
+            raise ValueError("regex must be a string")
+        try:
+            self.pattern = re.compile(pattern)
+        except re.error as e:
+            raise ValueError(f"Invalid regex {pattern!r}: {e}") from e
+
+    def search(self, body: str, start: int, final: bool) -> bool:
+        match = self.pattern.search(body, start)
+        return match is not None and (final or match.end() < len(body))
+
+    def resume_position(self, body: str) -> int:
+        return max(len(body) - self.WINDOW, 0)
+
+    def describe_failure(self) -> str:
+        return f"body does not match /{self.pattern.pattern}/"
+
+
+class JsonPathAssertion(Assertion):
+    """JsonPathAssertion Class
+
+    Passes if the value at `path` in the JSON body equals `expected`, or, if no
+    value is expected, if the path exists.
+
+    Attributes:
+        path: The path, as written in the configuration.
+        keys: The compiled path, as a list of object keys and array indexes.
+        expected: The expected value.
+    """
+
+    path: str
+    keys: List[object]
+    expected: object
+
+    def __init__(self, path: str, expected: object = _MISSING):
+        self.path = path
+        self.keys = self._compile_path(path)
+        self.expected = expected
+
+    def evaluate(self, document: object) -> Optional[str]:
+        """Evaluate the assertion
+
+        Args:
+            document: The parsed JSON body
+
+        Returns:
+            `None` if the assertion passed, or a message describing the failure.
+        """
+        value = document
+        try:
+            for key in self.keys:
+                if isinstance(key, int) and not isinstance(value, list):
+                    raise TypeError()
+                value = value[key]
+        except (KeyError, IndexError, TypeError):
+            return f"{self.path} not found"
+
+        if self.expected is _MISSING or self._equals(value, self.expected):
+            return None
+        return (
+            f"{self.path} is {json.dumps(value)}, "
+            f"expected {json.dumps(self.expected)}"
+        )
+
+    def describe_failure(self) -> str:
+        return f"{self.path} could not be evaluated"
+
+    @staticmethod
+    def _equals(value: object, expected: object) -> bool:
+        # Keep JSON true and 1 distinct, unlike Python
+        return value == expected and isinstance(value, bool) == isinstance(
+            expected, bool
+        )
+
+    @staticmethod
+    def _compile_path(path: str) -> List[object]:
+        if not isinstance(path, str) or not path.startswith("$"):
+            raise ValueError(f"Invalid json_path {path!r}: must start with $")
+        keys = []
+        position = 1
+        while position < len(path):
+            match = _PATH_TOKEN.match(path, position)
+            if match is None:
+                raise ValueError(f"Invalid json_path {path!r} at position {position}")
+            name, index, _, quoted = match.groups()
+            if name is not None:
+                keys.append(name)
+            elif index is not None:
+                keys.append(int(index))
+            else:
+                keys.append(quoted)
+            position = match.end()
+        return keys
+
+
+class AssertionSet:
+    """AssertionSet Class
+
+    The compiled assertions of a health check.
+
+    Attributes:
+        text_assertions: The assertions checked against the body text.
+        json_assertions: The assertions checked against the parsed JSON body.
+    """
+
+    text_assertions: List[TextAssertion]
+    json_assertions: List[JsonPathAssertion]
+
+    def __init__(self, assertions: List[Assertion]):
+        self.text_assertions = [a for a in assertions if isinstance(a, TextAssertion)]
+        self.json_assertions = [
+            a for a in assertions if isinstance(a, JsonPathAssertion)
+        ]
+
+    @property
+    def requires_json(self) -> bool:
+        """True if the whole body must be read and parsed as JSON"""
+        return bool(self.json_assertions)
+
+    def evaluator(self) -> "AssertionEvaluator":
+        """Create an evaluator for a single response
+
+        Returns:
+            An [AssertionEvaluator][pi_monitor.assertions.AssertionEvaluator]
+        """
+        return AssertionEvaluator(self)
+
+    def __len__(self) -> int:
+        return len(self.text_assertions) + len(self.json_assertions)
+
+
+class AssertionEvaluator:
+    """AssertionEvaluator Class
+
+    Evaluates an [AssertionSet][pi_monitor.assertions.AssertionSet] against a
+    single response body as it is read.
+    """
+
+    def __init__(self, assertions: AssertionSet):
+        self._assertions = assertions
+        self._pending = [(assertion, 0) for assertion in assertions.text_assertions]
+
+    def feed(self, body: str, final: bool = False) -> bool:
+        """Evaluate the text assertions which have not yet passed
+
+        Only the part of the body which could contain a new match is searched.
+
+        Args:
+            body: The body text read so far
+            final: True if the body is complete.
+
+        Returns:
+            True if the result is decided, and no more of the body is needed.
+        """
+        pending = []
+        for assertion, start in self._pending:
+            if not assertion.search(body, start, final):
+                pending.append((assertion, assertion.resume_position(body)))
+        self._pending = pending
+        return not self._pending and not self._assertions.requires_json
+
+    @property
+    def requires_json(self) -> bool:
+        """True if the whole body must be read and parsed as JSON"""
+        return self._assertions.requires_json
+
+    def finish(self, document: object = None, json_error: str = None) -> str:
+        """Complete the evaluation once the body has been read
+
+        Args:
+            document: The parsed JSON body
+            json_error: Why the body could not be parsed as JSON, if it could not
+
+        Returns:
+            `None` if every assertion passed, or a message describing the first
+            failure.
+        """
+        if self._pending:
+            return self._pending[0][0].describe_failure()
+        for assertion in self._assertions.json_assertions:
+            if json_error is not None:
+                return f"{assertion.path}: {json_error}"
+            failure = assertion.evaluate(document)
+            if failure is not None:
+                return failure
+        return None
+
+
+def compile_assertion(entry: object) -> Assertion:
+    """Compile a single assertion
+
+    Args:
+        entry: The assertion, as an object or dictionary read from the
+            configuration.
+
+    Returns:
+        The compiled [Assertion][pi_monitor.assertions.Assertion].
+
+    Raises:
+        ValueError: If the assertion is invalid.
+    """
+    if isinstance(entry, dict):
+        values = entry
+    elif isinstance(entry, SimpleNamespace):
+        values = vars(entry)
+    else:
+        raise ValueError("assertion must be an object")
+
+    kinds = [kind for kind in _KINDS if kind in values]
+    if not kinds:
+        raise ValueError(
+            f"Invalid assertion {values}: expected contains, regex or json_path"
+        )
+    if len(kinds) > 1:
+        raise ValueError(
+            f"Invalid assertion {values}: expected only one of contains, regex or "
+            "json_path"
+        )
+    allowed = _KINDS[kinds[0]]
+    for key in values:
+        if key != kinds[0] and key not in allowed:
+            raise ValueError(f"Invalid assertion {values}: unknown key {key!r}")
+
+    if "contains" in values:
+        return ContainsAssertion(values["contains"])
+    if "regex" in values:
+        return RegexAssertion(values["regex"])
+    return JsonPathAssertion(values["json_path"], values.get("equals", _MISSING))
+
+
+def compile_assertions(assertions: List[object]) -> Optional[AssertionSet]:
+    """Compile the assertions of a health check
+
+    Args:
+        assertions: A list of assertions, as objects or dictionaries read from the
+            configuration.
+
+    Returns:
+        An [AssertionSet][pi_monitor.assertions.AssertionSet], or `None` if there
+        are no assertions.
+
+    Raises:
+        ValueError: If an assertion is invalid.
+    """
+    if not assertions:
+        return None
+    return AssertionSet([compile_assertion(entry) for entry in assertions])
@@ -0,0 +1,380 @@
+# -*- coding: utf-8 -*-
+"""
+
+Module for non-blocking HTTP transport.
+
+This module adapts an [aiohttp](https://docs.aiohttp.org) client session for the
+[AsyncHealthCheckExecutor][pi_monitor.AsyncHealthCheckExecutor], with per-host
+keep-alive connection pools, the timings and connection statistics of the
+[transport][pi_monitor.transport] module, and the exceptions raised by
+`requests`, so that failures are described alike by both engines.  A request in
+flight waits on the event loop rather than holding a thread, so thousands of
+checks can wait on slow sites at once.
+
+aiohttp is installed with the `asyncio` extra:
+`pip install spydersoft-pi-monitor[asyncio]`.
+
+"""
+
+import asyncio
+import http.client
+import os
+import ssl
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+import aiohttp
+from requests.exceptions import InvalidSchema, InvalidURL, TooManyRedirects
+from requests.structures import CaseInsensitiveDict
+from requests.utils import (
+    DEFAULT_CA_BUNDLE_PATH,
+    default_user_agent,
+    get_encoding_from_headers,
+    get_environ_proxies,
+    select_proxy,
+)
+from .configuration import HttpSettings
+from .transport import ConnectionStats, RequestTimings
+
+# The limits of requests and http.client
+MAX_REDIRECTS = 30
+MAX_LINE = 65536
+
+
+class _Trace:
+    # The state of one request, passed to the trace callbacks of its session
+
+    def __init__(self, stats: ConnectionStats, clock):
+        self.stats = stats
+        self.clock = clock
+        self.timings = RequestTimings()
+        self.started = 0.0
+        self.sent = 0.0
+
+
+def _trace_config() -> aiohttp.TraceConfig:
+    # Records the timings of each request, and of each connection it opens
+    def tracer(fn):
+        async def callback(session, context, params):
+            fn(context.trace_request_ctx, params)
+
+        return callback
+
+    def request_start(trace: _Trace, params):
+        trace.stats.record_request()
+
+    def request_redirect(trace: _Trace, params):
+        # The timings are those of the last request
+        trace.timings = RequestTimings()
+        trace.stats.record_request()
+
+    def connection_create_start(trace: _Trace, params):
+        trace.started = trace.clock()
+
+    def connection_create_end(trace: _Trace, params):
+        timings = trace.timings
+        timings.connect = trace.clock() - trace.started - timings.dns
+        timings.reused = False
+        trace.stats.record_new_connection()
+
+    def dns_resolvehost_start(trace: _Trace, params):
+        trace.timings.dns = trace.clock()
+
+    def dns_resolvehost_end(trace: _Trace, params):
+        trace.timings.dns = trace.clock() - trace.timings.dns
+
+    def request_headers_sent(trace: _Trace, params):
+        trace.sent = trace.clock()
+
+    def request_end(trace: _Trace, params):
+        trace.timings.ttfb = trace.clock() - trace.sent
+
+    config = aiohttp.TraceConfig()
+    config.on_request_start.append(tracer(request_start))
+    config.on_request_redirect.append(tracer(request_redirect))
+    config.on_connection_create_start.append(tracer(connection_create_start))
+    config.on_connection_create_end.append(tracer(connection_create_end))
+    config.on_dns_resolvehost_start.append(tracer(dns_resolvehost_start))
+    config.on_dns_resolvehost_end.append(tracer(dns_resolvehost_end))
+    config.on_request_headers_sent.append(tracer(request_headers_sent))
+    config.on_request_end.append(tracer(request_end))
+    return config
+
+
+def _translate(error: Exception) -> Exception:
+    # The exception requests or http.client raises for the same failure, so that
+    # HealthCheckExecutor._describe_failure describes it
+    if isinstance(error, aiohttp.TooManyRedirects):
+        return TooManyRedirects(f"Exceeded {MAX_REDIRECTS} redirects.")
+    if isinstance(error, aiohttp.ClientConnectorCertificateError):
+        return error.certificate_error
+    if isinstance(error, aiohttp.ClientConnectorError):
+        return error.os_error
+    if isinstance(error, aiohttp.ServerDisconnectedError):
+        return http.client.RemoteDisconnected(str(error))
+    if isinstance(error, aiohttp.ClientPayloadError):
+        return http.client.IncompleteRead(b"")
+    return error
+
+
+def _raise(error: Exception, cause: BaseException = None):
+    translated = _translate(error)
+    if translated is error:
+        raise error
+    raise translated from cause or error
+
+
+def _connection_error(closed: Optional[asyncio.Future]) -> Optional[BaseException]:
+    # The error which closed a connection, such as a reset
+    if closed is None or not closed.done() or closed.cancelled():
+        return None
+    error = closed.exception()
+    return error.__cause__ if error is not None else None
+
+
+def _retrieve(closed: asyncio.Future):
+    # The error is only read when a body is incomplete
+    if not closed.cancelled():
+        closed.exception()
+
+
+class AsyncResponse:
+    """AsyncResponse Class
+
+    The response to a request sent by an
+    [AsyncPooledSession][pi_monitor.async_transport.AsyncPooledSession].  The
+    body is read with `read`.  Once the body has been read completely, the
+    connection returns to its pool; a response which is closed before then
+    closes its connection.
+
+    Attributes:
+        url: The URL of the request which received the response.
+        status_code: The HTTP status code.
+        reason: The reason phrase of the status.
+        headers: The response headers, with case-insensitive names.
+        encoding: The encoding of the body, from its `Content-Type`.
+        timings: The [RequestTimings][pi_monitor.transport.RequestTimings] of
+            the request.  `transfer` and `total` are left to the reader of the
+            body, and the TLS handshake is counted in `connect`.
+    """
+
+    url: str
+    status_code: int
+    reason: str
+    headers: CaseInsensitiveDict
+    encoding: Optional[str]
+    timings: RequestTimings
+
+    def __init__(self, response: aiohttp.ClientResponse, timings: RequestTimings):
+        self.url = str(response.url)
+        self.status_code = response.status
+        self.reason = response.reason or ""
+        self.headers = CaseInsensitiveDict()
+        for name, value in response.headers.items():
+            if name in self.headers:
+                value = f"{self.headers[name]}, {value}"
+            self.headers[name] = value
+        self.encoding = get_encoding_from_headers(self.headers)
+        self.timings = timings
+        self._response = response
+        # Keeps the error which closes the connection, which aiohttp only
+        # describes in the message of the incomplete body's error
+        connection = response.connection
+        self._closed = None if connection is None else connection.protocol.closed
+        if self._closed is not None:
+            self._closed.add_done_callback(_retrieve)
+
+    async def read(self, size: int) -> bytes:
+        """Read part of the body
+
+        Args:
+            size: The maximum number of bytes to read.
+
+        Returns:
+            Up to `size` bytes of the body, or no bytes once it has all been read.
+        """
+        try:
+            return await self._response.content.read(size)
+        except aiohttp.ClientError as e:
+            _raise(e, _connection_error(self._closed))
+
+    def close(self):
+        """Close the response
+
+        Closes the connection, unless the body was read completely.
+        """
+        if self._response.content.at_eof():
+            self._response.release()
+        else:
+            self._response.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+
+class AsyncPooledSession:
+    """AsyncPooledSession Class
+
+    Sends requests with an `aiohttp.ClientSession`, keeping a pool of keep-alive
+    connections per host, like a
+    [PooledSession][pi_monitor.transport.PooledSession].  Proxies are taken from
+    the environment, as by `requests`, but not credentials from `.netrc`.  The
+    client session belongs to the event loop which opened it, so a session should
+    be used from one event loop; it is opened again when another loop uses it.
+
+    Attributes:
+        stats: The [ConnectionStats][pi_monitor.transport.ConnectionStats] for
+                this session.
+        ssl_context: The context used to verify servers, which defaults to the
+                certificates trusted by `requests`.
+    """
+
+    USER_AGENT = default_user_agent()
+    clock = time.perf_counter
+
+    stats: ConnectionStats
+
+    def __init__(
+        self,
+        pool_connections: int = HttpSettings.pool_connections,
+        pool_maxsize: int = HttpSettings.pool_maxsize,
+        ssl_context: ssl.SSLContext = None,
+    ):
+        """Constructor
+
+        Args:
+            pool_connections: The number of hosts to keep connection pools for.
+                At most `pool_connections` times `pool_maxsize` connections
+                are open at once.
+            pool_maxsize: The maximum number of connections to keep per host.
+            ssl_context: The context used to verify servers, or `None` for the
+                certificates trusted by `requests`.
+        """
+        self.stats = ConnectionStats()
+        self.pool_connections = max(pool_connections, 1)
+        self.pool_maxsize = max(pool_maxsize, 1)
+        self._ssl_context = ssl_context
+        self._session: aiohttp.ClientSession = None
+        self._loop: asyncio.AbstractEventLoop = None
+
+    @classmethod
+    def from_settings(cls, http_settings: HttpSettings, min_pool_maxsize: int = 0):
+        """Build a session from settings
+
+        Args:
+            http_settings: An instance of
+                [HttpSettings][pi_monitor.HttpSettings], or `None` to use defaults.
+            min_pool_maxsize: The minimum number of connections to keep per host,
+                used to make room for every concurrent check.
+
+        Returns:
+            An [AsyncPooledSession][pi_monitor.async_transport.AsyncPooledSession]
+        """
+        if http_settings is None:
+            http_settings = HttpSettings()
+        return cls(
+            http_settings.pool_connections,
+            max(http_settings.pool_maxsize, min_pool_maxsize),
+        )
+
+    @property
+    def ssl_context(self) -> ssl.SSLContext:
+        if self._ssl_context is None:
+            bundle = (
+                os.environ.get("REQUESTS_CA_BUNDLE")
+                or os.environ.get("CURL_CA_BUNDLE")
+                or DEFAULT_CA_BUNDLE_PATH
+            )
+            if os.path.isdir(bundle):
+                self._ssl_context = ssl.create_default_context(capath=bundle)
+            else:
+                self._ssl_context = ssl.create_default_context(cafile=bundle)
+        return self._ssl_context
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str] = None,
+        timeout: Tuple[float, float] = (None, None),
+        time_limit: float = None,
+        allow_redirects: bool = True,
+    ) -> AsyncResponse:
+        """Send a request
+
+        The read timeout limits each wait for data, and the time limit bounds
+        the whole response, including any redirects and the body, as for
+        [PooledSession.request][pi_monitor.transport.PooledSession.request].
+        Running out of either raises an `asyncio.TimeoutError`.
+
+        Args:
+            method: The HTTP method.
+            url: The URL to request.
+            headers: Headers to send with the request.
+            timeout: The connect and read timeouts, in seconds.
+            time_limit: The maximum number of seconds to receive the whole
+                response, or `None` for no limit.
+            allow_redirects: True to follow redirects, up to `MAX_REDIRECTS`.
+
+        Returns:
+            An [AsyncResponse][pi_monitor.async_transport.AsyncResponse], which
+            should be closed once its body has been read.
+        """
+        parts = urlsplit(url)
+        if parts.scheme.lower() not in ("http", "https"):
+            raise InvalidSchema(f"No connection adapters were found for {url!r}")
+        if not parts.hostname:
+            raise InvalidURL(f"Invalid URL {url!r}: No host supplied")
+
+        connect_timeout, read_timeout = timeout
+        trace = _Trace(self.stats, self.clock)
+        try:
+            response = await self._get_session().request(
+                method,
+                url,
+                headers=headers,
+                allow_redirects=allow_redirects,
+                max_redirects=MAX_REDIRECTS,
+                proxy=select_proxy(url, get_environ_proxies(url)),
+                timeout=aiohttp.ClientTimeout(
+                    total=time_limit,
+                    sock_connect=connect_timeout,
+                    sock_read=read_timeout,
+                ),
+                trace_request_ctx=trace,
+            )
+        except aiohttp.ClientError as e:
+            _raise(e)
+        return AsyncResponse(response, trace.timings)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._loop is not loop:
+            self._loop = loop
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.pool_connections * self.pool_maxsize,
+                    limit_per_host=self.pool_maxsize,
+                    ssl=self.ssl_context,
+                ),
+                headers={"User-Agent": self.USER_AGENT},
+                trace_configs=[_trace_config()],
+                max_line_size=MAX_LINE,
+                max_field_size=MAX_LINE,
+            )
+        return self._session
+
+    async def aclose(self):
+        """Close every connection"""
+        session, self._session = self._session, None
+        if session is not None and self._loop is asyncio.get_running_loop():
+            await session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
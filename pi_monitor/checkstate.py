@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+
+Module for tracking the state of health checks.
+
+This module provides a per-check state machine which only confirms a change of
+[OpLevel][pi_monitor.enums.OpLevel] after a configurable number of consecutive
+results, so that a single transient failure does not open an incident.
+
+"""
+
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+from .enums import OpLevel
+from .files import write_atomic
+from .latency import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+
+class CheckState:
+    """CheckState Class
+
+    The recent results of a single health check, and the
+    [OpLevel][pi_monitor.enums.OpLevel] last confirmed for it.
+
+    Results are kept in a rolling window of `WINDOW_SIZE` bits, where the lowest
+    bit is the most recent result and a set bit is a failure.
+
+    A check starts with no confirmed level.  Its first successful result is
+    confirmed immediately, while a failure is only confirmed after
+    `failures_to_open` consecutive failures.  Once a failure has been confirmed,
+    `successes_to_close` consecutive successes are needed to confirm that the
+    check is operational again.
+
+    Attributes:
+        history: The rolling window of results.
+        count: The number of results in the window.
+        level: The confirmed [OpLevel][pi_monitor.enums.OpLevel], or `None` if no
+            level has been confirmed yet.
+        latency: The [LatencyHistogram][pi_monitor.latency.LatencyHistogram] of
+            recent response times, if the check has latency objectives.
+    """
+
+    WINDOW_SIZE = 64
+
+    history: int
+    count: int
+    level: Optional[OpLevel]
+    latency: Optional[LatencyHistogram]
+
+    def __init__(
+        self,
+        history: int = 0,
+        count: int = 0,
+        level: OpLevel = None,
+        latency: LatencyHistogram = None,
+    ):
+        self.history = history
+        self.count = count
+        self.level = level
+        self.latency = latency
+
+    def record(
+        self, op_level: OpLevel, failures_to_open: int = 1, successes_to_close: int = 1
+    ) -> bool:
+        """Record the result of a check
+
+        Args:
+            op_level: The [OpLevel][pi_monitor.enums.OpLevel] observed by the check
+            failures_to_open: The number of consecutive failures needed to confirm a
+                failure.
+            successes_to_close: The number of consecutive successes needed to
+                confirm recovery from a failure.
+
+        Returns:
+            True if the result confirmed a change of level.
+        """
+        failed = op_level != OpLevel.Operational
+        self.history = ((self.history << 1) | failed) & ((1 << self.WINDOW_SIZE) - 1)
+        self.count = min(self.count + 1, self.WINDOW_SIZE)
+
+        if op_level == self.level:
+            return False
+
+        if failed:
+            confirmed = self._consecutive(failures_to_open, True)
+        else:
+            confirmed = self.level is None or self._consecutive(
+                successes_to_close, False
+            )
+
+        if confirmed:
+            self.level = op_level
+        return confirmed
+
+    @property
+    def failures(self) -> int:
+        """The number of failures in the window"""
+        return bin(self.history).count("1")
+
+    def _consecutive(self, required: int, failed: bool) -> bool:
+        required = min(max(required, 1), self.WINDOW_SIZE)
+        if self.count < required:
+            return False
+        mask = (1 << required) - 1
+        return self.history & mask == (mask if failed else 0)
+
+
+class CheckStateStore:
+    """CheckStateStore Class
+
+    A thread-safe collection of [CheckState][pi_monitor.checkstate.CheckState] by
+    check name, which can be saved to and loaded from a file so that the recent
+    results of each check survive between one-shot runs.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states: Dict[str, CheckState] = {}
+
+    def get(self, name: str) -> CheckState:
+        """Retrieve the state of a check, creating it if required
+
+        Args:
+            name: The name of the check
+
+        Returns:
+            The [CheckState][pi_monitor.checkstate.CheckState] of the check
+        """
+        with self._lock:
+            state = self._states.get(name)
+            if state is None:
+                state = self._states[name] = CheckState()
+            return state
+
+    def remove(self, name: str):
+        """Remove the state of a check, if there is one
+
+        Args:
+            name: The name of the check
+        """
+        with self._lock:
+            self._states.pop(name, None)
+
+    def load(self, file: str):
+        """Load states from a file
+
+        A missing or unreadable file leaves the store empty.
+
+        Args:
+            file: The file to load
+        """
+        path = Path(file)
+        if not path.exists():
+            return
+        try:
+            data = json.loads(path.read_text())
+            states = {
+                name: CheckState(
+                    int(entry["history"]),
+                    int(entry["count"]),
+                    OpLevel[entry["level"]] if entry["level"] else None,
+                    (
+                        LatencyHistogram.from_dict(entry["latency"])
+                        if entry.get("latency")
+                        else None
+                    ),
+                )
+                for name, entry in data["checks"].items()
+            }
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.warning("Ignoring invalid check state %s: %s", file, e)
+            return
+
+        with self._lock:
+            self._states.update(states)
+        logger.debug("Loaded state for %d checks from %s", len(states), file)
+
+    def save(self, file: str):
+        """Save states to a file
+
+        The file is written atomically, so concurrent runs never read a partial
+        file.
+
+        Args:
+            file: The file to write
+        """
+        with self._lock:
+            checks = {
+                name: {
+                    "history": state.history,
+                    "count": state.count,
+                    "level": state.level.name if state.level else None,
+                    "latency": state.latency.to_dict() if state.latency else None,
+                }
+                for name, state in self._states.items()
+            }
+
+        try:
+            write_atomic(file, json.dumps({"checks": checks}).encode())
+        except OSError as e:
+            logger.warning("Failed to save check state %s: %s", file, e)
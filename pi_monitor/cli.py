@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""
+
+Module for the `pi-monitor` command line.
+
+"""
+
+import argparse
+import logging
+import logging.config
+import os
+import signal
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, closing
+from functools import partial
+import coloredlogs
+import yaml
+from .config_cache import read_cached_configuration
+from .config_watcher import ConfigReloader
+from .configuration import ConfigurationError, MonitorSettings, read_configuration
+from .healthchecks import AsyncHealthCheckExecutor, HealthCheckExecutor
+from .notifications import NotificationDispatcher, Notifier
+from .scheduler import CheckScheduler
+from .statuspage_io import StatusPageOperator
+from .transport import PooledSession
+
+
+def get_parser():
+    PARSER = argparse.ArgumentParser()
+    PARSER.add_argument(
+        "-c", "--configfile", help="Configuration File", default="monitor.config.json"
+    )
+    PARSER.add_argument(
+        "-d",
+        "--daemon",
+        help="Run continuously, executing each check on its own interval",
+        action="store_true",
+    )
+    PARSER.add_argument(
+        "-e",
+        "--engine",
+        help="Execution engine used to run health checks",
+        choices=["threads", "asyncio"],
+        default="threads",
+    )
+    PARSER.add_argument(
+        "-w",
+        "--concurrency",
+        help="Maximum number of health checks to run at once",
+        type=int,
+    )
+    PARSER.add_argument(
+        "--no-reload",
+        help="In daemon mode, do not reload the configuration file when it changes",
+        dest="reload",
+        action="store_false",
+    )
+    PARSER.add_argument(
+        "--no-config-cache",
+        help="Read the configuration file without its compiled cache",
+        dest="config_cache",
+        action="store_false",
+    )
+
+    return PARSER
+
+
+def setup_logging(
+    default_path="logging.yaml", default_level=logging.INFO, env_key="LOG_CFG"
+):
+    """
+    | **@author:** Prathyush SP
+    | https://gist.github.com/kingspp/9451566a5555fb022215ca2b7b802f19
+    | Logging Setup
+    """
+    path = default_path
+    value = os.getenv(env_key, None)
+    if value:
+        path = value
+    if os.path.exists(path):
+        with open(path, "rt") as f:
+            try:
+                config = yaml.safe_load(f.read())
+                logging.config.dictConfig(config)
+                coloredlogs.install()
+            except Exception as e:
+                print(e)
+                print("Error in Logging Configuration. Using default configuration.")
+                logging.basicConfig(level=default_level)
+                coloredlogs.install(level=default_level)
+    else:
+        logging.basicConfig(level=default_level)
+        coloredlogs.install(level=default_level)
+        print(f"File {default_path} not found. Using default logging configuration.")
+
+
+def main():
+    setup_logging()
+    logger = logging.getLogger(__name__)
+
+    parser = get_parser()
+    args = parser.parse_args()
+
+    if not os.path.exists(args.configfile):
+        logger.error("Configuration file not found: %s", args.configfile)
+        sys.exit(1)
+
+    logger.info("Reading Configuration File")
+    try:
+        read = read_cached_configuration if args.config_cache else read_configuration
+        config_data = read(args.configfile, MonitorSettings())
+    except ConfigurationError as e:
+        logger.error("Invalid configuration: %s", e)
+        sys.exit(1)
+
+    notifier = NotificationDispatcher.from_settings(
+        Notifier(config_data.notification), config_data.notification
+    )
+    status_page_operator = None
+    if config_data.status_page is not None:
+        status_page_operator = StatusPageOperator(config_data.status_page)
+    else:
+        logger.warning("No status_page settings, statuspage.io will not be updated")
+    http_settings = config_data.http
+    state_file = config_data.state_file
+
+    with ExitStack() as stack:
+        # Registered first so that it runs last, sending the notifications queued
+        # by the final flush of status updates
+        stack.callback(notifier.close)
+        if status_page_operator is not None:
+            stack.callback(status_page_operator.save_cache)
+            stack.callback(status_page_operator.client.close)
+        health_check_executor, run_cycle = create_executor(
+            args, status_page_operator, notifier, http_settings, stack
+        )
+        health_check_executor.cycle_deadline = config_data.cycle_deadline
+        if state_file:
+            health_check_executor.states.load(state_file)
+            stack.callback(health_check_executor.states.save, state_file)
+        stack.callback(health_check_executor.flush_status_updates, True)
+        reloader = None
+        if args.reload:
+            reloader = partial(
+                ConfigReloader,
+                args.configfile,
+                config_data,
+                states=health_check_executor.states,
+            )
+        run_checks(
+            run_cycle,
+            config_data.status_checks,
+            args.daemon,
+            reloader,
+            get_concurrency(args),
+        )
+
+
+def get_concurrency(args) -> int:
+    """Get the maximum number of health checks to run at once
+
+    Args:
+        args: The parsed command line arguments.
+
+    Returns:
+        The `--concurrency`, or the default of the selected engine.
+    """
+    if args.concurrency:
+        return args.concurrency
+    if args.engine == "asyncio":
+        return AsyncHealthCheckExecutor.DEFAULT_CONCURRENCY
+    return 4
+
+
+def create_executor(
+    args, status_page_operator, notifier, http_settings, stack: ExitStack
+):
+    """Create the health check executor for the selected engine
+
+    Args:
+        args: The parsed command line arguments.
+        status_page_operator: The [StatusPageOperator][pi_monitor.StatusPageOperator],
+            if any.
+        notifier: The [Notifier][pi_monitor.Notifier]
+        http_settings: The [HttpSettings][pi_monitor.HttpSettings], if any.
+        stack: An `ExitStack` which releases the executor's resources.
+
+    Returns:
+        A tuple of the executor and a callable which executes a list of checks.
+    """
+    if args.engine == "asyncio":
+        # Imports asyncio and aiohttp, so only with the asyncio engine
+        try:
+            from .async_transport import AsyncPooledSession
+        except ImportError as e:
+            logging.getLogger(__name__).error(
+                "The asyncio engine needs aiohttp, installed with "
+                "spydersoft-pi-monitor[asyncio]: %s",
+                e,
+            )
+            sys.exit(1)
+
+        concurrency = get_concurrency(args)
+        health_check_executor = AsyncHealthCheckExecutor(
+            status_page_operator,
+            notifier,
+            concurrency,
+            async_session=AsyncPooledSession.from_settings(http_settings, concurrency),
+        )
+        stack.enter_context(closing(health_check_executor))
+        return health_check_executor, health_check_executor.run_cycle
+
+    concurrency = get_concurrency(args)
+    health_check_executor = HealthCheckExecutor(
+        status_page_operator,
+        notifier,
+        PooledSession.from_settings(http_settings, concurrency),
+    )
+    executor = stack.enter_context(ThreadPoolExecutor(max_workers=concurrency))
+    return health_check_executor, partial(
+        health_check_executor.execute_health_checks, executor=executor
+    )
+
+
+def run_checks(
+    run_cycle, status_checks, daemon: bool, reloader=None, concurrency: int = 4
+):
+    """Run health checks once, or continuously in daemon mode
+
+    Args:
+        run_cycle: A callable that executes a list of health checks.
+        status_checks: The health checks to run.
+        daemon: True to keep running checks until the process is stopped.
+        reloader: In daemon mode, a callable which creates a
+            [ConfigReloader][pi_monitor.ConfigReloader] for the scheduler, if any.
+        concurrency: In daemon mode, the maximum number of checks to run at once.
+    """
+    if daemon:
+        run_daemon(run_cycle, status_checks, reloader, concurrency)
+    else:
+        run_cycle(status_checks)
+
+
+def run_daemon(run_cycle, status_checks, reloader=None, concurrency: int = 4):
+    """Run health checks until the process is stopped
+
+    Schedules each check on its own interval and runs until a `SIGINT` or
+    `SIGTERM` is received, then waits for the checks which are running.  Each
+    check runs on its own, so a slow check does not delay the others.  The
+    executor, operator and notifier are created once and reused for every check.
+    With a `reloader`, changes to the configuration file are applied to the
+    schedule as the checks run.
+
+    Args:
+        run_cycle: A callable that executes a list of health checks.
+        status_checks: The health checks to schedule.
+        reloader: A callable which creates a
+            [ConfigReloader][pi_monitor.ConfigReloader] for the scheduler, if any.
+        concurrency: The maximum number of checks to run at once.
+    """
+    logger = logging.getLogger(__name__)
+    stop_event = threading.Event()
+    scheduler: CheckScheduler = None
+
+    def stop(signum, frame):
+        logger.info("Received signal %d, stopping", signum)
+        stop_event.set()
+        if scheduler is not None:
+            scheduler.wake()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    with ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="pi-monitor-scheduler"
+    ) as executor:
+        scheduler = CheckScheduler(run_cycle, status_checks, executor=executor)
+        if reloader is None:
+            scheduler.run(stop_event)
+            return
+
+        with closing(reloader(scheduler)) as config_reloader:
+            scheduler.run(stop_event, config_reloader.poll)
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+
+Module for caching the compiled configuration.
+
+This module reads the configuration file through a cache of the validated
+[MonitorSettings][pi_monitor.MonitorSettings], which is stored next to the file.
+The cache is keyed by the modification time, size and SHA-256 hash of the file,
+and is rebuilt whenever the file changes, so one-shot runs with a large
+configuration do not parse and validate it every time.  Assertions are not
+cached, since compiled regular expressions would be compiled again as they are
+loaded; each check compiles its assertions when it first runs.
+
+"""
+
+import gc
+import hashlib
+import logging
+import os
+import pickle
+from pathlib import Path
+from typing import Optional, Tuple
+from .configuration import MonitorSettings, Settings, parse_configuration
+from .files import write_atomic
+
+logger = logging.getLogger(__name__)
+
+# Increase when the pickled form of settings or compiled assertions changes
+CACHE_VERSION = 1
+
+
+def get_cache_file(file: str) -> Path:
+    """The cache file of a configuration file
+
+    Args:
+        file: The configuration file
+
+    Returns:
+        The hidden file next to the configuration file which caches it, such as
+        `.monitor.config.json.cache`
+    """
+    path = Path(file)
+    return path.with_name(f".{path.name}.cache")
+
+
+def read_cached_configuration(
+    file: str, default_settings: MonitorSettings = None, cache_file: str = None
+) -> MonitorSettings:
+    """Read the configuration file through its cache
+
+    The cache is used if its key matches the file's modification time, size and
+    SHA-256 hash.  Otherwise the file is read, and the cache is written
+    atomically, so that overlapping runs only ever read a complete cache.  A
+    missing, invalid or unwritable cache is never an error.
+
+    Only a cache owned by the current user is loaded, because loading a cache
+    can run code, as unpickling any file can.
+
+    Args:
+        file: The configuration file.
+        default_settings: A default instance of the settings to use if the file
+            cannot be found.
+        cache_file: The cache file, or `None` to use
+            [get_cache_file][pi_monitor.config_cache.get_cache_file].
+
+    Returns:
+        MonitorSettings: A MonitorSettings object populated from the given file,
+            or `default_settings`.
+
+    Raises:
+        ConfigurationError: If the file is not valid JSON, or a setting is invalid.
+    """
+    cache_path = Path(cache_file) if cache_file else get_cache_file(file)
+    try:
+        with open(file, "rb") as f:
+            stat = os.fstat(f.fileno())
+            content = f.read()
+    except FileNotFoundError:
+        logger.error("Configuration file not found: %s.  Using default", file)
+        return default_settings
+
+    key = (
+        CACHE_VERSION,
+        _schema(),
+        stat.st_mtime_ns,
+        stat.st_size,
+        hashlib.sha256(content).hexdigest(),
+    )
+    settings = _load(cache_path, key)
+    if settings is not None:
+        logger.debug("Loaded configuration from cache %s", cache_path)
+        return settings
+
+    settings = parse_configuration(content)
+    try:
+        write_atomic(
+            cache_path,
+            pickle.dumps(key, pickle.HIGHEST_PROTOCOL)
+            + pickle.dumps(settings, pickle.HIGHEST_PROTOCOL),
+        )
+    except (OSError, pickle.PicklingError) as e:
+        logger.warning("Failed to save configuration cache %s: %s", cache_path, e)
+    return settings
+
+
+def _load(cache_path: Path, key: tuple) -> Optional[MonitorSettings]:
+    try:
+        with open(cache_path, "rb") as f:
+            if hasattr(os, "getuid") and os.fstat(f.fileno()).st_uid != os.getuid():
+                logger.warning(
+                    "Ignoring configuration cache %s of another user", cache_path
+                )
+                return None
+            if pickle.load(f) != key:
+                return None
+            # Unpickling creates many objects and no garbage, so the collector
+            # would only slow it down
+            collecting = gc.isenabled()
+            gc.disable()
+            try:
+                settings = pickle.load(f)
+            finally:
+                if collecting:
+                    gc.enable()
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning("Ignoring invalid configuration cache %s: %s", cache_path, e)
+        return None
+    return settings if type(settings) is MonitorSettings else None
+
+
+def _schema() -> Tuple[Tuple[str, Tuple[str, ...]], ...]:
+    # The settings of each settings class, so that a cache written by a version
+    # with different settings is not loaded
+    return tuple(
+        (cls.__qualname__, tuple(cls._slots)) for cls in Settings.__subclasses__()
+    )
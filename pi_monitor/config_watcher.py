@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+
+Module for reloading the configuration file.
+
+This module provides a watcher which detects changes to the configuration file,
+and a reloader which reads the changed file and applies its health checks to a
+running [CheckScheduler][pi_monitor.CheckScheduler], so that daemon mode does
+not need a restart, which would drop warm connections and check state.
+
+"""
+
+import logging
+import os
+import struct
+import sys
+from pathlib import Path
+from typing import Optional, Tuple
+from .checkstate import CheckStateStore
+from .configuration import ConfigurationError, MonitorSettings, read_configuration
+from .scheduler import CheckScheduler
+
+logger = logging.getLogger(__name__)
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_EVENT = struct.Struct("iIII")
+
+
+class _Inotify:
+    # A non-blocking inotify watch on a directory, using the C library through
+    # ctypes.  Raises OSError where inotify is not available.
+    def __init__(self, directory: Path):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        import ctypes
+
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            init, add_watch = libc.inotify_init1, libc.inotify_add_watch
+        except AttributeError as e:
+            raise OSError(str(e)) from e
+
+        self.fd = init(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        if (
+            add_watch(self.fd, os.fsencode(directory), _IN_CLOSE_WRITE | _IN_MOVED_TO)
+            < 0
+        ):
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, os.strerror(error))
+
+    def read_events(self) -> bool:
+        # Drains the pending events, returning True if there were any
+        events = False
+        while True:
+            try:
+                data = os.read(self.fd, 4096)
+            except BlockingIOError:
+                return events
+            events = events or len(data) >= _EVENT.size
+
+    def close(self):
+        os.close(self.fd)
+
+
+class ConfigWatcher:
+    """ConfigWatcher Class
+
+    Detects changes to a file.  On Linux, the file's directory is watched with
+    inotify, so the file is only examined after something in the directory was
+    written or replaced.  Elsewhere, or if inotify cannot be used, the file is
+    examined every time `changed` is called.
+
+    A change is a new modification time, size or inode, so files which are
+    replaced, as editors and `write_atomic` do, are detected as well as files
+    which are written in place.
+
+    Attributes:
+        file: The file to watch.
+        uses_inotify: True if inotify is used to detect changes.
+    """
+
+    file: Path
+    uses_inotify: bool
+
+    def __init__(self, file: str, use_inotify: bool = True):
+        """Constructor
+
+        Args:
+            file: The file to watch.
+            use_inotify: False to always examine the file, rather than use inotify.
+        """
+        self.file = Path(file)
+        self._inotify: Optional[_Inotify] = None
+        if use_inotify:
+            try:
+                self._inotify = _Inotify(self.file.parent.absolute())
+            except OSError as e:
+                logger.debug("Polling %s, inotify is unavailable: %s", file, e)
+        self.uses_inotify = self._inotify is not None
+        self._signature = self._stat()
+
+    def changed(self) -> bool:
+        """Check whether the file has changed
+
+        Returns:
+            True if the file has changed since the watcher was created, or since
+            the last call which returned True.
+        """
+        if self._inotify is not None and not self._inotify.read_events():
+            return False
+        signature = self._stat()
+        if signature == self._signature:
+            return False
+        self._signature = signature
+        return True
+
+    def close(self):
+        """Stop watching the file"""
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _stat(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = self.file.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+class ConfigReloader:
+    """ConfigReloader Class
+
+    Reloads the configuration file when it changes, and applies its health checks
+    to a [CheckScheduler][pi_monitor.CheckScheduler].  Only the checks which were
+    added, removed or changed are rescheduled, and the
+    [CheckState][pi_monitor.checkstate.CheckState] of every check which remains
+    is kept.
+
+    An invalid file is logged and ignored, and the checks already scheduled keep
+    running.  Other settings, such as notification or statuspage.io settings,
+    are only read when `pi-monitor` starts.
+
+    Attributes:
+        settings: The [MonitorSettings][pi_monitor.MonitorSettings] last read.
+        scheduler: The [CheckScheduler][pi_monitor.CheckScheduler] to update.
+        states: The [CheckStateStore][pi_monitor.checkstate.CheckStateStore] from
+            which the state of removed checks is discarded, if any.
+        watcher: The [ConfigWatcher][pi_monitor.config_watcher.ConfigWatcher] of
+            the configuration file.
+    """
+
+    settings: MonitorSettings
+    scheduler: CheckScheduler
+    states: CheckStateStore
+    watcher: ConfigWatcher
+
+    def __init__(
+        self,
+        file: str,
+        settings: MonitorSettings,
+        scheduler: CheckScheduler,
+        states: CheckStateStore = None,
+        watcher: ConfigWatcher = None,
+    ):
+        """Constructor
+
+        Args:
+            file: The configuration file.
+            settings: The [MonitorSettings][pi_monitor.MonitorSettings] which were
+                read from the file.
+            scheduler: The [CheckScheduler][pi_monitor.CheckScheduler] to update.
+            states: The [CheckStateStore][pi_monitor.checkstate.CheckStateStore]
+                of the executor, if any.
+            watcher: The watcher of the file, or `None` to create one.
+        """
+        self.settings = settings
+        self.scheduler = scheduler
+        self.states = states
+        self.watcher = watcher or ConfigWatcher(file)
+
+    def poll(self) -> bool:
+        """Reload the configuration file if it has changed
+
+        Returns:
+            True if a changed configuration was applied.
+        """
+        if not self.watcher.changed():
+            return False
+
+        file = self.watcher.file
+        try:
+            settings = read_configuration(file, None)
+        except (ConfigurationError, OSError) as e:
+            logger.error("Ignoring invalid configuration %s: %s", file, e)
+            return False
+        if settings is None:
+            return False
+
+        added, removed, changed = self.scheduler.update_checks(settings.status_checks)
+        if self.states is not None:
+            for name in removed:
+                self.states.remove(name)
+        for name in (
+            "notification",
+            "status_page",
+            "http",
+            "state_file",
+            "cycle_deadline",
+        ):
+            if getattr(settings, name) != getattr(self.settings, name):
+                logger.warning("Restart pi-monitor to apply changes to %s", name)
+        self.settings = settings
+        logger.info(
+            "Reloaded %s: %d checks added, %d removed, %d changed",
+            file,
+            len(added),
+            len(removed),
+            len(changed),
+        )
+        return True
+
+    def close(self):
+        """Stop watching the configuration file"""
+        self.watcher.close()
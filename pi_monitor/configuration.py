@@ -6,17 +6,288 @@ Module for reading configuration.
 This module provides a function for reading a JSON file into
  the provided Settings objects.
 
+Each settings class declares its settings as annotated attributes, with their
+defaults.  Settings are stored in `__slots__`, so a configuration with many
+checks does not pay for an instance dictionary per check, and the file is
+validated in a single pass as it is read.  An invalid file raises a
+[ConfigurationError][pi_monitor.configuration.ConfigurationError] naming the JSON
+path of the invalid value.
+
 """
 
+import difflib
 import json
-from typing import List
 import logging
+import typing
 from pathlib import Path
+from typing import Callable, List, NamedTuple, Tuple
+from .assertions import AssertionSet, compile_assertion
+from .latency import LatencyHistogram
 
 logger = logging.getLogger(__name__)
 
 
-class StatusPageComponentSettings:
+class ConfigurationError(ValueError):
+    """ConfigurationError Class
+
+    Raised when the configuration file is invalid.
+
+    Attributes:
+        path: The JSON path of the invalid value, such as `$.status_checks[0].url`
+    """
+
+    path: str
+
+    def __init__(self, path: str, message: str):
+        super().__init__(f"{path}: {message}")
+        self.path = path
+
+
+class _Setting:
+    # Stores a setting in its slot.  The default is returned when the setting is
+    # read from the class, or has not been set on the instance.
+    __slots__ = ("slot", "default")
+
+    def __init__(self, slot, default):
+        self.slot = slot
+        self.default = default
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self.default
+        try:
+            return self.slot.__get__(instance, owner)
+        except AttributeError:
+            return self.default
+
+    def __set__(self, instance, value):
+        self.slot.__set__(instance, value)
+
+
+class _Field(NamedTuple):
+    slot: object
+    # The JSON types accepted for a scalar, or empty to use parse
+    types: Tuple[type, ...]
+    parse: Callable[[object, str], object]
+    nullable: bool
+    positive: bool
+    validate: Callable[[object, object, str], None]
+
+
+class _SettingsType(type):
+    # Moves the annotated attributes of a settings class into slots, and builds the
+    # table of fields used to read them from the configuration file
+    def __new__(mcs, name, bases, namespace):
+        annotations = namespace.get("__annotations__", {})
+        computed = namespace.get("_computed", ())
+        positive = namespace.get("_positive", ())
+        required = tuple(
+            field
+            for field in annotations
+            if field not in namespace and field not in computed
+        )
+        defaults = {field: namespace.pop(field, None) for field in annotations}
+        namespace["__slots__"] = tuple(annotations)
+        cls = super().__new__(mcs, name, bases, namespace)
+
+        cls._slots = {}
+        cls._fields = {}
+        for field, default in defaults.items():
+            slot = cls._slots[field] = cls.__dict__[field]
+            setattr(cls, field, _Setting(slot, default))
+            if field not in computed:
+                cls._fields[field] = _Field(
+                    slot,
+                    _SCALARS.get(annotations[field], ((), None))[0],
+                    _parser(annotations[field]),
+                    field not in required and default is None,
+                    field in positive,
+                    getattr(cls, f"_validate_{field}", None),
+                )
+        cls._required = required
+        return cls
+
+
+class Settings(metaclass=_SettingsType):
+    """Settings Class
+
+    The base class for settings.  Each annotated attribute of a subclass is a
+    setting.  Attributes without a default are required in the configuration
+    file, and are `None` until they are set.  Reading an attribute from the class
+    returns its default.
+
+    Settings can be given as keyword arguments, such as
+    `LatencySettings(degraded=0.5)`.  Two instances are equal when all of their
+    settings are equal.
+
+    When a setting is read from the configuration file, its value is checked
+    against its annotated type, settings listed in `_positive` must be greater
+    than 0, and a `_validate_<setting>` method, if there is one, is called with
+    the value and its JSON path.  Once every setting has been read, `_validate`
+    is called with the JSON path of the settings, to check settings which depend
+    on each other.
+    """
+
+    _computed = ()
+    _positive = ()
+
+    def __init__(self, **values):
+        for name, value in values.items():
+            slot = self._slots.get(name)
+            if slot is None:
+                raise TypeError(f"Unknown setting for {type(self).__name__}: {name}")
+            slot.__set__(self, value)
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self._fields)
+
+    def __reduce__(self):
+        # Pickles only the values of the slots, without their names.  Computed
+        # settings are left out, to be computed again when they are used.
+        values = []
+        for name, slot in self._slots.items():
+            try:
+                values.append(_Unset if name in self._computed else slot.__get__(self))
+            except AttributeError:
+                values.append(_Unset)
+        return _restore, (type(self), tuple(values))
+
+    def __repr__(self) -> str:
+        values = ", ".join(
+            f"{name}={getattr(self, name)!r}"
+            for name in self._slots
+            if getattr(self, name) != getattr(type(self), name)
+        )
+        return f"{type(self).__name__}({values})"
+
+    @classmethod
+    def from_dict(cls, data: dict, path: str = "$") -> "Settings":
+        """Create settings from a dictionary read from the configuration file
+
+        Args:
+            data: The dictionary
+            path: The JSON path of the dictionary, used in error messages.
+
+        Returns:
+            The validated settings.
+
+        Raises:
+            ConfigurationError: If the settings are invalid.
+        """
+        if type(data) is not dict:
+            raise ConfigurationError(
+                path, f"expected an object, found {_describe(data)}"
+            )
+
+        settings = cls.__new__(cls)
+        fields = cls._fields
+        for name, value in data.items():
+            field = fields.get(name)
+            if field is None:
+                raise ConfigurationError(f"{path}.{name}", _unknown(name, cls))
+            slot, types, parse, nullable, positive, validate = field
+            if value is None:
+                if not nullable:
+                    raise ConfigurationError(f"{path}.{name}", "must not be null")
+            elif type(value) in types:
+                # JSON values are exact types, so bool is never taken for int
+                if positive and value <= 0:
+                    raise ConfigurationError(f"{path}.{name}", "must be greater than 0")
+            else:
+                value = parse(value, f"{path}.{name}")
+            if validate is not None and value is not None:
+                validate(settings, value, f"{path}.{name}")
+            slot.__set__(settings, value)
+
+        for name in cls._required:
+            if name not in data:
+                raise ConfigurationError(f"{path}.{name}", "required setting missing")
+
+        settings._validate(path)
+        return settings
+
+    def _validate(self, path: str):
+        pass
+
+
+class _Unset:
+    # Marks a setting which has not been set, when settings are pickled
+    pass
+
+
+def _restore(cls: type, values: tuple) -> Settings:
+    settings = cls.__new__(cls)
+    for slot, value in zip(cls._slots.values(), values):
+        if value is not _Unset:
+            slot.__set__(settings, value)
+    return settings
+
+
+_SCALARS = {
+    str: ((str,), "a string"),
+    int: ((int,), "an integer"),
+    float: ((int, float), "a number"),
+    bool: ((bool,), "a boolean"),
+    object: ((str, int, float, bool, list, dict), "a value"),
+}
+
+
+def _parser(setting_type: object) -> Callable[[object, str], object]:
+    if typing.get_origin(setting_type) is list:
+        (item_type,) = typing.get_args(setting_type)
+        parse_item = _parser(item_type)
+
+        def parse_list(value, path):
+            if type(value) is not list:
+                raise ConfigurationError(
+                    path, f"expected a list, found {_describe(value)}"
+                )
+            items = []
+            for index, item in enumerate(value):
+                if item is None:
+                    raise ConfigurationError(f"{path}[{index}]", "must not be null")
+                items.append(parse_item(item, f"{path}[{index}]"))
+            return items
+
+        return parse_list
+
+    if isinstance(setting_type, type) and issubclass(setting_type, Settings):
+        return setting_type.from_dict
+
+    types, expected = _SCALARS.get(setting_type, _SCALARS[object])
+
+    def parse_scalar(value, path):
+        if type(value) in types:
+            return value
+        raise ConfigurationError(path, f"expected {expected}, found {_describe(value)}")
+
+    return parse_scalar
+
+
+def _describe(value: object) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "a boolean"
+    if isinstance(value, (int, float)):
+        return "a number"
+    if isinstance(value, str):
+        return "a string"
+    if isinstance(value, list):
+        return "a list"
+    return "an object"
+
+
+def _unknown(name: str, cls: type) -> str:
+    matches = difflib.get_close_matches(name, list(cls._fields), n=1)
+    if matches:
+        return f"unknown setting, did you mean {matches[0]!r}?"
+    return "unknown setting"
+
+
+class StatusPageComponentSettings(Settings):
     """Settings for StatusPage.io components.
 
     Attributes:
@@ -26,17 +297,58 @@ class StatusPageComponentSettings:
     component_id: str
 
 
-class Generic:
-    """Generic method for reading dictionary values."""
+class LatencySettings(Settings):
+    """Settings for the latency objectives of a HealthCheck.
 
-    @classmethod
-    def from_dict(cls, dict):
-        obj = cls()
-        obj.__dict__.update(dict)
-        return obj
+    A site which responds successfully, but slowly, is considered degraded.  A
+    percentile of its recent response times is compared with the thresholds.
 
+    Attributes:
+        percentile (float): The percentile of recent response times to compare with
+            the thresholds. Defaults to 95.
+        degraded (float): The response time, in seconds, above which the site is
+            considered degraded.
+        partial_outage (float): The response time, in seconds, above which the site
+            is considered partially unavailable.
+        window (int): The number of checks after which a response time counts half
+            as much. Defaults to 20.
+        min_samples (int): The number of response times needed before the
+            thresholds are applied. Defaults to 5.  As older response times decay,
+            it must be less than the number counted with the `window`, about 28
+            for a window of 20.
+    """
 
-class HealthCheckSettings:
+    _positive = ("percentile", "degraded", "partial_outage", "window")
+
+    percentile: float = 95
+    degraded: float = None
+    partial_outage: float = None
+    window: int = 20
+    min_samples: int = 5
+
+    def _validate_percentile(self, value: float, path: str):
+        if value > 100:
+            raise ConfigurationError(path, "must be at most 100")
+
+    def _validate(self, path: str):
+        if (
+            self.degraded is not None
+            and self.partial_outage is not None
+            and self.partial_outage < self.degraded
+        ):
+            raise ConfigurationError(
+                f"{path}.partial_outage", "must be at least degraded"
+            )
+        limit = LatencyHistogram.max_samples(self.window)
+        if self.min_samples >= limit:
+            raise ConfigurationError(
+                f"{path}.min_samples",
+                f"must be less than {limit:.1f}, the most response times counted "
+                f"with a window of {self.window}",
+            )
+
+
+class HealthCheckSettings(Settings):
     """Settings for a HealthCheck.
 
     A Healthcheck represents a simple request to the defined `url`.
@@ -63,26 +375,155 @@ class HealthCheckSettings:
         url (str): The url to be fetched as part of the check
         status_page (StatusPageComponentSettings): Any StatusPage-related
             component settings
+        interval (int): The number of seconds between runs of this check when
+            running in daemon mode. Defaults to 60.
+        failures_to_open (int): The number of consecutive failed checks before the
+            site is considered down. Defaults to 1.
+        successes_to_close (int): The number of consecutive successful checks
+            before a site which is down is considered up again. Defaults to 1.
+        connect_timeout (float): The number of seconds to wait for a connection to
+            the site. Defaults to 5.
+        read_timeout (float): The number of seconds to wait for the site to send
+            data. Defaults to 10.
+        max_body_bytes (int): The maximum number of bytes of the response body to
+            read. Defaults to 65536.
+        discard_body (bool): True to check only the status code, without reading
+            the response body. Defaults to False.
+        method (str): The HTTP method used to probe the site: `GET`, `HEAD` or
+            `OPTIONS`. Defaults to `GET`.
+        range_bytes (int): If set, a `GET` only requests the first `range_bytes`
+            bytes of the response body, using a `Range` header.
+        expected_status (List[int]): The status codes which indicate that the site is
+            up. Defaults to `200`, and `206` as well when `range_bytes` is set.
+        assertions (List[object]): Assertions on the response body, each with one
+            of `contains`, `regex` or `json_path` (with an optional `equals`).
+        compiled_assertions (AssertionSet): The compiled `assertions`, set when the
+            configuration is read.
+        latency (LatencySettings): The latency objectives of the site, if any.
     """
 
+    METHODS = ("GET", "HEAD", "OPTIONS")
+
+    _computed = ("compiled_assertions",)
+    _positive = (
+        "interval",
+        "failures_to_open",
+        "successes_to_close",
+        "connect_timeout",
+        "read_timeout",
+        "range_bytes",
+    )
+
     name: str
     url: str
-    status_page: StatusPageComponentSettings
+    status_page: StatusPageComponentSettings = None
+    interval: int = 60
+    failures_to_open: int = 1
+    successes_to_close: int = 1
+    connect_timeout: float = 5
+    read_timeout: float = 10
+    max_body_bytes: int = 65536
+    discard_body: bool = False
+    method: str = "GET"
+    range_bytes: int = None
+    expected_status: List[int] = None
+    assertions: List[object] = None
+    compiled_assertions: AssertionSet = None
+    latency: LatencySettings = None
+
+    def _validate_max_body_bytes(self, value: int, path: str):
+        if value < 0:
+            raise ConfigurationError(path, "must not be negative")
+
+    def _validate_method(self, value: str, path: str):
+        if value.upper() not in self.METHODS:
+            raise ConfigurationError(path, f"expected one of {', '.join(self.METHODS)}")
+
+    def _validate_expected_status(self, value: List[int], path: str):
+        for index, status in enumerate(value):
+            if not 100 <= status <= 599:
+                raise ConfigurationError(
+                    f"{path}[{index}]", "must be an HTTP status code"
+                )
+
+    def _validate_assertions(self, value: List[object], path: str):
+        compiled = []
+        for index, entry in enumerate(value):
+            try:
+                compiled.append(compile_assertion(entry))
+            except ValueError as e:
+                raise ConfigurationError(f"{path}[{index}]", str(e)) from e
+        self.compiled_assertions = AssertionSet(compiled) if compiled else None
+
+
+class HttpSettings(Settings):
+    """Settings for the HTTP transport used by health checks.
+
+    Attributes:
+        pool_connections (int): The number of hosts to keep connection pools for.
+            Defaults to 10.
+        pool_maxsize (int): The maximum number of keep-alive connections to keep
+            per host. Defaults to 10.
+    """
 
+    _positive = ("pool_connections", "pool_maxsize")
 
-class StatusPageSettings:
+    pool_connections: int = 10
+    pool_maxsize: int = 10
+
+
+class StatusPageSettings(Settings):
     """Settings for StatusPage.io.
 
     Attributes:
         api_key (str): The API Key to access statuspage.io
         page_id (str): Your PageId for statuspage.io
+        max_retries (int): The maximum number of retries for requests which are
+            rate limited (429) or fail with a 5xx response. Defaults to 3.
+        backoff_factor (float): The backoff factor, in seconds, between retries.
+            A `Retry-After` header from statuspage.io takes precedence.
+            Defaults to 0.5.
+        max_retry_after (float): The longest `Retry-After`, in seconds, to wait
+            for before a retry.  Requests which statuspage.io asks to wait longer
+            are not retried. Defaults to 10.
+        cache_ttl (int): The number of seconds a cached component status is
+            trusted before it is read from statuspage.io again. Defaults to 300.
+        cache_file (str): An optional file used to keep cached component statuses
+            between runs.
+        rate_limit (float): The maximum sustained number of requests per second
+            sent to statuspage.io. Defaults to 1.
+        rate_burst (int): The maximum number of requests sent to statuspage.io
+            in a burst. Defaults to 5.
+        write_behind_window (float): The number of seconds to hold component status
+            changes before applying the final status.  Changes which are reverted
+            within the window are never sent. Defaults to 0, which applies
+            changes immediately.
+        connect_timeout (float): The number of seconds to wait for a connection to
+            statuspage.io. Defaults to 5.
+        read_timeout (float): The number of seconds to wait for statuspage.io to
+            send data. Defaults to 30.
+        base_url (str): The URL of the Statuspage.io pages API.  Only change
+            this to use a stand-in API for testing.
     """
 
+    _positive = ("rate_limit", "rate_burst", "connect_timeout", "read_timeout")
+
     api_key: str
     page_id: str
-
-
-class NotificationSettings:
+    max_retries: int = 3
+    backoff_factor: float = 0.5
+    max_retry_after: float = 10
+    cache_ttl: int = 300
+    cache_file: str = None
+    rate_limit: float = 1.0
+    rate_burst: int = 5
+    write_behind_window: float = 0
+    connect_timeout: float = 5
+    read_timeout: float = 30
+    base_url: str = "https://api.statuspage.io/v1/pages"
+
+
+class NotificationSettings(Settings):
     """Notification Settings
 
     This class represents settings for notifications.  If you are using Gmail to send,
@@ -94,17 +535,55 @@ class NotificationSettings:
         smtp_sender_id (str): The SMTP user
         smtp_sender_apikey (str): The SMTP user's password
         sms_email: The email to receive notifications
+        queue_size (int): The maximum number of notifications waiting to be sent
+        max_retries (int): The number of retries for a notification which fails
+        retry_backoff (float): The number of seconds before the first retry.  Each
+            further retry waits twice as long.
+        digest_window (float): The number of seconds to collect notifications into
+            a single message.  0 sends every notification on its own.
+        cooldown (float): The number of seconds before a check can send the same
+            notification again.  A different notification, such as a recovery, is
+            always sent.
+        backend (str): The backend used to send notifications: `sendgrid`, `smtp`
+            or `webhook`
+        smtp_starttls (bool): True to upgrade SMTP sessions with `STARTTLS`
+        webhook_url (str): The URL which receives webhook notifications
+        timeout (float): The number of seconds to wait for the SendGrid API, the
+            SMTP server or the webhook
 
     """
 
-    smtp_url: str
-    smtp_port: int
-    smtp_sender_id: str
-    smtp_sender_apikey: str
-    sms_email: str
-
-
-class MonitorSettings:
+    BACKENDS = ("sendgrid", "smtp", "webhook")
+
+    _positive = ("queue_size", "timeout")
+
+    smtp_url: str = None
+    smtp_port: int = None
+    smtp_sender_id: str = None
+    smtp_sender_apikey: str = None
+    sms_email: str = None
+    queue_size: int = 100
+    max_retries: int = 3
+    retry_backoff: float = 1.0
+    digest_window: float = 0
+    cooldown: float = 0
+    backend: str = "sendgrid"
+    smtp_starttls: bool = True
+    webhook_url: str = None
+    timeout: float = 30
+
+    def _validate_max_retries(self, value: int, path: str):
+        if value < 0:
+            raise ConfigurationError(path, "must not be negative")
+
+    def _validate_backend(self, value: str, path: str):
+        if value not in self.BACKENDS:
+            raise ConfigurationError(
+                path, f"expected one of {', '.join(self.BACKENDS)}"
+            )
+
+
+class MonitorSettings(Settings):
     """MonitorSettings
 
     This class represents the entire structure of the configuration
@@ -114,11 +593,31 @@ class MonitorSettings:
         status_checks: The collection of statusCheck settings
         notification: The settings object for notifications
         status_page: The settings object for StatusPage.io
+        http: The settings object for the HTTP transport used by health checks
+        state_file: The file used to keep the recent results of each check between
+            runs.  Defaults to `None`, which keeps them in memory only.
+        cycle_deadline: The maximum number of seconds for a cycle of checks.  Checks
+            which have not completed by the deadline are reported as timed out.
+            Defaults to `None`, which waits for every check.
     """
 
+    _positive = ("cycle_deadline",)
+
     status_checks: List[HealthCheckSettings]
-    notification: NotificationSettings
-    status_page: StatusPageSettings
+    notification: NotificationSettings = None
+    status_page: StatusPageSettings = None
+    http: HttpSettings = None
+    state_file: str = None
+    cycle_deadline: float = None
+
+    def _validate_status_checks(self, value: List[HealthCheckSettings], path: str):
+        names = set()
+        for index, check in enumerate(value):
+            if check.name in names:
+                raise ConfigurationError(
+                    f"{path}[{index}].name", f"duplicate check name {check.name!r}"
+                )
+            names.add(check.name)
 
 
 def read_configuration(
@@ -135,6 +634,9 @@ def read_configuration(
     Returns:
         MonitorSettings: A MonitorSettings object populated from the given file,
                         or an empty Settings object.
+
+    Raises:
+        ConfigurationError: If the file is not valid JSON, or a setting is invalid.
     """
     config_path = Path(file)
 
@@ -142,5 +644,28 @@ def read_configuration(
         logger.error("Configuration file not found: %s.  Using default", file)
         return default_settings
 
-    config_data = config_path.read_text()
-    return json.loads(config_data, object_hook=Generic.from_dict)
+    return parse_configuration(config_path.read_bytes())
+
+
+def parse_configuration(content: bytes) -> MonitorSettings:
+    """Parse the contents of a configuration file
+
+    Args:
+        content: The JSON contents of the file.
+
+    Returns:
+        MonitorSettings: A MonitorSettings object populated from the contents.
+
+    Raises:
+        ConfigurationError: If the contents are not valid JSON, or a setting is
+            invalid.
+    """
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError as e:
+        raise ConfigurationError(
+            "$", f"invalid JSON at line {e.lineno}, column {e.colno}: {e.msg}"
+        ) from e
+    except UnicodeDecodeError as e:
+        raise ConfigurationError("$", f"invalid text encoding: {e.reason}") from e
+    return MonitorSettings.from_dict(data)
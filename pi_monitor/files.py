@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+
+Module for file helpers.
+
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+
+def write_atomic(file: str, data: bytes):
+    """Write a file atomically
+
+    The data is written to a temporary file in the same directory, which then
+    replaces `file`.  Concurrent readers see either the old or the new file, never
+    a partial one.
+
+    Args:
+        file: The file to write
+        data: The contents of the file
+
+    Raises:
+        OSError: If the file cannot be written.
+    """
+    path = Path(file)
+    fd, temp_name = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp_name, path)
+    except BaseException:
+        if os.path.exists(temp_name):
+            os.unlink(temp_name)
+        raise
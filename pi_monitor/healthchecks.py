@@ -1,9 +1,27 @@
+import codecs
+import http.client
+import json
 import requests
 import logging
+import ssl
+import threading
+import time
+import typing
+from concurrent.futures import Executor, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from urllib3.exceptions import ReadTimeoutError
+from .assertions import AssertionEvaluator, AssertionSet, compile_assertions
+from .checkstate import CheckState, CheckStateStore
 from .configuration import HealthCheckSettings
 from .enums import OpLevel
+from .latency import LatencyHistogram
 from .statuspage_io import StatusPageOperator, StatusResult, Incident
 from .notifications import Notifier
+from .transport import PooledSession, RequestTimings
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    import asyncio
+    from .async_transport import AsyncPooledSession, AsyncResponse
 
 logger = logging.getLogger(__name__)
 
@@ -15,12 +33,24 @@ class HttpGetResult:
         success: Whether or not the request was successful
         message: The error message from an unsuccessful request
         raw_response: The string value of the response body
-        response: An object representing the response body converted as JSON
+        response: An object representing the response body converted as JSON, if
+            the body is JSON and was read completely
+        timed_out: Whether or not the request ran out of time
+        truncated: Whether or not the response body was cut short at the check's
+            `max_body_bytes`
+        timings: The [RequestTimings][pi_monitor.transport.RequestTimings] of the
+            request, if a response was received.  After a redirect, the phases
+            are those of the final request, and `total` covers every request.
 
     """
 
+    TIMED_OUT_MESSAGE = "Request timed out"
+
     success: bool = True
     message: str = ""
+    timed_out: bool = False
+    truncated: bool = False
+    timings: RequestTimings = None
     raw_response: str
     response: any = {}
 
@@ -28,6 +58,100 @@ class HttpGetResult:
         self.success = success
         self.message = msg
 
+    @classmethod
+    def timeout(cls) -> "HttpGetResult":
+        """Create the result of a request which ran out of time
+
+        Returns:
+            An unsuccessful [HttpGetResult][pi_monitor.HttpGetResult] with
+            `timed_out` set
+        """
+        result = cls(False, cls.TIMED_OUT_MESSAGE)
+        result.timed_out = True
+        return result
+
+
+class _CycleDeadline:
+    """The time budget for a cycle of checks
+
+    Each check's result is claimed exactly once, either by the check itself or,
+    once the deadline has passed, by the cycle reporting it as timed out.
+    """
+
+    def __init__(self, seconds: float = None):
+        self.expires = None if seconds is None else time.monotonic() + seconds
+        self._lock = threading.Lock()
+        self._claimed = set()
+
+    def remaining(self) -> Optional[float]:
+        if self.expires is None:
+            return None
+        return max(self.expires - time.monotonic(), 0)
+
+    def claim(self, check_settings: HealthCheckSettings) -> bool:
+        with self._lock:
+            if id(check_settings) in self._claimed:
+                return False
+            self._claimed.add(id(check_settings))
+            return True
+
+
+class _BodyReader:
+    """Decodes a response body as it is read, up to a limit
+
+    If an evaluator is provided, it is fed the body after each chunk, and
+    reading stops once its result is decided.
+    """
+
+    def __init__(
+        self,
+        encoding: Optional[str],
+        limit: int,
+        evaluator: AssertionEvaluator = None,
+        chunk_size: int = 8192,
+    ):
+        try:
+            decoder = codecs.getincrementaldecoder(encoding or "utf-8")
+        except LookupError:
+            decoder = codecs.getincrementaldecoder("utf-8")
+        self._decoder = decoder(errors="replace")
+        self._remaining = limit
+        self._evaluator = evaluator
+        self.chunk_size = max(min(chunk_size, limit + 1), 1)
+        self.body = ""
+        self.truncated = False
+        self.stopped = False
+
+    def feed(self, chunk: bytes) -> bool:
+        """Add the next chunk of the body
+
+        Returns:
+            True if no more of the body should be read.
+        """
+        if len(chunk) > self._remaining:
+            chunk = chunk[: self._remaining]
+            self.truncated = True
+        self._remaining -= len(chunk)
+        self.body += self._decoder.decode(chunk)
+        if self.truncated:
+            return True
+        if self._evaluator is not None and self._evaluator.feed(self.body):
+            self.stopped = True
+            return True
+        return False
+
+    def finish(self) -> Tuple[str, bool, bool]:
+        """Complete the body once reading has stopped
+
+        Returns:
+            A tuple of the decoded body, whether it was truncated, and whether it
+            was read completely.
+        """
+        self.body += self._decoder.decode(b"", final=True)
+        if self._evaluator is not None and not self.stopped:
+            self._evaluator.feed(self.body, not self.truncated)
+        return self.body, self.truncated, not (self.truncated or self.stopped)
+
 
 class HealthCheckExecutor:
     """HealthCheckExecutor
@@ -54,17 +178,45 @@ class HealthCheckExecutor:
 
 
     Attributes:
-        statuspage_operator: The name of the site being checked
+        statuspage_operator: The
+                [StatusPageOperator][pi_monitor.StatusPageOperator] which updates
+                statuspage.io, or `None` to only send notifications
         notifier: The url to be fetched as part of the check
+        session: The [PooledSession][pi_monitor.transport.PooledSession] shared by
+                 all health check requests
+        states: The [CheckStateStore][pi_monitor.checkstate.CheckStateStore] which
+                tracks the recent results of each check
+        cycle_deadline: The maximum number of seconds for a cycle of checks, or
+                `None` to wait for every check
     """
 
-    statuspage_operator: StatusPageOperator
+    CHUNK_SIZE = 8192
+    PROBE_METHODS = HealthCheckSettings.METHODS
+    MAX_MESSAGE_LENGTH = 256
+    UNKNOWN_FAILURE_MESSAGE = "Unknown status failure"
+    # The message of a failed request, by the first error here which caused it
+    FAILURE_MESSAGES = (
+        (requests.exceptions.TooManyRedirects, "Too many redirects"),
+        (ssl.SSLCertVerificationError, "TLS certificate verification failed"),
+        (requests.exceptions.SSLError, "TLS handshake failed"),
+        (ssl.SSLError, "TLS handshake failed"),
+        (ConnectionRefusedError, "Connection refused"),
+        (ConnectionResetError, "Connection reset"),
+        (http.client.IncompleteRead, "Incomplete response"),
+    )
+
+    statuspage_operator: Optional[StatusPageOperator]
     notifier: Notifier
+    session: PooledSession
+    states: CheckStateStore
+    cycle_deadline: Optional[float]
 
     def __init__(
         self,
         status_operator: StatusPageOperator,
         notifier: Notifier,
+        session: PooledSession = None,
+        cycle_deadline: float = None,
     ):
         """Constructor
 
@@ -73,11 +225,20 @@ class HealthCheckExecutor:
         [Notifier][pi_monitor.Notifier].
 
         Attributes:
-            statuspage_operator: The name of the site being checked
+            statuspage_operator: The
+                [StatusPageOperator][pi_monitor.StatusPageOperator] which updates
+                statuspage.io, or `None` to only send notifications
             notifier: The url to be fetched as part of the check
+            session: The session used for health check requests.  If not provided,
+                     a new [PooledSession][pi_monitor.transport.PooledSession] is
+                     created.
+            cycle_deadline: The maximum number of seconds for a cycle of checks.
         """
         self.statuspage_operator = status_operator
         self.notifier = notifier
+        self.session = session if session is not None else PooledSession()
+        self.states = CheckStateStore()
+        self.cycle_deadline = cycle_deadline
 
     def execute_health_check(self, check_settings: HealthCheckSettings):
         """Execute a health check
@@ -88,25 +249,332 @@ class HealthCheckExecutor:
             check_settings: An instance of
                 [HealthCheckSettings][pi_monitor.HealthCheckSettings]
         """
+        self._execute_health_check(check_settings, _CycleDeadline())
+
+    def execute_health_checks(
+        self, checks: List[HealthCheckSettings], executor: Executor
+    ):
+        """Execute a cycle of health checks
+
+        Executes each of the provided health checks using the given executor, and
+        waits for all of them to complete, or for `cycle_deadline` to pass.  Checks
+        which have not completed by the deadline are reported as timed out, and
+        those which have not started are cancelled.
+
+        Args:
+            checks: A list of
+                [HealthCheckSettings][pi_monitor.HealthCheckSettings]
+            executor: A `concurrent.futures.Executor` used to run the checks
+        """
+        deadline = _CycleDeadline(self.cycle_deadline)
+        status_page_cycle = self.begin_cycle(checks)
+        try:
+            futures = {
+                executor.submit(self._execute_health_check, check, deadline): check
+                for check in checks
+            }
+            done, not_done = wait(futures, deadline.remaining())
+            for future in not_done:
+                future.cancel()
+            for future in not_done:
+                if deadline.claim(futures[future]):
+                    self._handle_timeout(futures[future])
+                else:
+                    # The check is already handling its result
+                    done |= wait([future]).done
+            for future in done:
+                if future.exception() is not None:
+                    logger.error("Health check failed: %s", future.exception())
+        finally:
+            self.end_cycle(status_page_cycle)
+        logger.debug("Health check connections: %s", self.session.stats)
+
+    def begin_cycle(self, checks: List[HealthCheckSettings]) -> bool:
+        """Prepare for a cycle of health checks
+
+        If any of the checks update statuspage.io, the
+        [StatusPageOperator][pi_monitor.StatusPageOperator] reads all components
+        once for the cycle, unless their cached statuses are fresh.
+
+        Args:
+            checks: The [HealthCheckSettings][pi_monitor.HealthCheckSettings] which
+                will be executed in this cycle
+
+        Returns:
+            True if the operator began a cycle, which `end_cycle` must end.
+        """
+        component_ids = [
+            check.status_page.component_id
+            for check in checks
+            if self._has_status_page(check)
+        ]
+        if component_ids and self.statuspage_operator.is_configured():
+            self.statuspage_operator.begin_cycle(component_ids)
+            return True
+        return False
+
+    def end_cycle(self, status_page_cycle: bool = True):
+        """Complete a cycle of health checks
+
+        Applies any deferred statuspage.io changes whose window has elapsed.
+
+        Args:
+            status_page_cycle: True to end the operator's cycle, as returned by
+                `begin_cycle`.
+        """
+        if self.statuspage_operator is None:
+            return
+        try:
+            self.flush_status_updates()
+        finally:
+            if status_page_cycle:
+                self.statuspage_operator.end_cycle()
+
+    def flush_status_updates(self, force: bool = False):
+        """Apply deferred statuspage.io changes
+
+        Applies deferred component status changes through
+        [flush_pending][pi_monitor.StatusPageOperator.flush_pending], and sends a
+        notification for each incident created or resolved.
+
+        Args:
+            force: True to apply every deferred change, regardless of the window.
+        """
+        if self.statuspage_operator is None:
+            return
+        for status_result in self.statuspage_operator.flush_pending(force):
+            incident_result = status_result.incident_result
+            if incident_result.incident_created or incident_result.incident_resolved:
+                incident = incident_result.incident
+                if incident.description:
+                    logger.info("Sending notification: %s", incident.description)
+                    self.notifier.notify(incident.name, incident.description)
+
+    def _execute_health_check(
+        self, check_settings: HealthCheckSettings, deadline: _CycleDeadline
+    ):
         logger.info("Checking %s...", check_settings.name)
 
-        send_notification = False
+        http_result = self._probe(check_settings, deadline)
+        self._complete_health_check(check_settings, http_result, deadline)
+
+    def _probe(
+        self, check_settings: HealthCheckSettings, deadline: _CycleDeadline
+    ) -> HttpGetResult:
+        if deadline.remaining() == 0:
+            return HttpGetResult.timeout()
+        return self._get_http(
+            check_settings, self._get_timeout(check_settings, deadline)
+        )
+
+    def _complete_health_check(
+        self,
+        check_settings: HealthCheckSettings,
+        http_result: HttpGetResult,
+        deadline: _CycleDeadline,
+    ):
+        if deadline.claim(check_settings):
+            self._handle_result(check_settings, http_result)
+        else:
+            logger.debug(
+                "Ignoring result of %s after the deadline", check_settings.name
+            )
 
-        http_result = self._get_http(check_settings.url)
+    def _handle_timeout(self, check_settings: HealthCheckSettings):
+        logger.warning(
+            "%s did not complete before the cycle deadline", check_settings.name
+        )
+        self._handle_result(check_settings, HttpGetResult.timeout())
+
+    def _get_timeout(
+        self, check_settings: HealthCheckSettings, deadline: _CycleDeadline
+    ) -> Tuple[float, float]:
+        """Determine the timeouts for a check's request
+
+        Args:
+            check_settings: An instance of
+                [HealthCheckSettings][pi_monitor.HealthCheckSettings]
+            deadline: The deadline of the current cycle
+
+        Returns:
+            The connect and read timeouts, reduced to the time left in the cycle.
+        """
+        connect_timeout = check_settings.connect_timeout
+        read_timeout = check_settings.read_timeout
+        remaining = deadline.remaining()
+        if remaining is not None:
+            connect_timeout = min(connect_timeout, remaining)
+            read_timeout = min(read_timeout, remaining)
+        return (connect_timeout, read_timeout)
+
+    def _get_http(
+        self, check_settings: HealthCheckSettings, timeout: Tuple[float, float] = None
+    ) -> HttpGetResult:
+        """Retrieve data from the URL
+
+        Attempt to get data from the URL of the provided check, using the check's
+        probe `method`.  The response body is streamed, and read no further than
+        `max_body_bytes`.  The whole response, including any redirects and the
+        body, must arrive within the sum of the connect and read timeouts, so a
+        site which sends it a little at a time cannot hold the check.  The time
+        spent in each phase of the request is recorded in the result's
+        `timings`.
+
+        Args:
+            check_settings: An instance of
+                [HealthCheckSettings][pi_monitor.HealthCheckSettings]
+            timeout: The connect and read timeouts, in seconds.  Defaults to the
+                timeouts of [HealthCheckSettings][pi_monitor.HealthCheckSettings].
+
+        Returns:
+            An [HttpGetResult][pi_monitor.HttpGetResult]
+        """
+        request = self._prepare_request(check_settings, timeout)
+        if isinstance(request, HttpGetResult):
+            return request
+        url = check_settings.url
+        method, headers, timeout = request
+        try:
+            logger.debug("Requesting %s %s", method, url)
+            started = time.perf_counter()
+            with self.session.request(
+                method,
+                url,
+                headers=headers,
+                timeout=timeout,
+                stream=True,
+                allow_redirects=True,
+                time_limit=sum(timeout),
+            ) as r:
+                received = time.perf_counter()
+                result = self._process_response(r, check_settings)
+            finished = time.perf_counter()
+            result.timings = getattr(r.raw, "timings", None) or RequestTimings()
+            result.timings.transfer = finished - received
+            result.timings.total = finished - started
+            logger.debug("Timings for %s: %s", url, result.timings)
+        except requests.exceptions.Timeout as e:
+            logger.warning("Request timed out %s", e)
+            result = HttpGetResult.timeout()
+        except requests.exceptions.ConnectionError as e:
+            # Timeouts while streaming the body are raised as connection errors
+            if e.args and isinstance(e.args[0], ReadTimeoutError):
+                logger.warning("Request timed out %s", e)
+                result = HttpGetResult.timeout()
+            else:
+                logger.error("Request failed exception %s", e)
+                result = HttpGetResult(False, self._describe_failure(e))
+        except Exception as e:
+            logger.error("Request failed exception %s", e)
+            result = HttpGetResult(False, self._describe_failure(e))
+
+        return result
+
+    def _prepare_request(
+        self, check_settings: HealthCheckSettings, timeout: Tuple[float, float]
+    ) -> Union[Tuple[str, Dict[str, str], Tuple[float, float]], HttpGetResult]:
+        """Prepare the request of a check
+
+        Args:
+            check_settings: An instance of
+                [HealthCheckSettings][pi_monitor.HealthCheckSettings]
+            timeout: The connect and read timeouts, in seconds, or `None` for the
+                timeouts of [HealthCheckSettings][pi_monitor.HealthCheckSettings].
+
+        Returns:
+            A tuple of the method, headers and timeouts of the request, or an
+            unsuccessful [HttpGetResult][pi_monitor.HttpGetResult] if the check
+            cannot be sent.
+        """
+        url = check_settings.url
+        if not url or url == "":
+            return HttpGetResult(False, "no url defined")
+
+        method = (check_settings.method or HealthCheckSettings.method).upper()
+        if method not in self.PROBE_METHODS:
+            return HttpGetResult(False, f"unsupported method {method}")
+
+        headers = {}
+        if check_settings.range_bytes and method == "GET":
+            headers["Range"] = f"bytes=0-{check_settings.range_bytes - 1}"
+
+        if timeout is None:
+            timeout = (
+                HealthCheckSettings.connect_timeout,
+                HealthCheckSettings.read_timeout,
+            )
+        return method, headers, timeout
+
+    def _describe_failure(self, error: Exception) -> str:
+        """Describe a failed request
+
+        Args:
+            error: The exception raised by the request
+
+        Returns:
+            The message of the first of `FAILURE_MESSAGES` whose error caused the
+            exception, or `UNKNOWN_FAILURE_MESSAGE`.
+        """
+        causes = list(_causes(error))
+        for error_class, message in self.FAILURE_MESSAGES:
+            if any(isinstance(cause, error_class) for cause in causes):
+                return message
+        return self.UNKNOWN_FAILURE_MESSAGE
+
+    def _handle_result(
+        self, check_settings: HealthCheckSettings, http_result: HttpGetResult
+    ):
+        """Handle the result of a health check
+
+        Determine the [OpLevel][pi_monitor.enums.OpLevel] from the provided result
+        and the check's latency objectives, and record it in the check's state.
+        Statuspage.io is only updated, and notifications only sent, when the
+        result confirms a change of level.  If statuspage.io is not updated, the
+        change is not kept, so the next result which confirms it retries the
+        update.
+
+        Args:
+            check_settings: An instance of
+                [HealthCheckSettings][pi_monitor.HealthCheckSettings]
+            http_result: The [HttpGetResult][pi_monitor.HttpGetResult] of the check
+        """
+        send_notification = False
+        state = self.states.get(check_settings.name)
+        previous_level = state.level
 
         if http_result.success:
+            op_level = self._classify_latency(check_settings, state, http_result)
+        else:
+            op_level = OpLevel.Full_Outage
+
+        if op_level == OpLevel.Operational:
             # Good Check
             logger.info("Status OK")
-            op_level = OpLevel.Operational
         else:
-            # Bad check
-            op_level = OpLevel.Full_Outage
+            # Bad or slow check
             logger.warning(http_result.message)
             send_notification = True
 
+        if not state.record(
+            op_level, check_settings.failures_to_open, check_settings.successes_to_close
+        ):
+            logger.debug(
+                "%s is unchanged: %d of the last %d checks failed",
+                check_settings.name,
+                state.failures,
+                state.count,
+            )
+            return
+
         notification_text = http_result.message
-        if check_settings.status_page and check_settings.status_page.component_id != "":
+        if self._has_status_page(check_settings):
             status_result = self._update_status_page(check_settings, op_level)
+            if not status_result.applied:
+                logger.warning(
+                    "Status of %s not updated, retrying with the next check",
+                    check_settings.name,
+                )
+                state.level = previous_level
             send_notification = (
                 status_result.incident_result.incident_created
                 or status_result.incident_result.incident_resolved
@@ -118,59 +586,243 @@ class HealthCheckExecutor:
             and notification_text is not None
             and notification_text != ""
         ):
-            logger.info("Sending notification: %s", notification_text)
-            self.notifier.notify(check_settings.name, notification_text)
+            self._send_notification(check_settings, notification_text)
 
-    def _get_http(self, url: str) -> HttpGetResult:
-        """Retrieve data from the URL
+    def _classify_latency(
+        self,
+        check_settings: HealthCheckSettings,
+        state: CheckState,
+        http_result: HttpGetResult,
+    ) -> OpLevel:
+        """Compare recent response times with the check's latency objectives
 
-        Attempt to get data from the provided URL
+        The response time of the successful result is recorded in the check's
+        [LatencyHistogram][pi_monitor.latency.LatencyHistogram].  If the configured
+        percentile of recent response times exceeds a threshold, the message of
+        the result is set to describe it.
 
         Args:
-            url: The url to be retrieved
+            check_settings: An instance of
+                [HealthCheckSettings][pi_monitor.HealthCheckSettings]
+            state: The [CheckState][pi_monitor.checkstate.CheckState] of the check
+            http_result: The successful [HttpGetResult][pi_monitor.HttpGetResult]
 
         Returns:
-            An [HttpGetResult][pi_monitor.HttpGetResult]
+            [Operational][pi_monitor.enums.OpLevel], or
+            [Degraded][pi_monitor.enums.OpLevel] or
+            [Partial_Outage][pi_monitor.enums.OpLevel] if the site is slow.
         """
-        if not url or url == "":
-            result = HttpGetResult(False, "no url defined")
-            return result
+        latency = check_settings.latency
+        if latency is None or http_result.timings is None:
+            return OpLevel.Operational
 
-        try:
-            logger.debug("Requesting %s", url)
-            r = requests.get(url)
-            result = self._process_response(r)
-        except Exception as e:
-            logger.error("Request failed exception %s", e)
-            result = HttpGetResult(False, "Unknown status failure")
+        if state.latency is None or state.latency.window != latency.window:
+            state.latency = LatencyHistogram(latency.window)
+        state.latency.record(http_result.timings.total)
+        if state.latency.samples < latency.min_samples:
+            return OpLevel.Operational
 
-        return result
+        percentile = latency.percentile
+        value = state.latency.percentile(percentile)
+        for op_level, threshold in [
+            (OpLevel.Partial_Outage, latency.partial_outage),
+            (OpLevel.Degraded, latency.degraded),
+        ]:
+            if threshold is not None and value > threshold:
+                http_result.message = (
+                    f"p{percentile:g} latency {value * 1000:.0f}ms "
+                    f"exceeds {threshold * 1000:.0f}ms"
+                )
+                return op_level
+        return OpLevel.Operational
+
+    def _has_status_page(self, check_settings: HealthCheckSettings) -> bool:
+        return bool(
+            self.statuspage_operator is not None
+            and check_settings.status_page
+            and check_settings.status_page.component_id
+        )
 
-    def _process_response(self, response: requests.Response) -> HttpGetResult:
+    def _send_notification(self, check_settings: HealthCheckSettings, text: str):
+        logger.info("Sending notification: %s", text)
+        self.notifier.notify(check_settings.name, text)
+
+    def _process_response(
+        self, response: requests.Response, check_settings: HealthCheckSettings = None
+    ) -> HttpGetResult:
         """Process the HTTP Requests response
 
         Convert the provided Response object from the requests module into an
-        [HttpGetResult][healthchecks.HttpGetResult].
+        [HttpGetResult][healthchecks.HttpGetResult].  The body is read up to the
+        check's `max_body_bytes`, or not at all if `discard_body` is set.  If the
+        check has `assertions`, reading stops as soon as they have all passed.
+        A JSON body which is read completely is parsed into `response`.
 
         Args:
             response: The [requests.Response] object from the HTTP operation
+            check_settings: The [HealthCheckSettings][pi_monitor.HealthCheckSettings]
+                of the check, if any
 
         Returns:
             An [HttpGetResult][healthchecks.HttpGetResult]
         """
-        result = HttpGetResult(response.status_code == 200)
+        result, reader, evaluator = self._begin_response(response, check_settings)
+        if reader is not None:
+            for chunk in response.iter_content(reader.chunk_size):
+                if reader.feed(chunk):
+                    break
+        return self._end_response(result, response, reader, evaluator)
+
+    def _begin_response(
+        self, response, check_settings: Optional[HealthCheckSettings]
+    ) -> Tuple[HttpGetResult, Optional["_BodyReader"], Optional[AssertionEvaluator]]:
+        """Decide how much of a response body to read
+
+        Args:
+            response: The response, whose body has not been read
+            check_settings: The [HealthCheckSettings][pi_monitor.HealthCheckSettings]
+                of the check, if any
+
+        Returns:
+            A tuple of the [HttpGetResult][pi_monitor.HttpGetResult], the reader
+            to feed the body to, or `None` if the body is not read, and the
+            evaluator of the check's assertions, if any.
+        """
+        if check_settings is None:
+            check_settings = HealthCheckSettings()
+        result = HttpGetResult(
+            response.status_code in self._get_expected_status(check_settings)
+        )
+        limit = check_settings.max_body_bytes
+        if check_settings.discard_body:
+            return result, None, None
+        if not result.success:
+            # Only the start of the body is needed for the message
+            limit = min(limit, self.MAX_MESSAGE_LENGTH)
+            return result, self._body_reader(response, limit), None
+
+        assertions = self._get_assertions(check_settings)
+        evaluator = assertions.evaluator() if assertions else None
+        return result, self._body_reader(response, limit, evaluator), evaluator
+
+    def _end_response(
+        self,
+        result: HttpGetResult,
+        response,
+        reader: Optional["_BodyReader"],
+        evaluator: Optional[AssertionEvaluator],
+    ) -> HttpGetResult:
+        """Complete a result once its body has been read
+
+        Args:
+            result: The [HttpGetResult][pi_monitor.HttpGetResult] to update
+            response: The response
+            reader: The reader the body was fed to, or `None` if it was not read
+            evaluator: The evaluator for the check's assertions, if any
+
+        Returns:
+            The updated [HttpGetResult][pi_monitor.HttpGetResult]
+        """
+        body, complete = "", True
+        if reader is not None:
+            body, result.truncated, complete = reader.finish()
+
         if not result.success:
+            text = body or response.reason or ""
             logger.info(
                 "Request failed with Response Code %d: %s",
                 response.status_code,
-                response.text,
+                text,
             )
-            result.message = f"{response.status_code} {response.text}"
+            result.message = self._format_message(f"{response.status_code} {text}")
+            return result
+
+        result.raw_response = body
+        if reader is None:
+            return result
+        return self._evaluate_body(
+            result, response, evaluator, body if complete else None
+        )
+
+    def _evaluate_body(
+        self,
+        result: HttpGetResult,
+        response,
+        evaluator: AssertionEvaluator,
+        body: Optional[str],
+    ) -> HttpGetResult:
+        """Parse a JSON body and evaluate assertions
+
+        Args:
+            result: The [HttpGetResult][pi_monitor.HttpGetResult] to update
+            response: The response, whose headers give the type of the body
+            evaluator: The evaluator for the check's assertions, if any
+            body: The complete body, or `None` if it was not read completely
+
+        Returns:
+            The updated [HttpGetResult][pi_monitor.HttpGetResult]
+        """
+        json_error = None
+        if body is None:
+            json_error = "response body exceeds max_body_bytes"
+        elif (evaluator is not None and evaluator.requires_json) or "json" in (
+            response.headers.get("Content-Type") or ""
+        ):
+            try:
+                result.response = json.loads(body)
+            except ValueError:
+                json_error = "response body is not valid JSON"
+
+        if evaluator is None:
             return result
 
-        result.raw_response = response.text
+        failure = evaluator.finish(result.response, json_error)
+        if failure is not None:
+            logger.info("Assertion failed: %s", failure)
+            result.success = False
+            result.message = self._format_message(f"Assertion failed: {failure}")
         return result
 
+    def _get_expected_status(self, check_settings: HealthCheckSettings) -> List[int]:
+        if check_settings.expected_status:
+            return check_settings.expected_status
+        if check_settings.range_bytes:
+            return [200, 206]
+        return [200]
+
+    def _get_assertions(
+        self, check_settings: HealthCheckSettings
+    ) -> Optional[AssertionSet]:
+        """Retrieve the compiled assertions of a check
+
+        Assertions are compiled when the configuration is read.  Settings built in
+        code are compiled on first use.
+
+        Args:
+            check_settings: The [HealthCheckSettings][pi_monitor.HealthCheckSettings]
+                of the check, if any
+
+        Returns:
+            An [AssertionSet][pi_monitor.assertions.AssertionSet], or `None`
+        """
+        compiled = check_settings.compiled_assertions
+        if compiled is None:
+            if not check_settings.assertions:
+                return None
+            compiled = compile_assertions(check_settings.assertions)
+            check_settings.compiled_assertions = compiled
+        return compiled
+
+    def _body_reader(
+        self, response, limit: int, evaluator: AssertionEvaluator = None
+    ) -> "_BodyReader":
+        return _BodyReader(response.encoding, limit, evaluator, self.CHUNK_SIZE)
+
+    def _format_message(self, message: str) -> str:
+        if len(message) <= self.MAX_MESSAGE_LENGTH:
+            return message
+        return message[: self.MAX_MESSAGE_LENGTH - 3] + "..."
+
     def _update_status_page(
         self, check_settings: HealthCheckSettings, op_level: OpLevel
     ) -> StatusResult:
@@ -187,3 +839,332 @@ class HealthCheckExecutor:
         return self.statuspage_operator.update_component_status(
             check_settings.status_page.component_id, op_level, incident
         )
+
+
+def _causes(error: BaseException) -> Iterator[BaseException]:
+    # The error and every error which caused it.  requests and urllib3 wrap the
+    # original error in their arguments and `reason` as well as the cause.
+    pending = [error]
+    seen = set()
+    while pending:
+        error = pending.pop()
+        if id(error) in seen:
+            continue
+        seen.add(id(error))
+        yield error
+        pending.extend(
+            cause
+            for cause in (
+                error.__cause__,
+                error.__context__,
+                getattr(error, "reason", None),
+                *error.args,
+            )
+            if isinstance(cause, BaseException)
+        )
+
+
+class AsyncHealthCheckExecutor(HealthCheckExecutor):
+    """AsyncHealthCheckExecutor
+
+    An asyncio-based engine for executing health checks. Each check runs as a
+    coroutine, with the number of checks in flight bounded by a semaphore of size
+    `concurrency`.
+
+    Probes are sent with an
+    [AsyncPooledSession][pi_monitor.async_transport.AsyncPooledSession], which
+    waits for the network on the event loop, so a check in flight does not hold
+    a thread.  A cycle therefore takes roughly as long as the slowest check, as
+    long as the number of checks does not exceed `concurrency`.  Statuspage.io
+    reconciliation and notifications use blocking clients, so the handling of
+    each result is awaited on a pool of `RESULT_THREADS` threads.
+
+    Cycles run on an event loop which the executor keeps on a thread of its own
+    until it is closed, so connections are reused from one cycle to the next.
+    Cycles can be run from several threads at once, and share the event loop and
+    the `concurrency` limit.
+
+    Attributes:
+        concurrency: The maximum number of checks executing at once
+        async_session: The
+            [AsyncPooledSession][pi_monitor.async_transport.AsyncPooledSession]
+            shared by all probes
+    """
+
+    DEFAULT_CONCURRENCY = 64
+    RESULT_THREADS = 8
+
+    concurrency: int
+
+    def __init__(
+        self,
+        status_operator: StatusPageOperator,
+        notifier: Notifier,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        session: PooledSession = None,
+        cycle_deadline: float = None,
+        async_session: "AsyncPooledSession" = None,
+    ):
+        """Constructor
+
+        Constructs an instance of the AsyncHealthCheckExecutor with the given
+        [StatusPageOperator][pi_monitor.StatusPageOperator],
+        [Notifier][pi_monitor.Notifier] and concurrency limit.
+
+        Attributes:
+            statuspage_operator: The
+                [StatusPageOperator][pi_monitor.StatusPageOperator] which updates
+                statuspage.io, or `None` to only send notifications
+            notifier: The url to be fetched as part of the check
+            concurrency: The maximum number of checks executing at once
+            session: The session used by `execute_health_check`, which blocks.  If
+                     not provided, a new
+                     [PooledSession][pi_monitor.transport.PooledSession] is created.
+            cycle_deadline: The maximum number of seconds for a cycle of checks.
+            async_session: The session used for probes.  If not provided, a new
+                     [AsyncPooledSession][pi_monitor.async_transport.AsyncPooledSession]
+                     is created with room for `concurrency` connections per host.
+        """
+        from .async_transport import AsyncPooledSession
+
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        super().__init__(status_operator, notifier, session, cycle_deadline)
+        self.concurrency = concurrency
+        self.async_session = (
+            async_session
+            if async_session is not None
+            else AsyncPooledSession(pool_maxsize=concurrency)
+        )
+        self._thread_pool = ThreadPoolExecutor(
+            max_workers=min(concurrency, self.RESULT_THREADS),
+            thread_name_prefix="pi-monitor-async",
+        )
+        self._loop: "asyncio.AbstractEventLoop" = None
+        self._loop_thread: threading.Thread = None
+        self._loop_lock = threading.Lock()
+        self._semaphore: Tuple["asyncio.AbstractEventLoop", "asyncio.Semaphore"] = None
+
+    async def execute_health_check_async(
+        self,
+        check_settings: HealthCheckSettings,
+        semaphore: "asyncio.Semaphore",
+        deadline: _CycleDeadline = None,
+    ):
+        """Execute a health check as a coroutine
+
+        Args:
+            check_settings: An instance of
+                [HealthCheckSettings][pi_monitor.HealthCheckSettings]
+            semaphore: The semaphore bounding the number of checks in flight
+            deadline: The deadline of the current cycle, if any
+        """
+        import asyncio
+
+        if deadline is None:
+            deadline = _CycleDeadline()
+        loop = asyncio.get_running_loop()
+        async with semaphore:
+            logger.info("Checking %s...", check_settings.name)
+            http_result = await self._probe_async(check_settings, deadline)
+            await loop.run_in_executor(
+                self._thread_pool,
+                self._complete_health_check,
+                check_settings,
+                http_result,
+                deadline,
+            )
+
+    async def execute_health_checks_async(self, checks: List[HealthCheckSettings]):
+        """Execute a cycle of health checks as coroutines
+
+        Checks which have not completed by `cycle_deadline` are cancelled and
+        reported as timed out.
+
+        Args:
+            checks: A list of
+                [HealthCheckSettings][pi_monitor.HealthCheckSettings]
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        semaphore = self._get_semaphore()
+        deadline = _CycleDeadline(self.cycle_deadline)
+        status_page_cycle = await loop.run_in_executor(
+            self._thread_pool, self.begin_cycle, checks
+        )
+        try:
+            tasks = {
+                asyncio.ensure_future(
+                    self.execute_health_check_async(check, semaphore, deadline)
+                ): check
+                for check in checks
+            }
+            done, pending = (
+                await asyncio.wait(tasks, timeout=deadline.remaining())
+                if tasks
+                else (set(), set())
+            )
+            timed_out = [task for task in pending if deadline.claim(tasks[task])]
+            for task in timed_out:
+                task.cancel()
+            for task in pending.difference(timed_out):
+                # The check is already handling its result
+                await asyncio.wait([task])
+                done.add(task)
+            for task in timed_out:
+                await loop.run_in_executor(
+                    self._thread_pool, self._handle_timeout, tasks[task]
+                )
+        finally:
+            await loop.run_in_executor(
+                self._thread_pool, self.end_cycle, status_page_cycle
+            )
+        for task in done:
+            if task.exception() is not None:
+                logger.error("Health check failed: %s", task.exception())
+        logger.debug("Health check connections: %s", self.async_session.stats)
+
+    def run_cycle(self, checks: List[HealthCheckSettings]):
+        """Execute a cycle of health checks
+
+        Runs `execute_health_checks_async` on the executor's event loop and waits
+        for it to complete.
+
+        Args:
+            checks: A list of
+                [HealthCheckSettings][pi_monitor.HealthCheckSettings]
+        """
+        import asyncio
+
+        asyncio.run_coroutine_threadsafe(
+            self.execute_health_checks_async(checks), self._get_loop()
+        ).result()
+
+    def close(self):
+        """Close the connections, event loop and thread pool used by this executor"""
+        import asyncio
+
+        with self._loop_lock:
+            loop, self._loop = self._loop, None
+            thread, self._loop_thread = self._loop_thread, None
+        if loop is not None:
+            try:
+                for coroutine in (
+                    self.async_session.aclose(),
+                    loop.shutdown_asyncgens(),
+                    loop.shutdown_default_executor(),
+                ):
+                    asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+            finally:
+                loop.call_soon_threadsafe(loop.stop)
+                thread.join()
+                loop.close()
+        self._thread_pool.shutdown(wait=True)
+
+    def _get_loop(self) -> "asyncio.AbstractEventLoop":
+        import asyncio
+
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self._loop.run_forever, name="pi-monitor-loop", daemon=True
+                )
+                self._loop_thread.start()
+            return self._loop
+
+    def _get_semaphore(self) -> "asyncio.Semaphore":
+        # Shared by the cycles on a loop, so that together they respect concurrency
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore[0] is not loop:
+            self._semaphore = (loop, asyncio.Semaphore(self.concurrency))
+        return self._semaphore[1]
+
+    async def _probe_async(
+        self, check_settings: HealthCheckSettings, deadline: _CycleDeadline
+    ) -> HttpGetResult:
+        if deadline.remaining() == 0:
+            return HttpGetResult.timeout()
+        return await self._get_http_async(
+            check_settings, self._get_timeout(check_settings, deadline)
+        )
+
+    async def _get_http_async(
+        self, check_settings: HealthCheckSettings, timeout: Tuple[float, float] = None
+    ) -> HttpGetResult:
+        """Retrieve data from the URL without blocking
+
+        The coroutine counterpart of `_get_http`, which sends the request with
+        the executor's
+        [AsyncPooledSession][pi_monitor.async_transport.AsyncPooledSession].
+
+        Args:
+            check_settings: An instance of
+                [HealthCheckSettings][pi_monitor.HealthCheckSettings]
+            timeout: The connect and read timeouts, in seconds.  Defaults to the
+                timeouts of [HealthCheckSettings][pi_monitor.HealthCheckSettings].
+
+        Returns:
+            An [HttpGetResult][pi_monitor.HttpGetResult]
+        """
+        import asyncio
+        import socket
+
+        request = self._prepare_request(check_settings, timeout)
+        if isinstance(request, HttpGetResult):
+            return request
+        url = check_settings.url
+        method, headers, timeout = request
+        try:
+            logger.debug("Requesting %s %s", method, url)
+            started = time.perf_counter()
+            response = await self.async_session.request(
+                method,
+                url,
+                headers=headers,
+                timeout=timeout,
+                time_limit=sum(timeout),
+            )
+            async with response:
+                received = time.perf_counter()
+                result = await self._process_response_async(response, check_settings)
+            finished = time.perf_counter()
+            result.timings = response.timings
+            result.timings.transfer = finished - received
+            result.timings.total = finished - started
+            logger.debug("Timings for %s: %s", url, result.timings)
+        except (asyncio.TimeoutError, socket.timeout):
+            logger.warning("Request timed out %s", url)
+            result = HttpGetResult.timeout()
+        except Exception as e:
+            logger.error("Request failed exception %s", e)
+            result = HttpGetResult(False, self._describe_failure(e))
+
+        return result
+
+    async def _process_response_async(
+        self, response: "AsyncResponse", check_settings: HealthCheckSettings = None
+    ) -> HttpGetResult:
+        """Process a response without blocking
+
+        The coroutine counterpart of `_process_response`, for an
+        [AsyncResponse][pi_monitor.async_transport.AsyncResponse].
+
+        Args:
+            response: The response to the check's request
+            check_settings: The [HealthCheckSettings][pi_monitor.HealthCheckSettings]
+                of the check, if any
+
+        Returns:
+            An [HttpGetResult][healthchecks.HttpGetResult]
+        """
+        result, reader, evaluator = self._begin_response(response, check_settings)
+        if reader is not None:
+            while True:
+                chunk = await response.read(reader.chunk_size)
+                if not chunk or reader.feed(chunk):
+                    break
+        return self._end_response(result, response, reader, evaluator)
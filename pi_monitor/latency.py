@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+
+Module for tracking response latency.
+
+This module provides a streaming percentile estimator for the response times of
+a health check, which uses a fixed amount of memory however many samples it
+records.
+
+"""
+
+import logging
+import math
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyHistogram:
+    """LatencyHistogram Class
+
+    An estimate of the distribution of recent response times.  Samples are counted
+    in logarithmic buckets, each `GROWTH` times wider than the last, from
+    `MINIMUM` seconds up to `MAXIMUM` seconds, so percentiles are accurate to
+    within half a bucket, about 5%.
+
+    Older samples decay, so that the estimate follows changes in latency.  A sample
+    loses half of its weight after `window` more samples are recorded.
+
+    Attributes:
+        window: The number of samples after which a sample's weight is halved.
+    """
+
+    MINIMUM = 0.001
+    MAXIMUM = 120.0
+    GROWTH = 1.1
+    BUCKETS = math.ceil(math.log(MAXIMUM / MINIMUM, GROWTH)) + 1
+
+    window: int
+
+    def __init__(self, window: int = 20):
+        """Constructor
+
+        Args:
+            window: The number of samples after which a sample's weight is halved.
+        """
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        self.window = window
+        self._growth = 2 ** (1 / window)
+        self._weight = 1.0
+        self._counts: Dict[int, float] = {}
+        self._total = 0.0
+
+    @staticmethod
+    def max_samples(window: int) -> float:
+        """The decayed number of samples which a histogram approaches
+
+        As older samples decay, the decayed number of samples levels off below this
+        limit, however many samples are recorded.
+
+        Args:
+            window: The number of samples after which a sample's weight is halved.
+
+        Returns:
+            The limit of the decayed number of samples.
+        """
+        return 1 / (2 ** (1 / window) - 1)
+
+    @property
+    def samples(self) -> float:
+        """The decayed number of samples recorded"""
+        return self._total / self._weight
+
+    def record(self, seconds: float):
+        """Record a response time
+
+        Rather than decaying every bucket, each new sample is given a larger weight
+        than the one before, and the weights are rescaled when they grow large.
+
+        Args:
+            seconds: The response time
+        """
+        bucket = self._bucket(seconds)
+        self._counts[bucket] = self._counts.get(bucket, 0.0) + self._weight
+        self._total += self._weight
+        self._weight *= self._growth
+        if self._weight > 1e100:
+            self._rescale()
+
+    def percentile(self, percentile: float) -> float:
+        """Estimate a percentile of the recorded response times
+
+        Args:
+            percentile: The percentile, from 0 to 100
+
+        Returns:
+            The estimated response time, in seconds, or `None` if no samples have
+            been recorded.
+        """
+        if self._total <= 0:
+            return None
+        target = self._total * min(max(percentile, 0), 100) / 100
+        running = 0.0
+        for bucket in sorted(self._counts):
+            running += self._counts[bucket]
+            if running >= target:
+                return self._value(bucket)
+        return self._value(max(self._counts))
+
+    def to_dict(self) -> dict:
+        """Convert the histogram to a dictionary which can be saved as JSON
+
+        Returns:
+            A dictionary of the window and the decayed count of each bucket.
+        """
+        return {
+            "window": self.window,
+            "counts": {
+                str(bucket): count / self._weight
+                for bucket, count in self._counts.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencyHistogram":
+        """Create a histogram from a dictionary created by `to_dict`
+
+        Args:
+            data: The dictionary
+
+        Returns:
+            A [LatencyHistogram][pi_monitor.latency.LatencyHistogram]
+        """
+        histogram = cls(int(data["window"]))
+        for bucket, count in data["counts"].items():
+            histogram._counts[int(bucket)] = float(count)
+        histogram._total = sum(histogram._counts.values())
+        return histogram
+
+    def _rescale(self):
+        self._counts = {
+            bucket: count / self._weight
+            for bucket, count in self._counts.items()
+            if count / self._weight > 1e-9
+        }
+        self._total = sum(self._counts.values())
+        self._weight = 1.0
+
+    def _bucket(self, seconds: float) -> int:
+        if seconds <= self.MINIMUM:
+            return 0
+        return min(
+            math.ceil(math.log(seconds / self.MINIMUM, self.GROWTH)), self.BUCKETS - 1
+        )
+
+    def _value(self, bucket: int) -> float:
+        # The geometric middle of the bucket
+        return self.MINIMUM * self.GROWTH ** (bucket - 0.5) if bucket else self.MINIMUM
@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+"""
+
+Module for notification backends.
+
+This module provides the backends which deliver notifications for the
+[Notifier][pi_monitor.Notifier]: SendGrid, SMTP and a generic webhook.  Each
+backend connects lazily and keeps its connection open between notifications.
+The SendGrid and SMTP libraries are only imported when a backend using them
+sends its first notification.
+
+"""
+
+import logging
+import ssl
+from abc import ABC, abstractmethod
+import threading
+import typing
+import requests
+from .configuration import NotificationSettings
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    import smtplib
+    from sendgrid import SendGridAPIClient
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = NotificationSettings.BACKENDS
+
+
+class NotificationBackend(ABC):
+    """NotificationBackend Class
+
+    The base class for notification backends.
+
+    Attributes:
+        destination: Where notifications are delivered, for logging.
+    """
+
+    destination: str
+
+    @abstractmethod
+    def send(self, subject: str, content: str) -> bool:
+        """Send a notification
+
+        Args:
+            subject: The notification subject.
+            content: The notification content.
+
+        Returns:
+            True if the notification was accepted.
+
+        Raises:
+            Exception: If the notification could not be sent.
+        """
+
+    def close(self):
+        """Release any open connection"""
+
+
+class SendGridBackend(NotificationBackend):
+    """SendGridBackend Class
+
+    Sends email notifications through the SendGrid API, reusing one client.
+
+    Attributes:
+        sender: The sender's email address.
+        destination: The recipient's email address.
+        timeout: The number of seconds to wait for the SendGrid API.
+    """
+
+    sender: str
+    timeout: float
+
+    def __init__(
+        self,
+        api_key: str,
+        sender: str,
+        recipient: str,
+        timeout: float = NotificationSettings.timeout,
+    ):
+        """Constructor
+
+        Args:
+            api_key: The SendGrid API key.
+            sender: The sender's email address.
+            recipient: The recipient's email address.
+            timeout: The number of seconds to wait for the SendGrid API.
+        """
+        self.sender = sender
+        self.destination = recipient
+        self.timeout = timeout
+        self._api_key = api_key
+        self._client: SendGridAPIClient = None
+
+    def send(self, subject: str, content: str) -> bool:
+        from sendgrid import SendGridAPIClient
+        from sendgrid.helpers.mail import Mail
+
+        message = Mail(
+            from_email=self.sender,
+            to_emails=self.destination,
+            subject=subject,
+            plain_text_content=content,
+            html_content=content,
+        )
+        if self._client is None:
+            self._client = SendGridAPIClient(self._api_key)
+            self._client.client.timeout = self.timeout
+        response = self._client.send(message)
+        return response.status_code == 202
+
+
+class SmtpBackend(NotificationBackend):
+    """SmtpBackend Class
+
+    Sends email notifications over SMTP.  One authenticated session, upgraded with
+    `STARTTLS`, is opened for the first notification and kept open, so a burst of
+    notifications is sent over a single connection.  When the server has closed
+    the session, it is reopened and the notification sent again.
+
+    Attributes:
+        host: The SMTP host.
+        port: The SMTP port.
+        sender: The sender's email address, which is also the SMTP user.
+        destination: The recipient's email address.
+        starttls: True to upgrade the session with `STARTTLS`.
+        timeout: The number of seconds to wait for the SMTP server.
+    """
+
+    host: str
+    port: int
+    sender: str
+    starttls: bool
+    timeout: float
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        sender: str,
+        password: str,
+        recipient: str,
+        starttls: bool = True,
+        timeout: float = NotificationSettings.timeout,
+        ssl_context: ssl.SSLContext = None,
+    ):
+        """Constructor
+
+        Args:
+            host: The SMTP host.
+            port: The SMTP port.
+            sender: The sender's email address, which is also the SMTP user.
+            password: The SMTP user's password.  Without a password, the session is
+                not authenticated.
+            recipient: The recipient's email address.
+            starttls: True to upgrade the session with `STARTTLS`.
+            timeout: The number of seconds to wait for the SMTP server.
+            ssl_context: The context used to verify the server, or `None` for the
+                system defaults.
+        """
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.destination = recipient
+        self.starttls = starttls
+        self.timeout = timeout
+        self._password = password
+        self._ssl_context = ssl_context
+        self._lock = threading.Lock()
+        self._connection: smtplib.SMTP = None
+
+    def send(self, subject: str, content: str) -> bool:
+        import smtplib
+        from email.message import EmailMessage
+
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = self.destination
+        message["Subject"] = subject
+        message.set_content(content)
+
+        with self._lock:
+            reused = self._connection is not None
+            try:
+                self._get_connection().send_message(message)
+            except (smtplib.SMTPServerDisconnected, ConnectionError) as e:
+                self._disconnect()
+                if not reused:
+                    raise
+                logger.debug("SMTP session closed (%s), reconnecting", e)
+                self._get_connection().send_message(message)
+        return True
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                import smtplib
+
+                try:
+                    self._connection.quit()
+                except (smtplib.SMTPException, OSError):
+                    pass
+                self._disconnect()
+
+    def _get_connection(self) -> "smtplib.SMTP":
+        import smtplib
+
+        if self._connection is None:
+            logger.debug("Connecting to SMTP server %s:%s", self.host, self.port)
+            connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            try:
+                if self.starttls:
+                    connection.starttls(
+                        context=self._ssl_context or ssl.create_default_context()
+                    )
+                if self._password:
+                    connection.login(self.sender, self._password)
+            except BaseException:
+                connection.close()
+                raise
+            self._connection = connection
+        return self._connection
+
+    def _disconnect(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+class WebhookBackend(NotificationBackend):
+    """WebhookBackend Class
+
+    Sends notifications as a JSON `POST` of `subject` and `content` to a URL, over
+    a keep-alive session.  Any `2xx` response is accepted.
+
+    Attributes:
+        destination: The webhook URL.
+        timeout: The number of seconds to wait for the webhook.
+    """
+
+    timeout: float
+
+    def __init__(
+        self,
+        url: str,
+        timeout: float = NotificationSettings.timeout,
+        session: requests.Session = None,
+    ):
+        """Constructor
+
+        Args:
+            url: The webhook URL.
+            timeout: The number of seconds to wait for the webhook.
+            session: The session used to send requests, or `None` to create one.
+        """
+        self.destination = url
+        self.timeout = timeout
+        self._session = session or requests.Session()
+
+    def send(self, subject: str, content: str) -> bool:
+        with self._session.post(
+            self.destination,
+            json={"subject": subject, "content": content},
+            timeout=self.timeout,
+        ) as response:
+            return response.ok
+
+    def close(self):
+        self._session.close()
+
+
+def create_backend(config: NotificationSettings) -> NotificationBackend:
+    """Create the backend selected by the notification settings
+
+    Args:
+        config: An instance of
+            [NotificationSettings][pi_monitor.NotificationSettings]
+
+    Returns:
+        A [NotificationBackend][pi_monitor.notification_backends.NotificationBackend],
+        or `None` if the backend has no destination configured.
+
+    Raises:
+        ValueError: If the backend is unknown.
+    """
+    if config.backend == "webhook":
+        return (
+            WebhookBackend(config.webhook_url, config.timeout)
+            if config.webhook_url
+            else None
+        )
+
+    if config.backend not in BACKENDS:
+        raise ValueError(
+            f"Unknown notification backend {config.backend!r}: expected "
+            + ", ".join(BACKENDS)
+        )
+
+    if not config.sms_email:
+        return None
+    if config.backend == "smtp":
+        return SmtpBackend(
+            config.smtp_url,
+            config.smtp_port,
+            config.smtp_sender_id,
+            config.smtp_sender_apikey,
+            config.sms_email,
+            config.smtp_starttls,
+            config.timeout,
+        )
+    return SendGridBackend(
+        config.smtp_sender_apikey,
+        config.smtp_sender_id,
+        config.sms_email,
+        config.timeout,
+    )
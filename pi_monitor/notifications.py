@@ -1,21 +1,34 @@
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
 import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
 from .configuration import NotificationSettings
+from .notification_backends import NotificationBackend, create_backend
 
 logger = logging.getLogger(__name__)
 
+_FLUSH = object()
+
+CLOSE_TIMEOUT = 60
+
 
 class Notifier:
     """Notifier Class
 
-    The Notifier class encapsulates the functionality to send email notifications.
+    The Notifier class encapsulates the functionality to send notifications,
+    through the backend selected by the `backend` setting.
 
     Attributes:
         config: An instance of [NotificationSettings][pi_monitor.NotificationSettings]
+        backend: The
+            [NotificationBackend][pi_monitor.notification_backends.NotificationBackend]
+            which delivers notifications, or `None` if notifications are not
+            configured.
     """
 
     config: NotificationSettings
+    backend: NotificationBackend
 
     def __init__(self, notify_config: NotificationSettings) -> None:
         """Constructor
@@ -23,13 +36,16 @@ class Notifier:
         Initialize the instance using the provided
         [NotificationSettings][pi_monitor.NotificationSettings].
 
+        Raises:
+            ValueError: If the backend is unknown.
         """
         self.config = notify_config
+        self.backend = create_backend(notify_config) if notify_config else None
 
     def notify(self, subject: str, content: str) -> bool:
         """Send notification
 
-        Build and send an email notificaiton using the provided parameters.
+        Build and send a notification using the provided parameters.
 
         Args:
             subject: The email subject.
@@ -41,23 +57,315 @@ class Notifier:
             logger.info("No configuration provided.  Skipping...")
             return True
 
-        if self.config.sms_email is not None and self.config.sms_email != "":
-            logger.info("Sending Notification to %s", self.config.sms_email)
+        if self.backend is None:
+            if self.config.backend == "webhook":
+                logger.info("No webhook URL provided for notification.  Skipping...")
+            else:
+                logger.info("No email address provided for notification.  Skipping...")
+            return True
 
-            message = Mail(
-                from_email=self.config.smtp_sender_id,
-                to_emails=self.config.sms_email,
-                subject=subject,
-                plain_text_content=content,
-                html_content=content,
+        logger.info("Sending Notification to %s", self.backend.destination)
+        try:
+            return self.backend.send(subject, content)
+        except Exception as e:
+            logger.error(
+                "Error sending notification via %s: %s", self.config.backend, e
             )
+            return False
+
+    def close(self):
+        """Close the backend's connection"""
+        if self.backend is not None:
+            self.backend.close()
+
+
+class NotificationDigest:
+    """NotificationDigest Class
+
+    Collects notifications into a single summary message per `window`.  The first
+    notification after a quiet period, in which nothing was sent for `window`
+    seconds, is due immediately, so the first alert of an outage is never
+    delayed.  Later notifications are held until `window` seconds after the first
+    of them was added.
+
+    A notification which repeats the last one of its check, within `cooldown`
+    seconds of it, is suppressed.  A different notification, such as the recovery
+    which follows an outage, is never suppressed.
+
+    Attributes:
+        window: The number of seconds to collect notifications for.
+        cooldown: The number of seconds before a check can repeat a notification.
+    """
+
+    window: float
+    cooldown: float
+
+    def __init__(
+        self,
+        window: float = 0,
+        cooldown: float = 0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Constructor
+
+        Args:
+            window: The number of seconds to collect notifications for.  A value of
+                0 sends every notification on its own.
+            cooldown: The number of seconds before a check can repeat a
+                notification.
+            clock: A monotonic clock.
+        """
+        self.window = window
+        self.cooldown = cooldown
+        self._clock = clock
+        self._pending: List[Tuple[str, str]] = []
+        self._due: float = None
+        self._last_sent = float("-inf")
+        self._last_notified: Dict[str, Tuple[str, float]] = {}
+
+    def add(self, subject: str, content: str) -> bool:
+        """Add a notification
+
+        Args:
+            subject: The notification subject, which is the name of the check.
+            content: The notification content.
+
+        Returns:
+            True if the notification was added, or False if it repeats the last
+            notification of the check within its cooldown.
+        """
+        now = self._clock()
+        last_content, last_notified = self._last_notified.get(
+            subject, (None, float("-inf"))
+        )
+        if content == last_content and now - last_notified < self.cooldown:
+            logger.info("Suppressing notification for %s during cooldown", subject)
+            return False
+        self._last_notified[subject] = (content, now)
+
+        if not self._pending:
+            quiet = now - self._last_sent >= self.window
+            self._due = now if quiet else now + self.window
+        self._pending.append((subject, content))
+        return True
+
+    def delay(self) -> float:
+        """The number of seconds until held notifications are due
+
+        Returns:
+            The number of seconds, or `None` if no notifications are held.
+        """
+        if not self._pending:
+            return None
+        return max(self._due - self._clock(), 0)
+
+    def take(self) -> Tuple[str, str]:
+        """Remove the held notifications as a single message
+
+        A single notification is returned unchanged.  Several notifications are
+        combined into a summary listing each check and its notification.
+
+        Returns:
+            The subject and content of the message, or `None` if no notifications
+            are held.
+        """
+        pending, self._pending, self._due = self._pending, [], None
+        if not pending:
+            return None
+        self._last_sent = self._clock()
+        if len(pending) == 1:
+            return pending[0]
+        return (
+            f"{len(pending)} checks changed",
+            "\n".join(f"{subject}: {content}" for subject, content in pending),
+        )
+
+
+class NotificationDispatcher:
+    """NotificationDispatcher Class
+
+    Sends notifications on a background thread, so that health checks do not wait
+    for them.  Notifications are held in a queue of at most `queue_size` entries,
+    and a notification which is not accepted by the
+    [Notifier][pi_monitor.Notifier] is retried up to `max_retries` times, with an
+    exponential backoff.  `close` sends every queued notification before it
+    returns, waiting at most `close_timeout` seconds for them.
+
+    Notifications pass through a
+    [NotificationDigest][pi_monitor.notifications.NotificationDigest], which can
+    combine the notifications of a window into one message and suppress checks
+    which repeat a notification within a cooldown.
+
+    A dispatcher can be used wherever a [Notifier][pi_monitor.Notifier] is.
+
+    Attributes:
+        notifier: The [Notifier][pi_monitor.Notifier] which sends notifications.
+        max_retries: The number of retries for a failed notification.
+        retry_backoff: The number of seconds before the first retry.  Each
+            further retry waits twice as long.
+        close_timeout: The number of seconds `close` waits for queued
+            notifications to be sent.
+    """
+
+    notifier: Notifier
+    max_retries: int
+    retry_backoff: float
+    close_timeout: float
+
+    def __init__(
+        self,
+        notifier: Notifier,
+        queue_size: int = NotificationSettings.queue_size,
+        max_retries: int = NotificationSettings.max_retries,
+        retry_backoff: float = NotificationSettings.retry_backoff,
+        digest_window: float = NotificationSettings.digest_window,
+        cooldown: float = NotificationSettings.cooldown,
+        close_timeout: float = CLOSE_TIMEOUT,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Constructor
+
+        Args:
+            notifier: The [Notifier][pi_monitor.Notifier] which sends notifications.
+            queue_size: The maximum number of notifications waiting to be sent.
+            max_retries: The number of retries for a failed notification.
+            retry_backoff: The number of seconds before the first retry.
+            digest_window: The number of seconds to collect notifications into a
+                single message.  A value of 0 sends every notification on its own.
+            cooldown: The number of seconds before a check can repeat a
+                notification.
+            close_timeout: The number of seconds `close` waits for queued
+                notifications to be sent.
+            sleep: The function used to wait between retries.
+            clock: A monotonic clock, used for the digest window and cooldown.
+        """
+        self.notifier = notifier
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.close_timeout = close_timeout
+        self._sleep = sleep
+        self._digest = NotificationDigest(digest_window, cooldown, clock)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._worker: threading.Thread = None
+        self._closed = False
+
+    @classmethod
+    def from_settings(cls, notifier: Notifier, settings: NotificationSettings):
+        """Build a dispatcher from settings
+
+        Args:
+            notifier: The [Notifier][pi_monitor.Notifier] which sends notifications.
+            settings: An instance of
+                [NotificationSettings][pi_monitor.NotificationSettings], or `None`
+                to use defaults.
+
+        Returns:
+            A [NotificationDispatcher][pi_monitor.notifications.NotificationDispatcher]
+        """
+        if settings is None:
+            settings = NotificationSettings()
+        return cls(
+            notifier,
+            settings.queue_size,
+            settings.max_retries,
+            settings.retry_backoff,
+            settings.digest_window,
+            settings.cooldown,
+        )
+
+    def notify(self, subject: str, content: str) -> bool:
+        """Queue a notification
+
+        Args:
+            subject: The email subject.
+            content: the email content.
+
+        Returns:
+            True if the notification was queued, or False if the queue is full or
+            the dispatcher is closed.
+        """
+        with self._lock:
+            if self._closed:
+                logger.error("Notification dispatcher is closed, dropping: %s", subject)
+                return False
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="pi-monitor-notifications", daemon=True
+                )
+                self._worker.start()
             try:
-                sg = SendGridAPIClient(self.config.smtp_sender_apikey)
-                response = sg.send(message)
-                return response.status_code == 202
-            except Exception as e:
-                logger.error("Error sending mail: %s", e)
+                self._queue.put_nowait((subject, content))
+            except queue.Full:
+                logger.error("Notification queue is full, dropping: %s", subject)
                 return False
-        else:
-            logger.info("No email address provided for notification.  Skipping...")
-            return True
+        return True
+
+    def flush(self):
+        """Send every queued notification, including any held for a digest"""
+        with self._lock:
+            if self._worker is None:
+                return
+            self._queue.put(_FLUSH)
+        self._queue.join()
+
+    def close(self):
+        """Send every queued notification, then stop the worker and the notifier
+
+        Notifications which are not sent within `close_timeout` seconds are
+        abandoned.
+        """
+        with self._lock:
+            self._closed = True
+            worker = self._worker
+            self._worker = None
+        if worker is not None:
+            self._queue.put(None)
+            worker.join(self.close_timeout)
+            if worker.is_alive():
+                # The worker is still using the notifier, and stops with the process
+                logger.error(
+                    "Notifications not sent within %s seconds, abandoning them",
+                    self.close_timeout,
+                )
+                return
+        self.notifier.close()
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self._digest.delay())
+            except queue.Empty:
+                self._send_digest()
+                continue
+            try:
+                if item is None or item is _FLUSH:
+                    self._send_digest()
+                    if item is None:
+                        return
+                elif self._digest.add(*item) and self._digest.delay() == 0:
+                    self._send_digest()
+            finally:
+                self._queue.task_done()
+
+    def _send_digest(self):
+        message = self._digest.take()
+        if message is not None:
+            self._deliver(*message)
+
+    def _deliver(self, subject: str, content: str) -> bool:
+        for attempt in range(self.max_retries + 1):
+            if attempt > 0:
+                self._sleep(self.retry_backoff * 2 ** (attempt - 1))
+            try:
+                if self.notifier.notify(subject, content):
+                    return True
+            except Exception as e:
+                logger.error("Error sending notification: %s", e)
+        logger.error(
+            "Giving up on notification %s after %d attempts",
+            subject,
+            self.max_retries + 1,
+        )
+        return False
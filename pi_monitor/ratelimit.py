@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+
+Module for rate limiting API calls.
+
+This module provides a token bucket rate limiter, and a queue which executes
+writes one at a time in priority order.
+
+"""
+
+import itertools
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """TokenBucket Class
+
+    A thread-safe token bucket.  Tokens are added at `rate` per second, up to
+    `capacity`, and each call to `acquire` consumes one token, waiting until one
+    is available.  Callers are served in the order they call `acquire`.
+
+    Attributes:
+        rate: The number of tokens added per second.
+        capacity: The maximum number of tokens, which is the largest burst allowed.
+    """
+
+    rate: float
+    capacity: float
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """Constructor
+
+        Args:
+            rate: The number of tokens added per second.
+            capacity: The maximum number of tokens.
+            clock: A monotonic clock.
+            sleep: The function used to wait for tokens.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0")
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = clock()
+
+    def acquire(self) -> float:
+        """Acquire a token
+
+        Reserves a token, and waits until the reservation is due.
+
+        Returns:
+            The number of seconds spent waiting.
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self._tokens + (now - self._updated) * self.rate, self.capacity
+            )
+            self._updated = now
+            self._tokens -= 1
+            wait_time = -self._tokens / self.rate if self._tokens < 0 else 0
+
+        if wait_time > 0:
+            logger.debug("Rate limited, waiting %.2f seconds", wait_time)
+            self._sleep(wait_time)
+        return wait_time
+
+
+class PriorityWriteQueue:
+    """PriorityWriteQueue Class
+
+    Executes submitted calls one at a time on a background thread.  When several
+    calls are waiting, the one with the lowest `priority` runs first, and calls
+    with equal priority run in the order they were submitted.  No call is ever
+    dropped.
+
+    Attributes:
+        name: The name of the worker thread.
+    """
+
+    name: str
+
+    def __init__(self, name: str = "pi-monitor-writes"):
+        self.name = name
+        self._queue = queue.PriorityQueue()
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._worker: threading.Thread = None
+
+    def submit(self, priority: int, fn: Callable, *args) -> Future:
+        """Submit a call
+
+        Args:
+            priority: The priority of the call.  Lower values run first.
+            fn: The callable to execute.
+            args: The arguments for `fn`.
+
+        Returns:
+            A `Future` for the result of the call.
+        """
+        future = Future()
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name=self.name, daemon=True
+                )
+                self._worker.start()
+            self._queue.put((priority, next(self._counter), future, fn, args))
+        return future
+
+    def close(self):
+        """Stop the worker thread once all submitted calls have completed"""
+        with self._lock:
+            worker = self._worker
+            self._worker = None
+            if worker is not None:
+                self._queue.put((float("inf"), next(self._counter), None, None, None))
+        if worker is not None:
+            worker.join()
+
+    def _run(self):
+        while True:
+            _, _, future, fn, args = self._queue.get()
+            if future is None:
+                return
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
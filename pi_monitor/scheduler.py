@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""
+
+Module for scheduling health checks in daemon mode.
+
+This module provides a scheduler that keeps the process alive and runs
+each health check on its own cadence, as defined by the check's `interval`.
+Each check runs on its own, so a slow check does not delay the others.
+The scheduled checks can be replaced while the scheduler runs, such as when the
+configuration file is reloaded.
+
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Executor, Future
+from typing import Callable, Dict, List, Tuple
+from .configuration import HealthCheckSettings
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduledCheck:
+    """ScheduledCheck Class
+
+    This class represents a health check and the next time it is due to run.
+
+    Attributes:
+        check: The [HealthCheckSettings][pi_monitor.HealthCheckSettings] to run.
+        interval: The number of seconds between runs of this check.
+        next_run: The monotonic time at which this check is next due.
+    """
+
+    check: HealthCheckSettings
+    interval: float
+    next_run: float
+
+    def __init__(self, check: HealthCheckSettings, interval: float, next_run: float):
+        self.check = check
+        self.interval = interval
+        self.next_run = next_run
+
+
+class CheckScheduler:
+    """CheckScheduler Class
+
+    The CheckScheduler runs health checks repeatedly, each on its own interval.
+    Each check which is due is submitted to the `executor` on its own, as a
+    cycle of one check, and is rescheduled when it completes.  A slow check
+    therefore does not hold back checks which are due while it runs.  A check is
+    not run again until its previous run has completed.
+
+    Attributes:
+        run_cycle: A callable that executes a list of health checks and returns
+                    when they have completed.
+        default_interval: The interval, in seconds, used for checks that do not
+                            define their own `interval`.
+        executor: The `concurrent.futures.Executor` which runs the checks, or
+                    `None` to run them on the thread calling `run_pending`.
+    """
+
+    MINIMUM_INTERVAL = 1
+
+    run_cycle: Callable[[List[HealthCheckSettings]], None]
+    default_interval: float
+    executor: Executor
+
+    def __init__(
+        self,
+        run_cycle: Callable[[List[HealthCheckSettings]], None],
+        checks: List[HealthCheckSettings],
+        default_interval: float = HealthCheckSettings.interval,
+        clock: Callable[[], float] = time.monotonic,
+        executor: Executor = None,
+    ):
+        """Constructor
+
+        Schedule all of the provided checks to run immediately.
+
+        Args:
+            run_cycle: A callable that executes a list of health checks.  It may be
+                called from several threads at once.
+            checks: The health checks to schedule.
+            default_interval: The interval for checks without an `interval`.
+            clock: A monotonic clock, used to determine when checks are due.
+            executor: The executor which runs the checks, or `None` to run them on
+                the thread calling `run_pending`.
+        """
+        self.run_cycle = run_cycle
+        self.default_interval = default_interval
+        self.executor = executor
+        self._clock = clock
+        self._counter = itertools.count()
+        self._queue = []
+        self._running: Dict[int, ScheduledCheck] = {}
+        self._removed = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+        now = self._clock()
+        for check in checks:
+            self._push(ScheduledCheck(check, self._get_interval(check), now))
+
+    def _get_interval(self, check: HealthCheckSettings) -> float:
+        interval = check.interval or self.default_interval
+        return max(float(interval), self.MINIMUM_INTERVAL)
+
+    def _push(self, scheduled: ScheduledCheck):
+        heapq.heappush(
+            self._queue, (scheduled.next_run, next(self._counter), scheduled)
+        )
+
+    def update_checks(
+        self, checks: List[HealthCheckSettings]
+    ) -> Tuple[List[str], List[str], List[str]]:
+        """Replace the scheduled checks
+
+        Checks are matched to the scheduled checks by name.  A new check is due
+        immediately, and a removed check is unscheduled.  A check whose settings
+        changed keeps its place in the schedule, unless its interval changed, in
+        which case its next run is moved to one new interval after its last run.
+        Unchanged checks are left as they are.
+
+        A check which is running completes with its old settings, and is
+        rescheduled with the new ones.  A removed check which is running is not
+        rescheduled.
+
+        Args:
+            checks: The health checks to schedule.
+
+        Returns:
+            A tuple of the names of the added, removed and changed checks.
+        """
+        with self._lock:
+            queued = {entry[2].check.name: entry[2] for entry in self._queue}
+            running = {
+                scheduled.check.name: key
+                for key, scheduled in self._running.items()
+                if key not in self._removed
+            }
+            now = self._clock()
+            added: List[str] = []
+            changed: List[str] = []
+            self._queue = []
+            for check in checks:
+                scheduled = queued.pop(check.name, None)
+                key = running.pop(check.name, None)
+                if scheduled is None and key is not None:
+                    scheduled = self._running[key]
+                    if scheduled.check != check:
+                        changed.append(check.name)
+                        scheduled.interval = self._get_interval(check)
+                        scheduled.check = check
+                    continue
+                if scheduled is None:
+                    added.append(check.name)
+                    scheduled = ScheduledCheck(check, self._get_interval(check), now)
+                elif scheduled.check != check:
+                    changed.append(check.name)
+                    interval = self._get_interval(check)
+                    if interval != scheduled.interval:
+                        last_run = scheduled.next_run - scheduled.interval
+                        scheduled.next_run = max(last_run + interval, now)
+                        scheduled.interval = interval
+                    scheduled.check = check
+                self._push(scheduled)
+
+            self._removed.update(running.values())
+
+        return added, list(queued) + list(running), changed
+
+    def seconds_until_next(self) -> float:
+        """Time until the next check is due
+
+        Returns:
+            The number of seconds until the next check is due, or `None` if no
+            checks are waiting to run.
+        """
+        with self._lock:
+            if not self._queue:
+                return None
+            next_run = self._queue[0][0]
+        return max(next_run - self._clock(), 0)
+
+    def run_pending(self) -> int:
+        """Run all checks that are due
+
+        Each due check is submitted to the `executor` on its own, without waiting
+        for it to complete.  When it completes, it is rescheduled based on its
+        interval.  If a check overruns, it is rescheduled from the time it
+        completed rather than firing repeatedly to catch up.
+
+        Returns:
+            The number of checks submitted.
+        """
+        now = self._clock()
+        due: List[Tuple[int, ScheduledCheck]] = []
+        with self._lock:
+            while self._queue and self._queue[0][0] <= now:
+                key, scheduled = heapq.heappop(self._queue)[1:]
+                self._running[key] = scheduled
+                due.append((key, scheduled))
+
+        if due:
+            logger.debug("Running %d scheduled checks", len(due))
+        for key, scheduled in due:
+            future = self._submit([scheduled.check])
+            future.add_done_callback(
+                lambda future, key=key: self._complete(key, future)
+            )
+
+        return len(due)
+
+    def _submit(self, checks: List[HealthCheckSettings]) -> Future:
+        if self.executor is not None:
+            return self.executor.submit(self.run_cycle, checks)
+        future = Future()
+        try:
+            future.set_result(self.run_cycle(checks))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def _complete(self, key: int, future: Future):
+        with self._lock:
+            scheduled = self._running.pop(key)
+            if key in self._removed:
+                self._removed.discard(key)
+            else:
+                scheduled.next_run = max(
+                    scheduled.next_run + scheduled.interval, self._clock()
+                )
+                heapq.heappush(self._queue, (scheduled.next_run, key, scheduled))
+        if future.exception() is not None:
+            logger.error(
+                "Health check %s failed: %s", scheduled.check.name, future.exception()
+            )
+        self._wakeup.set()
+
+    def wake(self):
+        """Wake `run`, such as to stop it after its `stop_event` has been set"""
+        self._wakeup.set()
+
+    def run(
+        self,
+        stop_event: threading.Event,
+        poll: Callable[[], None] = None,
+        poll_interval: float = 1,
+    ):
+        """Run checks until stopped
+
+        Run scheduled checks as they become due until `stop_event` is set.  Once
+        `stop_event` is set, `wake` stops the scheduler without waiting for the
+        next check to be due.  Checks which are running are not waited for.
+
+        Args:
+            stop_event: A `threading.Event` which stops the scheduler when set.
+            poll: A callable which is called before due checks are run, and at
+                least every `poll_interval` seconds, such as to reload the
+                configuration.  It may call `update_checks`.
+            poll_interval: The maximum number of seconds between calls to `poll`.
+        """
+        logger.info("Scheduler started with %d checks", len(self._queue))
+        while not stop_event.is_set():
+            if poll is not None:
+                poll()
+            self.run_pending()
+            wait_time = self.seconds_until_next()
+            if wait_time is None:
+                wait_time = self.default_interval
+            if poll is not None:
+                wait_time = min(wait_time, poll_interval)
+            self._wakeup.wait(wait_time)
+            self._wakeup.clear()
+        logger.info("Scheduler stopped")
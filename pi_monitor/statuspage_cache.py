@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+
+Module for caching Statuspage.io state.
+
+This module provides a cache of component statuses, so that checks whose status
+has not changed do not need to read the component from the Statuspage.io API,
+and an index of unresolved incidents by component.
+
+"""
+
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from .files import write_atomic
+
+logger = logging.getLogger(__name__)
+
+
+class ComponentStatusCache:
+    """ComponentStatusCache Class
+
+    A thread-safe cache of Statuspage.io component statuses.  Entries are
+    populated from API reads, updated by our own writes, and expire after `ttl`
+    seconds.  The cache can be saved to and loaded from a file, so that it
+    survives between one-shot runs.
+
+    Attributes:
+        ttl: The number of seconds an entry is considered fresh.
+    """
+
+    ttl: float
+
+    def __init__(self, ttl: float = 300, clock: Callable[[], float] = time.time):
+        """Constructor
+
+        Args:
+            ttl: The number of seconds an entry is considered fresh.  A value of 0
+                disables the cache.
+            clock: A wall clock, used to timestamp entries.  Wall time is used so
+                that persisted entries remain valid between processes.
+        """
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[str, float]] = {}
+
+    def get(self, component_id: str) -> Optional[str]:
+        """Retrieve a component status
+
+        Args:
+            component_id: The component ID to retrieve
+
+        Returns:
+            The cached status, or `None` if the component is not cached or the
+            entry has expired.
+        """
+        with self._lock:
+            entry = self._entries.get(component_id)
+        if entry is None:
+            return None
+        status, updated = entry
+        if self._clock() - updated >= self.ttl:
+            return None
+        return status
+
+    def set(self, component_id: str, status: str):
+        """Store a component status
+
+        Args:
+            component_id: The component ID
+            status: The component's status on Statuspage.io
+        """
+        with self._lock:
+            self._entries[component_id] = (status, self._clock())
+
+    def invalidate(self, component_id: str):
+        """Remove a component status
+
+        Args:
+            component_id: The component ID
+        """
+        with self._lock:
+            self._entries.pop(component_id, None)
+
+    def load(self, file: str):
+        """Load entries from a file
+
+        Entries which have already expired are skipped.  A missing or unreadable
+        file leaves the cache empty.
+
+        Args:
+            file: The file to load
+        """
+        path = Path(file)
+        if not path.exists():
+            return
+        try:
+            data = json.loads(path.read_text())
+            entries = {
+                component_id: (entry["status"], float(entry["updated"]))
+                for component_id, entry in data["components"].items()
+            }
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.warning("Ignoring invalid component cache %s: %s", file, e)
+            return
+
+        now = self._clock()
+        with self._lock:
+            for component_id, (status, updated) in entries.items():
+                if now - updated < self.ttl:
+                    self._entries[component_id] = (status, updated)
+        logger.debug("Loaded %d cached components from %s", len(self._entries), file)
+
+    def save(self, file: str):
+        """Save entries to a file
+
+        The file is written atomically, so concurrent runs never read a partial
+        file.
+
+        Args:
+            file: The file to write
+        """
+        with self._lock:
+            components = {
+                component_id: {"status": status, "updated": updated}
+                for component_id, (status, updated) in self._entries.items()
+            }
+
+        try:
+            write_atomic(file, json.dumps({"components": components}).encode())
+        except OSError as e:
+            logger.warning("Failed to save component cache %s: %s", file, e)
+
+
+class IncidentIndex:
+    """IncidentIndex Class
+
+    A thread-safe index of unresolved Statuspage.io incidents by component ID.
+    The index is built from a single read of the unresolved incidents, and kept
+    up to date as incidents are created and resolved.
+    """
+
+    def __init__(self, incidents: List[object] = None):
+        """Constructor
+
+        Args:
+            incidents: The unresolved incidents, as returned by
+                [get_unresolved_incidents][pi_monitor.StatusPageClient.get_unresolved_incidents]
+        """
+        self._lock = threading.Lock()
+        self._by_component: Dict[str, List[object]] = {}
+        for incident in incidents or []:
+            self.add(
+                incident,
+                [component.id for component in getattr(incident, "components", [])],
+            )
+
+    def get(self, component_id: str) -> List[object]:
+        """Retrieve the unresolved incidents for a component
+
+        Args:
+            component_id: The component ID
+
+        Returns:
+            A list of the unresolved incidents associated with the component.
+        """
+        with self._lock:
+            return list(self._by_component.get(component_id, []))
+
+    def add(self, incident: object, component_ids: List[str]):
+        """Add an incident
+
+        Args:
+            incident: The incident
+            component_ids: The IDs of the components associated with the incident
+        """
+        with self._lock:
+            for component_id in component_ids:
+                self._by_component.setdefault(component_id, []).append(incident)
+
+    def remove(self, incident_id: str):
+        """Remove a resolved incident
+
+        Args:
+            incident_id: The ID of the incident
+        """
+        with self._lock:
+            for component_id, incidents in list(self._by_component.items()):
+                remaining = [i for i in incidents if i.id != incident_id]
+                if remaining:
+                    self._by_component[component_id] = remaining
+                else:
+                    del self._by_component[component_id]
@@ -1,5 +1,9 @@
 import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
 from .statuspage_io_client import StatusPageClient
+from .statuspage_cache import ComponentStatusCache, IncidentIndex
 from .configuration import StatusPageSettings
 from .enums import OpLevel
 
@@ -51,15 +55,20 @@ class StatusResult:
     Attributes:
         status_changed: True if the status has changed from the previous check,
                         false otherwise.
+        applied: True if the component has the requested status on statuspage.io,
+                        or will be given it by a deferred write, false if the
+                        component could not be read or updated.
         incident_result: An instance of
                         [IncidentResult][pi_monitor.statuspage_io.IncidentResult].
 
     """
 
     status_changed: bool = False
+    applied: bool = True
     incident_result: IncidentResult = IncidentResult()
 
     def __init__(self):
+        self.applied = True
         self.incident_result = IncidentResult()
 
 
@@ -74,13 +83,29 @@ class StatusPageOperator:
         client: An instance of
                 [StatusPageClient][pi_monitor.statuspage_io_client.StatusPageClient],
                 built from the configuration values provided.
+        cache: An instance of
+                [ComponentStatusCache][pi_monitor.statuspage_cache.ComponentStatusCache]
+                which holds the last known status of each component.
 
     """
 
+    COMPONENT_STATUS = {
+        OpLevel.Operational: "operational",
+        OpLevel.Degraded: "degraded_performance",
+        OpLevel.Partial_Outage: "partial_outage",
+        OpLevel.Full_Outage: "major_outage",
+    }
+
     config: StatusPageSettings = StatusPageSettings()
     client: StatusPageClient
+    cache: ComponentStatusCache
+    write_behind_window: float
 
-    def __init__(self, status_page_config: StatusPageSettings):
+    def __init__(
+        self,
+        status_page_config: StatusPageSettings,
+        clock: Callable[[], float] = time.monotonic,
+    ):
         """Constructor
 
         Initialize the instance using the provided
@@ -91,7 +116,32 @@ class StatusPageOperator:
             raise ValueError("No configuration provided")
 
         self.config = status_page_config
-        self.client = StatusPageClient(self.config.api_key, self.config.page_id)
+        self.client = StatusPageClient(
+            self.config.api_key,
+            self.config.page_id,
+            self.config.max_retries,
+            self.config.backoff_factor,
+            self.config.rate_limit,
+            self.config.rate_burst,
+            self.config.connect_timeout,
+            self.config.read_timeout,
+            self.config.base_url,
+            self.config.max_retry_after,
+        )
+        self.cache = ComponentStatusCache(self.config.cache_ttl)
+        self.cache_file = self.config.cache_file
+        if self.cache_file:
+            self.cache.load(self.cache_file)
+        self._snapshot: Dict[str, str] = None
+        self._snapshot_time = 0.0
+        self._cycles = 0
+        self._cycle_lock = threading.Lock()
+        self._incident_index: IncidentIndex = None
+        self._incident_lock = threading.Lock()
+        self.write_behind_window = self.config.write_behind_window
+        self._clock = clock
+        self._pending: Dict[str, Tuple[OpLevel, Incident, float]] = {}
+        self._pending_lock = threading.Lock()
 
     def is_configured(self) -> bool:
         """Validate configuration data
@@ -101,6 +151,85 @@ class StatusPageOperator:
         """
         return self.config.api_key != ""
 
+    def begin_cycle(self, component_ids: Iterable[str] = None):
+        """Begin a cycle of health checks
+
+        Retrieves every component on the page with a single request, so that
+        status changes during the cycle are decided without reading each
+        component individually.  If the request fails, components are read
+        individually as needed.
+
+        When every component updated in the cycle has a fresh cached status, the
+        request is skipped and the cached statuses are used instead.
+
+        Unresolved incidents are read at most once per cycle, the first time a
+        status change needs them, and shared by every status change in the
+        cycle.
+
+        Cycles may overlap, such as when each check of a daemon runs on its own.
+        A cycle which begins while others are running shares their snapshot and
+        unresolved incidents, as long as the snapshot is younger than `cache_ttl`.
+        Every call must be matched by a call to `end_cycle`.
+
+        Args:
+            component_ids: The IDs of the components updated in the cycle, or
+                `None` if they are not known.
+        """
+        with self._cycle_lock:
+            self._cycles += 1
+            if (
+                self._snapshot is not None
+                and self._clock() - self._snapshot_time < self.cache.ttl
+            ):
+                logger.debug("Using the snapshot of a running cycle")
+                return
+
+            if component_ids is not None and all(
+                self.cache.get(component_id) is not None
+                for component_id in component_ids
+            ):
+                logger.debug("Using cached component statuses")
+                self._snapshot = None
+                return
+
+            with self._incident_lock:
+                self._incident_index = None
+            components = self.client.get_components()
+            if components is None:
+                logger.warning("Failed to retrieve components")
+                self._snapshot = None
+                return
+
+            snapshot = {}
+            for component in components:
+                snapshot[component.id] = component.status
+                self.cache.set(component.id, component.status)
+            logger.debug("Retrieved %d components", len(snapshot))
+            self._snapshot = snapshot
+            self._snapshot_time = self._clock()
+
+    def end_cycle(self):
+        """End a cycle of health checks
+
+        When no other cycle is running, discards the component snapshot and
+        incident index.
+        """
+        with self._cycle_lock:
+            self._cycles = max(self._cycles - 1, 0)
+            if self._cycles > 0:
+                return
+            self._snapshot = None
+            with self._incident_lock:
+                self._incident_index = None
+
+    def save_cache(self):
+        """Save cached component statuses
+
+        Writes the component status cache to the configured `cache_file`, if any.
+        """
+        if self.cache_file:
+            self.cache.save(self.cache_file)
+
     def update_component_status(
         self, component_id: str, op_level: OpLevel, incident_details: Incident = {}
     ) -> StatusResult:
@@ -112,10 +241,21 @@ class StatusPageOperator:
         statuspage.io status is not, the component's status will be changed to
         `operational`, and any open incidents for that component will be resolved.
 
-        If the incoming `op_level` is any other value and the statuspage.io status is
-        operational, the component's status will be changed to `major_outage` and an
-        incident will be created using the provided `incident_details`
+        If the incoming `op_level` is any other value and the statuspage.io status
+        differs, the component's status will be changed to the matching status in
+        `COMPONENT_STATUS`, such as `degraded_performance` or `major_outage`, and an
+        incident will be created using the provided `incident_details` if none is
+        open for the component.
+
+        During a cycle, the component's status is taken from the snapshot read by
+        `begin_cycle`.  Otherwise, the component is only read from statuspage.io
+        when its cached status has expired, or when the cached status indicates
+        that a change is needed.
 
+        If a `write_behind_window` is configured, the status is not applied
+        immediately.  It is held for the window, replacing any earlier status for
+        the same component, and only the final status is applied by
+        `flush_pending`.  In this case, the returned result is always unchanged.
 
         Args:
             component_id: The component ID to check
@@ -128,34 +268,131 @@ class StatusPageOperator:
         Returns:
             An instance of [StatusResult][pi_monitor.statuspage_io.StatusResult]
         """
+        if self.write_behind_window > 0:
+            self._defer_component_status(component_id, op_level, incident_details)
+            return StatusResult()
 
-        if op_level == OpLevel.Operational:
-            component_status = "operational"
-        else:
-            component_status = "major_outage"
+        return self._apply_component_status(component_id, op_level, incident_details)
 
-        result = StatusResult()
-        component = self.client.get_component(component_id)
-        if component is None:
-            logger.warning("Failed to retrieve component %s", component_id)
-            return result
+    def flush_pending(self, force: bool = False) -> List[StatusResult]:
+        """Apply deferred status changes
+
+        Applies the final status of each component whose `write_behind_window`
+        has elapsed.  Components whose final status matches their statuspage.io
+        status are left untouched, so changes which were reverted within the
+        window never reach statuspage.io.  A status which could not be applied is
+        held again, and retried by the next flush.
+
+        Args:
+            force: True to apply every deferred status, regardless of the window.
+
+        Returns:
+            A list of [StatusResult][pi_monitor.statuspage_io.StatusResult] for
+            the applied statuses.
+        """
+        now = self._clock()
+        with self._pending_lock:
+            due = [
+                (component_id, op_level, incident_details)
+                for component_id, (
+                    op_level,
+                    incident_details,
+                    first_seen,
+                ) in self._pending.items()
+                if force or now - first_seen >= self.write_behind_window
+            ]
+            for component_id, _, _ in due:
+                del self._pending[component_id]
+
+        results = []
+        for component_id, op_level, incident_details in due:
+            result = self._apply_component_status(
+                component_id, op_level, incident_details
+            )
+            if not result.applied:
+                self._retry_component_status(component_id, op_level, incident_details)
+            results.append(result)
+        return results
+
+    def _defer_component_status(
+        self, component_id: str, op_level: OpLevel, incident_details: Incident
+    ):
+        with self._pending_lock:
+            pending = self._pending.get(component_id)
+            first_seen = pending[2] if pending is not None else self._clock()
+            if pending is not None and pending[0] != op_level:
+                logger.debug(
+                    "Superseding pending status for %s: %s",
+                    component_id,
+                    op_level.name,
+                )
+            self._pending[component_id] = (op_level, incident_details, first_seen)
+
+    def _retry_component_status(
+        self, component_id: str, op_level: OpLevel, incident_details: Incident
+    ):
+        # Due at the next flush, unless a newer status has been held meanwhile
+        with self._pending_lock:
+            self._pending.setdefault(
+                component_id,
+                (op_level, incident_details, self._clock() - self.write_behind_window),
+            )
 
-        if (
-            component.status != component_status
-            and component.status != "under_maintenance"
-        ):
+    def _apply_component_status(
+        self, component_id: str, op_level: OpLevel, incident_details: Incident
+    ) -> StatusResult:
+        component_status = self.COMPONENT_STATUS[op_level]
+
+        result = StatusResult()
+        current_status = self._get_snapshot_status(component_id)
+        if current_status is None:
+            current_status = self.cache.get(component_id)
+            if current_status is None or self._needs_change(
+                current_status, component_status
+            ):
+                current_status = self._get_component_status(component_id)
+                if current_status is None:
+                    logger.warning("Failed to retrieve component %s", component_id)
+                    result.applied = False
+                    return result
+
+        if self._needs_change(current_status, component_status):
             result.status_changed = True
             logger.info(
-                "Changing status from %s to %s", component.status, component_status
+                "Changing status from %s to %s", current_status, component_status
             )
-            self._update_component_status(component_id, component_status)
+            result.applied = self._update_component_status(
+                component_id, component_status
+            )
+            if not result.applied:
+                # Incidents follow the status, once it is applied by a retry
+                return result
             result.incident_result = self._process_incident_on_status_change(
                 component_id, component_status, incident_details
             )
 
         return result
 
-    def _update_component_status(self, component_id, new_component_status):
+    def _needs_change(self, current_status: str, new_component_status: str) -> bool:
+        return (
+            current_status != new_component_status
+            and current_status != "under_maintenance"
+        )
+
+    def _get_snapshot_status(self, component_id: str) -> str:
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        return snapshot.get(component_id)
+
+    def _get_component_status(self, component_id: str) -> str:
+        component = self.client.get_component(component_id)
+        status = getattr(component, "status", None)
+        if status is not None:
+            self.cache.set(component_id, status)
+        return status
+
+    def _update_component_status(self, component_id, new_component_status) -> bool:
         logger.debug(
             "Setting component status to %s: %s", new_component_status, component_id
         )
@@ -163,30 +400,43 @@ class StatusPageOperator:
         component = self.client.update_component(component_id, payload)
         if component is None:
             logger.warning("Failed to update component %s", component_id)
-
-    def _filter_set(self, incidents, component_id):
-        def iterator_func(incident):
-            for comp in incident.components:
-                if comp.id == component_id:
-                    return True
+            self.cache.invalidate(component_id)
             return False
 
-        return filter(iterator_func, incidents)
-
-    def _get_associated_incident(self, component_id):
-        result = self.client.get_unresolved_incidents()
-        if result is None:
+        self.cache.set(component_id, new_component_status)
+        snapshot = self._snapshot
+        if snapshot is not None:
+            snapshot[component_id] = new_component_status
+        return True
+
+    def _get_incident_index(self) -> IncidentIndex:
+        with self._incident_lock:
+            if self._cycles > 0 and self._incident_index is not None:
+                return self._incident_index
+
+            incidents = self.client.get_unresolved_incidents()
+            if not isinstance(incidents, list):
+                logger.warning("Failed to retrieve unresolved incidents")
+                return None
+            index = IncidentIndex(incidents)
+            if self._cycles > 0:
+                self._incident_index = index
+            return index
+
+    def _get_associated_incident(self, component_id) -> List[object]:
+        index = self._get_incident_index()
+        if index is None:
             return []
-        return list(self._filter_set(result, component_id))
+        return index.get(component_id)
 
     def _process_incident_on_status_change(
         self, component_id: str, new_component_status: str, incident_details: Incident
     ) -> IncidentResult:
         """Create or Close incidents based on the incoming component status
 
-        For now, if it's operational, close open incidents, and if it's not operational
-        , create a new ticket if one isn't already open for this component.
-        Future state will involve more detail around outage and maintenance
+        If it's operational, close open incidents, and if it's degraded or
+        unavailable, create a new incident if one isn't already open for this
+        component.
         """
         incident_result = IncidentResult()
         incident_result.incident = incident_details
@@ -199,23 +449,29 @@ class StatusPageOperator:
 
         if new_component_status == "operational" and asscociated_incident_count > 0:
             for incident in associated_incidents:
-                self._close_incident(incident.id)
-                incident_result.incident_resolved = True
+                if self._close_incident(incident.id):
+                    incident_result.incident_resolved = True
 
-        elif new_component_status == "major_outage" and asscociated_incident_count == 0:
-            self._create_incident(component_id, new_component_status, incident_details)
-            incident_result.incident_created = True
+        elif new_component_status != "operational" and asscociated_incident_count == 0:
+            incident_result.incident_created = self._create_incident(
+                component_id, new_component_status, incident_details
+            )
 
         return incident_result
 
-    def _close_incident(self, incident_id):
+    def _close_incident(self, incident_id) -> bool:
         logger.info("Closing incident %s", incident_id)
         payload = {"incident": {"status": "resolved"}}
-        self.client.update_incident(incident_id, payload)
+        result = self.client.update_incident(incident_id, payload)
+        if getattr(result, "id", None) is None:
+            logger.warning("Failed to close incident %s", incident_id)
+            return False
+        self._update_incident_index(lambda index: index.remove(incident_id))
+        return True
 
     def _create_incident(
         self, component_id, new_component_status: str, incident_details: Incident
-    ):
+    ) -> bool:
         logger.info(
             "Creating incident: Component %s - New Component Status %s",
             component_id,
@@ -230,4 +486,14 @@ class StatusPageOperator:
                 "components": {component_id: new_component_status},
             }
         }
-        self.client.create_incident(payload)
+        result = self.client.create_incident(payload)
+        if getattr(result, "id", None) is None:
+            logger.warning("Failed to create incident for component %s", component_id)
+            return False
+        self._update_incident_index(lambda index: index.add(result, [component_id]))
+        return True
+
+    def _update_incident_index(self, update):
+        with self._incident_lock:
+            if self._incident_index is not None:
+                update(self._incident_index)
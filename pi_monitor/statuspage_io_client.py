@@ -2,18 +2,110 @@ import json
 from types import SimpleNamespace
 from typing import Dict, List
 import logging
-import requests
+from urllib3.exceptions import MaxRetryError, ResponseError
+from urllib3.util.retry import Retry
+from .ratelimit import PriorityWriteQueue, TokenBucket
+from .transport import PooledSession
 
 logger = logging.getLogger(__name__)
 
 
+class StatusPageRetry(Retry):
+    """StatusPageRetry Class
+
+    The retry policy for requests to Statuspage.io.  Responses with a status in
+    `status_forcelist` are retried for idempotent methods, with exponential
+    backoff and respecting any `Retry-After` header.  A `429 Too Many Requests`
+    response means that the request was not processed, so it is retried for
+    every method, including `POST`.
+
+    A request which must wait longer than `max_retry_after` seconds, as asked by a
+    `Retry-After` header, is not retried, so that a long wait does not hold up
+    every other request to statuspage.io.  The response is returned, or raised
+    with `raise_on_status`, as when the retries are exhausted.
+
+    Each retry is another request to the API, so it waits for a token from the
+    `rate_limiter`, as the first attempt did.
+
+    Attributes:
+        max_retry_after: The longest `Retry-After`, in seconds, which is waited
+            for, or `None` for no limit.
+        rate_limiter: The [TokenBucket][pi_monitor.ratelimit.TokenBucket] which
+            each retry takes a token from, if any.
+    """
+
+    DEFAULT_MAX_RETRY_AFTER = 10
+
+    def __init__(
+        self,
+        *args,
+        max_retry_after: float = DEFAULT_MAX_RETRY_AFTER,
+        rate_limiter: TokenBucket = None,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.max_retry_after = max_retry_after
+        self.rate_limiter = rate_limiter
+
+    def new(self, **kwargs) -> "StatusPageRetry":
+        kwargs.setdefault("max_retry_after", self.max_retry_after)
+        kwargs.setdefault("rate_limiter", self.rate_limiter)
+        return super().new(**kwargs)
+
+    def sleep(self, response=None):
+        super().sleep(response)
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
+    def increment(self, method=None, url=None, response=None, *args, **kwargs):
+        if response is not None and self.max_retry_after is not None:
+            retry_after = self.get_retry_after(response)
+            if retry_after is not None and retry_after > self.max_retry_after:
+                raise MaxRetryError(
+                    kwargs.get("_pool"),
+                    url,
+                    ResponseError(
+                        f"Retry-After of {retry_after:g}s is longer than "
+                        f"{self.max_retry_after:g}s"
+                    ),
+                )
+        return super().increment(method, url, response, *args, **kwargs)
+
+    def is_retry(
+        self, method: str, status_code: int, has_retry_after: bool = False
+    ) -> bool:
+        if status_code == 429:
+            return bool(self.total)
+        return super().is_retry(method, status_code, has_retry_after)
+
+
 class StatusPageClient:
     """StatusPageClient Class
 
     The StatusPageClient class provides methods for interacting with the
     [Statuspage.io's APIs](https://developer.statuspage.io/)
 
+    All requests are sent through a single keep-alive session, which carries the
+    authorization headers and retries rate-limited and failed requests according
+    to a [StatusPageRetry][pi_monitor.statuspage_io_client.StatusPageRetry]
+    policy.
+
+    Every request, and every retry of it, waits for a token from a shared
+    [TokenBucket][pi_monitor.ratelimit.TokenBucket], so concurrent callers stay
+    within the API rate limit.  Writes are sent one at a time through a
+    [PriorityWriteQueue][pi_monitor.ratelimit.PriorityWriteQueue]: incident
+    creation first, then component updates, then incident updates such as
+    resolution.
+
     Attributes:
+        session: The [PooledSession][pi_monitor.transport.PooledSession] used for
+                all requests
+        rate_limiter: The [TokenBucket][pi_monitor.ratelimit.TokenBucket] shared by
+                all requests
+        write_queue: The [PriorityWriteQueue][pi_monitor.ratelimit.PriorityWriteQueue]
+                used for all writes
+        timeout: The connect and read timeouts, in seconds, for every request
+        STATUS_PAGE_BASE_URL: The URL of the pages API
         component_status_list: A list of valid component status codes for StatusPage.io
         incident_status_list: A list of valid incident status codes for live incidents
                                 in StatusPage.io
@@ -24,6 +116,11 @@ class StatusPageClient:
     AUTH_HEADER = "Authorization"
     STATUS_PAGE_BASE_URL = "https://api.statuspage.io/v1/pages"
     CLIENT_ERROR_MESSAGE = "Request failed exception:"
+    RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+    RETRY_METHODS = Retry.DEFAULT_ALLOWED_METHODS | {"PATCH"}
+    PRIORITY_CREATE_INCIDENT = 0
+    PRIORITY_UPDATE_COMPONENT = 1
+    PRIORITY_UPDATE_INCIDENT = 2
 
     component_status_list: List[str] = [
         "operational",
@@ -45,9 +142,58 @@ class StatusPageClient:
         "complete",
     ]
 
-    def __init__(self, api_key: str, page_id: str):
+    def __init__(
+        self,
+        api_key: str,
+        page_id: str,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        rate_limit: float = 1.0,
+        rate_burst: int = 5,
+        connect_timeout: float = 5,
+        read_timeout: float = 30,
+        base_url: str = None,
+        max_retry_after: float = StatusPageRetry.DEFAULT_MAX_RETRY_AFTER,
+    ):
+        """Constructor
+
+        Args:
+            api_key: The API Key to access statuspage.io
+            page_id: Your PageId for statuspage.io
+            max_retries: The maximum number of retries for a request
+            backoff_factor: The backoff factor, in seconds, between retries
+            rate_limit: The maximum sustained number of requests per second
+            rate_burst: The maximum number of requests sent in a burst
+            connect_timeout: The number of seconds to wait for a connection
+            read_timeout: The number of seconds to wait for data
+            base_url: The URL of the pages API, such as a local stand-in for
+                testing, or `None` for statuspage.io
+            max_retry_after: The longest `Retry-After`, in seconds, to wait for
+                before a retry.  Requests which must wait longer are not retried.
+        """
         self.api_key = api_key
         self.page_id = page_id
+        if base_url:
+            self.STATUS_PAGE_BASE_URL = base_url.rstrip("/")
+        self.rate_limiter = TokenBucket(rate_limit, rate_burst)
+        retry = StatusPageRetry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=self.RETRY_STATUS_CODES,
+            allowed_methods=self.RETRY_METHODS,
+            raise_on_status=False,
+            max_retry_after=max_retry_after,
+            rate_limiter=self.rate_limiter,
+        )
+        self.session = PooledSession(max_retries=retry)
+        self.session.headers.update(self._get_headers())
+        self.write_queue = PriorityWriteQueue()
+        self.timeout = (connect_timeout, read_timeout)
+
+    def close(self):
+        """Complete any queued writes and close the session"""
+        self.write_queue.close()
+        self.session.close()
 
     def _get_headers(self) -> Dict[str, str]:
         """Retrieve headers for all requests
@@ -64,6 +210,26 @@ class StatusPageClient:
             "Content-Type": "application/json",
         }
 
+    def get_components(self) -> object:
+        """Retrieve All Components
+
+        Retrieve the current information for every component on the page.
+
+        Returns:
+            A list of SimpleNamespace objects created from the JSON return.  Object
+                representation can be found in the
+                [docs](https://developer.statuspage.io/#operation/getPagesPageIdComponents).
+
+        """
+        components_url = f"{self.STATUS_PAGE_BASE_URL}/{self.page_id}/components"
+        logger.debug("Retrieving components from StatusPage: %s", components_url)
+        try:
+            components = self._read(components_url)
+            components.raise_for_status()
+            return components.json(object_hook=lambda d: SimpleNamespace(**d))
+        except Exception as e:
+            self._handle_exception(e)
+
     def get_component(self, component_id: str) -> object:
         """Retrieve Component Information
 
@@ -73,8 +239,8 @@ class StatusPageClient:
             component_id: The id of the component to retrieve.
 
         Returns:
-            A SimpleNamespace object created from the JSON return.  Object
-                representation can be found in the
+            A SimpleNamespace object created from the JSON return, or `None` if the
+                request failed.  Object representation can be found in the
                 [docs](https://developer.statuspage.io/#operation/getPagesPageIdComponentsComponentId).
 
         """
@@ -83,11 +249,12 @@ class StatusPageClient:
         )
         logger.debug("Retrieving component from StatusPage: %s", component_url)
         try:
-            component = requests.get(component_url, headers=self._get_headers())
+            component = self._read(component_url)
             logger.debug("Component Response: %s", component.text)
 
             if component.status_code == 404:
                 logger.warning("Component %s not found", component_id)
+            component.raise_for_status()
 
             return component.json(object_hook=lambda d: SimpleNamespace(**d))
         except Exception as e:
@@ -106,8 +273,9 @@ class StatusPageClient:
                 [docs](https://developer.statuspage.io/#operation/putPagesPageIdComponentsComponentId).
 
         Returns:
-            A SimpleNamespace object created from the JSON return.  Object
-                representation can be found in the
+            A SimpleNamespace object created from the JSON return, or `None` if the
+                component was not updated.  Object representation can be found in
+                the
                 [docs](https://developer.statuspage.io/#operation/putPagesPageIdComponentsComponentId).
 
         """
@@ -116,9 +284,11 @@ class StatusPageClient:
         )
         logger.debug("Updating component %s: %s", component_id, payload)
         try:
-            r = requests.put(
-                component_url, headers=self._get_headers(), data=json.dumps(payload)
+            r = self._write(
+                self.PRIORITY_UPDATE_COMPONENT, "PUT", component_url, payload
             )
+            # An error, such as a rate limit, also has a JSON body
+            r.raise_for_status()
             return r.json(object_hook=lambda d: SimpleNamespace(**d))
         except Exception as e:
             self._handle_exception(e)
@@ -129,8 +299,8 @@ class StatusPageClient:
         Retrieve all the current unresolved incidents.
 
         Returns:
-            A SimpleNamespace object created from the JSON return.  Object
-                representation can be found in the
+            A SimpleNamespace object created from the JSON return, or `None` if the
+                request failed.  Object representation can be found in the
                 [docs](https://developer.statuspage.io/#operation/getPagesPageIdIncidentsUnresolved).
 
         """
@@ -139,9 +309,8 @@ class StatusPageClient:
             f"{self.STATUS_PAGE_BASE_URL}/{self.page_id}/incidents/unresolved"
         )
         try:
-            unresolved_incidents_response = requests.get(
-                unresolved_incidents_url, headers=self._get_headers()
-            )
+            unresolved_incidents_response = self._read(unresolved_incidents_url)
+            unresolved_incidents_response.raise_for_status()
             result = unresolved_incidents_response.json(
                 object_hook=lambda d: SimpleNamespace(**d)
             )
@@ -161,17 +330,18 @@ class StatusPageClient:
                 [docs](https://developer.statuspage.io/#operation/postPagesPageIdIncidents).
 
         Returns:
-            A SimpleNamespace object created from the JSON return.  Object
-                representation can be found in the
+            A SimpleNamespace object created from the JSON return, or `None` if the
+                request failed.  Object representation can be found in the
                 [docs](https://developer.statuspage.io/#operation/postPagesPageIdIncidents).
 
         """
         incident_url = f"{self.STATUS_PAGE_BASE_URL}/{self.page_id}/incidents"
         logger.info("Creating incident: %s", incident_url)
         try:
-            r = requests.post(
-                incident_url, headers=self._get_headers(), data=json.dumps(payload)
+            r = self._write(
+                self.PRIORITY_CREATE_INCIDENT, "POST", incident_url, payload
             )
+            r.raise_for_status()
             result_object = r.json(object_hook=lambda d: SimpleNamespace(**d))
             logger.debug("Create Incident Response: %s", result_object)
             return result_object
@@ -191,8 +361,8 @@ class StatusPageClient:
                 [docs](https://developer.statuspage.io/#operation/patchPagesPageIdIncidentsIncidentId).
 
         Returns:
-            A SimpleNamespace object created from the JSON return.  Object
-                representation can be found in the
+            A SimpleNamespace object created from the JSON return, or `None` if the
+                request failed.  Object representation can be found in the
                 [docs](https://developer.statuspage.io/#operation/patchPagesPageIdIncidentsIncidentId).
 
         """
@@ -201,14 +371,29 @@ class StatusPageClient:
         )
         logger.info("Updating incident %s: %s", incident_url, incident_id)
         try:
-            r = requests.patch(
-                incident_url, headers=self._get_headers(), data=json.dumps(payload)
+            r = self._write(
+                self.PRIORITY_UPDATE_INCIDENT, "PATCH", incident_url, payload
             )
+            r.raise_for_status()
             result_object = r.json(object_hook=lambda d: SimpleNamespace(**d))
             logger.debug("Update Incident Response: %s", result_object)
             return result_object
         except Exception as e:
             self._handle_exception(e)
 
+    def _read(self, url: str):
+        self.rate_limiter.acquire()
+        return self.session.get(url, timeout=self.timeout)
+
+    def _write(self, priority: int, method: str, url: str, payload: object):
+        future = self.write_queue.submit(
+            priority, self._send, method, url, json.dumps(payload)
+        )
+        return future.result()
+
+    def _send(self, method: str, url: str, data: str):
+        self.rate_limiter.acquire()
+        return self.session.request(method, url, data=data, timeout=self.timeout)
+
     def _handle_exception(self, e: Exception):
         logger.error("%s %s", self.CLIENT_ERROR_MESSAGE, e)
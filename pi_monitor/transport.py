@@ -0,0 +1,386 @@
+# -*- coding: utf-8 -*-
+"""
+
+Module for shared HTTP transport.
+
+This module provides a `requests` Session with per-host keep-alive connection
+pools, counters to track how often connections are reused, a breakdown of
+where the time of each request is spent, and a limit on the time to receive a
+whole response.
+
+"""
+
+import http.client
+import io
+import logging
+import socket
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError
+from urllib3.util.connection import allowed_gai_family
+from .configuration import HttpSettings
+
+logger = logging.getLogger(__name__)
+
+# The time.monotonic() deadline of the request being sent by PooledSession on
+# each thread, if it has a time limit
+_deadline = threading.local()
+
+
+class ConnectionStats:
+    """ConnectionStats Class
+
+    Thread-safe counters for requests sent through a
+    [PooledSession][pi_monitor.transport.PooledSession].
+
+    Attributes:
+        requests: The number of requests sent.
+        new_connections: The number of new connections opened.
+    """
+
+    requests: int
+    new_connections: int
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+
+    @property
+    def reused_connections(self) -> int:
+        """The number of requests sent over an existing connection"""
+        return max(self.requests - self.new_connections, 0)
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_new_connection(self):
+        with self._lock:
+            self.new_connections += 1
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.new_connections = 0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.requests} requests, {self.new_connections} new connections, "
+            f"{self.reused_connections} reused"
+        )
+
+
+class RequestTimings:
+    """RequestTimings Class
+
+    The time, in seconds, spent in each phase of a request.  Phases which did not
+    happen, such as DNS resolution on a reused connection, are 0.  Times are
+    measured with a monotonic clock.
+
+    Attributes:
+        dns: The time to resolve the host name.
+        connect: The time to open the TCP connection.
+        tls: The time for the TLS handshake.
+        ttfb: The time from sending the request to receiving the response headers.
+        transfer: The time to read the response body.
+        total: The time for the whole request, including reading the body.
+        reused: Whether or not the request was sent over an existing connection.
+    """
+
+    dns: float
+    connect: float
+    tls: float
+    ttfb: float
+    transfer: float
+    total: float
+    reused: bool
+
+    def __init__(self):
+        self.dns = 0.0
+        self.connect = 0.0
+        self.tls = 0.0
+        self.ttfb = 0.0
+        self.transfer = 0.0
+        self.total = 0.0
+        self.reused = True
+
+    def __str__(self) -> str:
+        return (
+            f"dns {self.dns * 1000:.1f}ms, connect {self.connect * 1000:.1f}ms, "
+            f"tls {self.tls * 1000:.1f}ms, ttfb {self.ttfb * 1000:.1f}ms, "
+            f"transfer {self.transfer * 1000:.1f}ms, total {self.total * 1000:.1f}ms"
+            + (", reused connection" if self.reused else "")
+        )
+
+
+class _DeadlineReader(io.RawIOBase):
+    """Reads from a socket until a deadline, then fails with a timeout.
+
+    Each read waits for no longer than the socket's timeout or the time left, so
+    a server which sends a response a little at a time cannot outlast the
+    deadline."""
+
+    def __init__(self, sock: socket.socket, deadline: float):
+        super().__init__()
+        self._sock = sock
+        self._file = sock.makefile("rb", buffering=0)
+        self._deadline = deadline
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        remaining = self._deadline - time.monotonic()
+        if remaining <= 0:
+            raise socket.timeout("The response was not received in time")
+        timeout = self._sock.gettimeout()
+        self._sock.settimeout(remaining if timeout is None else min(timeout, remaining))
+        try:
+            return self._file.readinto(buffer)
+        finally:
+            if self._sock.fileno() != -1:
+                self._sock.settimeout(timeout)
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+class _DeadlineSocket:
+    """Stands in for the socket given to `http.client.HTTPResponse`, which only
+    uses it to make the file which the response is read from."""
+
+    def __init__(self, sock: socket.socket, deadline: float):
+        self._sock = sock
+        self._deadline = deadline
+
+    def makefile(self, *args, **kwargs):
+        return io.BufferedReader(_DeadlineReader(self._sock, self._deadline))
+
+
+class _TimedConnectionMixin:
+    """Records [RequestTimings][pi_monitor.transport.RequestTimings] for each
+    request, and attaches them to the response as `timings`, and counts each
+    connection opened in `stats`.  Responses to requests with a deadline are read
+    through a `_DeadlineReader`."""
+
+    clock = time.perf_counter
+    stats: ConnectionStats = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._deadline: float = None
+        self._connect_timings: RequestTimings = None
+        self._request_timings: RequestTimings = None
+        self._request_sent = 0.0
+
+    def _new_conn(self):
+        timings = self._connect_timings
+        started = self.clock()
+        host = self._dns_host
+        try:
+            addresses = socket.getaddrinfo(
+                host, self.port, allowed_gai_family(), socket.SOCK_STREAM
+            )
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        resolved = self.clock()
+        timings.dns = resolved - started
+
+        # Connect to the resolved addresses, so the name is not resolved again
+        error = None
+        try:
+            for address in dict.fromkeys(info[4][0] for info in addresses):
+                self._dns_host = address
+                try:
+                    sock = super()._new_conn()
+                    break
+                except ConnectTimeoutError as e:
+                    # Includes NewConnectionError, such as a refused connection
+                    error = e
+            else:
+                raise error
+        finally:
+            self._dns_host = host
+        timings.connect = self.clock() - resolved
+        return sock
+
+    def connect(self):
+        # Also called to reopen a pooled connection which the server closed
+        if self.stats is not None:
+            self.stats.record_new_connection()
+        timings = self._connect_timings = RequestTimings()
+        timings.reused = False
+        started = self.clock()
+        super().connect()
+        if isinstance(self, HTTPSConnection):
+            timings.tls = max(
+                self.clock() - started - timings.dns - timings.connect, 0.0
+            )
+
+    def request(self, method, url, *args, **kwargs):
+        timings = RequestTimings()
+        self._deadline = getattr(_deadline, "value", None)
+        try:
+            super().request(method, url, *args, **kwargs)
+        finally:
+            # A new connection may be opened before or during the request
+            if self._connect_timings is not None:
+                timings = self._connect_timings
+                self._connect_timings = None
+            self._request_timings = timings
+            self._request_sent = self.clock()
+
+    def getresponse(self):
+        response = super().getresponse()
+        timings = self._request_timings or RequestTimings()
+        timings.ttfb = self.clock() - self._request_sent
+        response.timings = timings
+        return response
+
+    def response_class(self, sock, *args, **kwargs):
+        if self._deadline is not None:
+            sock = _DeadlineSocket(sock, self._deadline)
+        return http.client.HTTPResponse(sock, *args, **kwargs)
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """PooledHTTPAdapter Class
+
+    An `HTTPAdapter` which records request and connection counts in the provided
+    [ConnectionStats][pi_monitor.transport.ConnectionStats].  Each urllib3
+    response carries the [RequestTimings][pi_monitor.transport.RequestTimings] of
+    its request as `timings`.
+
+    Attributes:
+        stats: The counters for this adapter.
+    """
+
+    CONNECTION_CLASSES = {"http": TimedHTTPConnection, "https": TimedHTTPSConnection}
+
+    stats: ConnectionStats
+
+    def __init__(self, stats: ConnectionStats, **kwargs):
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        super().init_poolmanager(connections, maxsize, block, **pool_kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: type(
+                pool_class.__name__,
+                (pool_class,),
+                {
+                    "ConnectionCls": type(
+                        self.CONNECTION_CLASSES[scheme].__name__,
+                        (self.CONNECTION_CLASSES[scheme],),
+                        {"stats": self.stats},
+                    )
+                },
+            )
+            for scheme, pool_class in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+    def send(self, request, **kwargs):
+        self.stats.record_request()
+        return super().send(request, **kwargs)
+
+
+class PooledSession(requests.Session):
+    """PooledSession Class
+
+    A `requests.Session` which keeps a pool of keep-alive connections per host,
+    so that repeated requests to the same host reuse an open connection instead
+    of paying for DNS resolution and a TLS handshake on every request.
+
+    Attributes:
+        stats: The [ConnectionStats][pi_monitor.transport.ConnectionStats] for
+                this session.
+    """
+
+    stats: ConnectionStats
+
+    def __init__(
+        self,
+        pool_connections: int = HttpSettings.pool_connections,
+        pool_maxsize: int = HttpSettings.pool_maxsize,
+        max_retries=0,
+    ):
+        """Constructor
+
+        Args:
+            pool_connections: The number of hosts to keep connection pools for.
+            pool_maxsize: The maximum number of connections to keep per host.
+            max_retries: The number of retries, or a `urllib3` `Retry` policy,
+                to apply to each request.  Defaults to no retries.
+        """
+        super().__init__()
+        self.stats = ConnectionStats()
+        adapter = PooledHTTPAdapter(
+            self.stats,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=max_retries,
+        )
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
+
+    @classmethod
+    def from_settings(cls, http_settings: HttpSettings, min_pool_maxsize: int = 0):
+        """Build a session from settings
+
+        Args:
+            http_settings: An instance of
+                [HttpSettings][pi_monitor.HttpSettings], or `None` to use defaults.
+            min_pool_maxsize: The minimum number of connections to keep per host,
+                used to make room for every concurrent check.
+
+        Returns:
+            A [PooledSession][pi_monitor.transport.PooledSession]
+        """
+        if http_settings is None:
+            http_settings = HttpSettings()
+        return cls(
+            http_settings.pool_connections,
+            max(http_settings.pool_maxsize, min_pool_maxsize),
+        )
+
+    def request(self, method, url, *args, time_limit: float = None, **kwargs):
+        """Send a request
+
+        Takes the arguments of `requests.Session.request`, and a time limit.
+        The read timeout limits each wait for data, so a server which sends a
+        response a little at a time can hold a request for much longer.  The
+        time limit also bounds such a response: reading it, including any
+        redirects and a streamed body, raises a read timeout once the limit has
+        passed.
+
+        Args:
+            method: The HTTP method.
+            url: The URL to request.
+            time_limit: The maximum number of seconds to receive the whole
+                response, or `None` for no limit.
+
+        Returns:
+            A `requests.Response`
+        """
+        if time_limit is None:
+            return super().request(method, url, *args, **kwargs)
+        previous = getattr(_deadline, "value", None)
+        _deadline.value = time.monotonic() + time_limit
+        try:
+            return super().request(method, url, *args, **kwargs)
+        finally:
+            _deadline.value = previous
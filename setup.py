@@ -23,7 +23,8 @@ setup(
     url="https://github.com/spydersoft-consulting/md_to_conf",
     classifiers=["Programming Language :: Python :: 3 :: Only"],
     py_modules=["pi_monitor"],
-    install_requires=["pyyaml", "requests", "coloredlogs", "sendgrid"],
+    install_requires=["pyyaml", "requests", "urllib3>=2", "coloredlogs", "sendgrid"],
+    extras_require={"asyncio": ["aiohttp>=3.9"]},
     entry_points="""
     [console_scripts]
     pi-monitor=pi_monitor:main
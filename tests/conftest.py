@@ -0,0 +1,47 @@
+import json
+import pytest
+from pi_monitor import NotificationSettings
+from pi_monitor.files import write_atomic
+
+
+class FakeClock:
+    # Only moves when a test moves it, or sleeps on it
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def email_settings():
+    settings = NotificationSettings()
+    settings.sms_email = "test@test.com"
+    settings.smtp_sender_id = "sender@test.com"
+    settings.smtp_sender_apikey = "apikey"
+    settings.smtp_url = "smtp.test.com"
+    settings.smtp_port = 587
+    return settings
+
+
+@pytest.fixture
+def write_config(tmp_path):
+    # Replaces the test's configuration file, as a deployment would, and returns
+    # its path
+    file = tmp_path / "monitor.config.json"
+
+    def write(config: dict) -> str:
+        write_atomic(str(file), json.dumps(config).encode())
+        return str(file)
+
+    return write
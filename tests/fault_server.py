@@ -0,0 +1,144 @@
+import socket
+import struct
+import threading
+from .local_server import LocalHandler, LocalServer
+
+TRICKLE_INTERVAL = 0.05
+
+
+class FaultHandler(LocalHandler):
+    """Serves a hostile response for each fault path.
+
+    - `/trickle-body`: a body sent one byte at a time, every `TRICKLE_INTERVAL`.
+    - `/trickle-headers`: headers sent one byte at a time, which never end.
+    - `/reset`: the connection is reset instead of sending a response.
+    - `/reset-body`: the connection is reset part way through the body.
+    - `/short-body`: the connection is closed part way through the body.
+    - `/huge-body`: a body with a `Content-Length` of a terabyte.
+    - `/infinite-body`: a chunked body which never ends.
+    - `/redirect-loop`: a redirect to itself.
+    - `/too-many-requests`: `429 Too Many Requests`, to retry in an hour.
+
+    Other paths are served from the routes, as by `LocalHandler`.
+    """
+
+    def do_GET(self):
+        fault = getattr(self, "fault_" + self.path.strip("/").replace("-", "_"), None)
+        if fault is None:
+            self._respond()
+            return
+        with self.server.lock:
+            self.server.requests.append((self.command, self.path))
+        try:
+            fault()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up
+            self.close_connection = True
+
+    def _send_headers(self, status, headers):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.flush()
+
+    def _trickle(self, data):
+        for byte in data:
+            if self.server.stopping.wait(TRICKLE_INTERVAL):
+                break
+            self.wfile.write(bytes([byte]))
+            self.wfile.flush()
+        self.close_connection = True
+
+    def _reset(self):
+        # Closing with a zero linger time sends a reset rather than a FIN
+        self.connection.setsockopt(
+            socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0)
+        )
+        self.rfile.close()
+        self.connection.close()
+        self.close_connection = True
+
+    def fault_trickle_body(self):
+        self._send_headers(200, {"Content-Length": "100000"})
+        self._trickle(b"x" * 100000)
+
+    def fault_trickle_headers(self):
+        self.wfile.write(b"HTTP/1.1 200 OK\r\n")
+        self._trickle(b"X-Padding: " + b"x" * 60000)
+
+    def fault_reset(self):
+        self._reset()
+
+    def fault_reset_body(self):
+        self._send_headers(200, {"Content-Length": "100000"})
+        self.wfile.write(b"x" * 1000)
+        self.wfile.flush()
+        self._reset()
+
+    def fault_short_body(self):
+        self._send_headers(200, {"Content-Length": "100000"})
+        self.wfile.write(b"x" * 1000)
+        self.close_connection = True
+
+    def fault_huge_body(self):
+        self._send_headers(200, {"Content-Length": str(2**40)})
+        chunk = b"x" * 65536
+        while not self.server.stopping.is_set():
+            self.wfile.write(chunk)
+
+    def fault_infinite_body(self):
+        self._send_headers(200, {"Transfer-Encoding": "chunked"})
+        chunk = b"%x\r\n%s\r\n" % (65536, b"x" * 65536)
+        while not self.server.stopping.is_set():
+            self.wfile.write(chunk)
+
+    def fault_redirect_loop(self):
+        self._send_headers(302, {"Location": "/redirect-loop", "Content-Length": "0"})
+
+    def fault_too_many_requests(self):
+        body = b"Too Many Requests"
+        self._send_headers(
+            429, {"Retry-After": "3600", "Content-Length": str(len(body))}
+        )
+        self.wfile.write(body)
+
+
+class FaultServer(LocalServer):
+    """A local server of hostile responses, served by `FaultHandler`.
+
+    Responses which never end stop when the server is closed.
+    """
+
+    def __init__(self, routes=None, tls=False):
+        super().__init__(routes, FaultHandler, tls)
+        self.httpd.stopping = threading.Event()
+
+    def url(self, fault: str) -> str:
+        return f"{self.base_url}/{fault}"
+
+    def __exit__(self, *exc_info):
+        self.httpd.stopping.set()
+        super().__exit__(*exc_info)
+
+
+class StalledListener:
+    """A socket which accepts connections, but never reads from or writes to
+    them, so a TLS handshake with it stalls."""
+
+    def __init__(self):
+        self.socket = socket.socket()
+        self.socket.bind(("127.0.0.1", 0))
+        # Connections wait in the backlog, as the listener never accepts them
+        self.socket.listen(16)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.socket.getsockname()
+        return f"https://{host}:{port}"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.socket.close()
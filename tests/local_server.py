@@ -0,0 +1,158 @@
+import asyncio
+import ssl
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+CERT_FILE = str(Path(__file__).parent / "testfiles" / "localhost.pem")
+KEY_FILE = str(Path(__file__).parent / "testfiles" / "localhost.key")
+
+
+class LocalHandler(BaseHTTPRequestHandler):
+    """Serves the responses configured in `server.routes`.
+
+    Each route maps a path to a `(status, body)` or `(status, body, headers)`
+    tuple, or to a list of them which are returned in order, repeating the last.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def _next_response(self):
+        with self.server.lock:
+            self.server.requests.append((self.command, self.path))
+            self.server.headers.append(dict(self.headers))
+            response = self.server.routes.get(self.path, (404, b"Not Found"))
+            if isinstance(response, list):
+                response = response.pop(0) if len(response) > 1 else response[0]
+        if len(response) == 2:
+            return response[0], response[1], {}
+        return response
+
+    def _respond(self):
+        length = int(self.headers.get("Content-Length", 0))
+        if length:
+            self.rfile.read(length)
+
+        status, body, headers = self._next_response()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    do_GET = _respond
+    do_HEAD = _respond
+    do_OPTIONS = _respond
+    do_PUT = _respond
+    do_POST = _respond
+    do_PATCH = _respond
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalHTTPServer(ThreadingHTTPServer):
+    # Room for many connections at once, as a full backlog drops the connection
+    # until the client retries, a second later
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class LocalServer:
+    """A keep-alive HTTP server on localhost, serving fixed responses by path.
+
+    With `tls`, the server uses the self-signed certificate in `CERT_FILE`.
+    """
+
+    def __init__(self, routes=None, handler=LocalHandler, tls=False):
+        self.tls = tls
+        self.httpd = LocalHTTPServer(("127.0.0.1", 0), handler)
+        if tls:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(CERT_FILE, KEY_FILE)
+            self.httpd.socket = context.wrap_socket(self.httpd.socket, server_side=True)
+        self.httpd.routes = routes or {}
+        self.httpd.requests = []
+        self.httpd.headers = []
+        self.httpd.lock = threading.Lock()
+        self.thread = threading.Thread(
+            target=self.httpd.serve_forever, args=(0.05,), daemon=True
+        )
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"{'https' if self.tls else 'http'}://{host}:{port}"
+
+    @property
+    def requests(self):
+        return self.httpd.requests
+
+    @property
+    def headers(self):
+        return self.httpd.headers
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class DelayedServer:
+    """A keep-alive HTTP server on localhost which answers every request with
+    `200 OK` after `delay` seconds.
+
+    It runs on an event loop of its own thread, so thousands of requests can wait
+    on it at once.
+    """
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.requests = 0
+        self.loop = asyncio.new_event_loop()
+        self.server = self.loop.run_until_complete(
+            asyncio.start_server(self._serve, "127.0.0.1", 0, backlog=4096)
+        )
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def _serve(self, reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                self.requests += 1
+                await asyncio.sleep(self.delay)
+                body = b"" if head.startswith(b"HEAD ") else b"OK"
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n" + body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.CancelledError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        async def stop():
+            self.server.close()
+            tasks = asyncio.all_tasks() - {asyncio.current_task()}
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(stop(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
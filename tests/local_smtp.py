@@ -0,0 +1,151 @@
+import base64
+import socketserver
+import ssl
+import threading
+from .local_server import CERT_FILE, KEY_FILE
+
+
+class LocalSmtpHandler(socketserver.StreamRequestHandler):
+    """A minimal SMTP session supporting `STARTTLS` and `AUTH PLAIN`.
+
+    Accepted messages are appended to `server.messages`, and each session is
+    counted in `server.connections`.
+    """
+
+    def setup(self):
+        super().setup()
+        self.tls = False
+        self.user = None
+        self.sent = 0
+        with self.server.lock:
+            self.server.connections += 1
+
+    def finish(self):
+        super().finish()
+        if self.tls:
+            self.request.close()
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+        self.wfile.flush()
+
+    def handle(self):
+        commands = {
+            "EHLO": self.hello,
+            "HELO": self.hello,
+            "STARTTLS": self.start_tls,
+            "AUTH": self.authenticate,
+            "MAIL": self.mail,
+            "RCPT": lambda argument: self.reply("250 OK"),
+            "RSET": lambda argument: self.reply("250 OK"),
+            "NOOP": lambda argument: self.reply("250 OK"),
+            "DATA": self.receive_data,
+        }
+        self.reply("220 localhost ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command, _, argument = line.decode().strip().partition(" ")
+            command = command.upper()
+            if command == "QUIT":
+                self.reply("221 Bye")
+                return
+            commands.get(command, self.not_implemented)(argument)
+            if self.server.close_after and self.sent >= self.server.close_after:
+                return
+
+    def hello(self, argument):
+        self.reply("250-localhost")
+        if not self.tls:
+            self.reply("250-STARTTLS")
+        self.reply("250 AUTH PLAIN")
+
+    def mail(self, argument):
+        if self.server.require_auth and self.user is None:
+            self.reply("530 Authentication required")
+        else:
+            self.reply("250 OK")
+
+    def not_implemented(self, argument):
+        self.reply("502 Not implemented")
+
+    def start_tls(self, argument):
+        self.reply("220 Ready to start TLS")
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(CERT_FILE, KEY_FILE)
+        self.request = context.wrap_socket(self.request, server_side=True)
+        self.rfile = self.request.makefile("rb")
+        self.wfile = self.request.makefile("wb")
+        self.tls = True
+
+    def authenticate(self, argument):
+        mechanism, _, response = argument.partition(" ")
+        if mechanism.upper() != "PLAIN":
+            self.reply("504 Unrecognized authentication type")
+            return
+        if not response:
+            self.reply("334 ")
+            response = self.rfile.readline().decode().strip()
+        _, user, password = base64.b64decode(response).decode().split("\0")
+        if (user, password) == self.server.credentials:
+            self.user = user
+            self.reply("235 Authentication successful")
+        else:
+            self.reply("535 Authentication failed")
+
+    def receive_data(self, argument):
+        self.reply("354 End data with <CR><LF>.<CR><LF>")
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if line in (b".\r\n", b""):
+                break
+            lines.append(line[1:] if line.startswith(b"..") else line)
+        with self.server.lock:
+            self.server.messages.append((self.user, b"".join(lines).decode()))
+        self.sent += 1
+        self.reply("250 OK")
+
+
+class LocalSmtpServer:
+    """An SMTP server on localhost, using the self-signed certificate in
+    `CERT_FILE` for `STARTTLS`.
+
+    With `close_after`, each session is closed after that many messages.
+    """
+
+    def __init__(self, credentials=("sender@test.com", "secret"), close_after=0):
+        self.server = socketserver.ThreadingTCPServer(
+            ("127.0.0.1", 0), LocalSmtpHandler
+        )
+        self.server.daemon_threads = True
+        self.server.credentials = credentials
+        self.server.require_auth = credentials is not None
+        self.server.close_after = close_after
+        self.server.messages = []
+        self.server.connections = 0
+        self.server.lock = threading.Lock()
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.05,), daemon=True
+        )
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    @property
+    def messages(self):
+        return self.server.messages
+
+    @property
+    def connections(self):
+        return self.server.connections
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
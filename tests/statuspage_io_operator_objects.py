@@ -5,6 +5,17 @@ class TestObjects:
     UPDATE_RETURN = SimpleNamespace(id="component-id")
     GET_WORKING_COMPONENT = SimpleNamespace(id="component-id", status="operational")
     GET_DOWN_COMPONENT = SimpleNamespace(id="component-id", status="major_outage")
+    COMPONENT_LIST = [
+        SimpleNamespace(id="component-id", status="operational"),
+        SimpleNamespace(id="component-id-2", status="operational"),
+    ]
+    DOWN_COMPONENT_LIST = [
+        SimpleNamespace(id="component-id", status="major_outage"),
+        SimpleNamespace(id="component-id-2", status="major_outage"),
+    ]
+    CREATED_INCIDENT = SimpleNamespace(id="incident-id-3")
+    RESOLVED_INCIDENT = SimpleNamespace(id="incident-id")
+    NOT_FOUND_COMPONENT = SimpleNamespace(error="Could not find component")
     EXISTING_INCIDENT = SimpleNamespace(
         id="incident-id",
         components=[
@@ -0,0 +1,175 @@
+from types import SimpleNamespace
+from pi_monitor import compile_assertions
+import pytest
+
+
+def evaluate(assertions, chunks, document=None, json_error=None):
+    evaluator = compile_assertions(assertions).evaluator()
+    body = ""
+    decided = False
+    for index, chunk in enumerate(chunks):
+        body += chunk
+        decided = evaluator.feed(body, index == len(chunks) - 1)
+        if decided:
+            break
+    return decided, evaluator.finish(document, json_error)
+
+
+def test_compile_empty():
+    assert compile_assertions([]) is None
+    assert compile_assertions(None) is None
+
+
+def test_compile_from_objects():
+    compiled = compile_assertions(
+        [SimpleNamespace(contains="UP"), SimpleNamespace(json_path="$.status")]
+    )
+
+    assert len(compiled.text_assertions) == 1
+    assert len(compiled.json_assertions) == 1
+
+
+def test_compile_invalid():
+    with pytest.raises(ValueError) as e:
+        compile_assertions([{"equals": "UP"}])
+
+    assert "expected contains, regex or json_path" in str(e.value)
+
+
+@pytest.mark.parametrize("entry", ["UP", 5, None, ["contains", "UP"]])
+def test_compile_not_an_object(entry):
+    with pytest.raises(ValueError) as e:
+        compile_assertions([entry])
+
+    assert str(e.value) == "assertion must be an object"
+
+
+def test_compile_more_than_one_kind():
+    with pytest.raises(ValueError) as e:
+        compile_assertions([{"contains": "a", "regex": "b"}])
+
+    assert "expected only one of contains, regex or json_path" in str(e.value)
+
+
+def test_compile_unknown_key():
+    with pytest.raises(ValueError) as e:
+        compile_assertions([{"contains": "UP", "equals": "UP"}])
+
+    assert "unknown key 'equals'" in str(e.value)
+
+
+def test_compile_invalid_json_path():
+    with pytest.raises(ValueError) as e:
+        compile_assertions([{"json_path": "$.status["}])
+
+    assert str(e.value) == "Invalid json_path '$.status[' at position 8"
+
+
+def test_contains_across_chunks():
+    decided, failure = evaluate([{"contains": "healthy"}], ["status: hea", "lthy"])
+
+    assert decided
+    assert failure is None
+
+
+def test_contains_stops_early():
+    evaluator = compile_assertions([{"contains": "UP"}]).evaluator()
+
+    assert evaluator.feed("UP and more")
+    assert evaluator.finish() is None
+
+
+def test_contains_failure():
+    decided, failure = evaluate([{"contains": "UP"}], ["DOWN", "DOWN"])
+
+    assert not decided
+    assert failure == 'body does not contain "UP"'
+
+
+def test_regex_across_chunks():
+    decided, failure = evaluate(
+        [{"regex": r"version \d+\.\d+"}], ["running version 1", ".25 ok"]
+    )
+
+    assert decided
+    assert failure is None
+
+
+def test_regex_match_at_end_of_chunk_not_accepted():
+    decided, failure = evaluate([{"regex": r"\bUP\b"}], ["status: UP", "GRADE FAILED"])
+
+    assert not decided
+    assert failure == r"body does not match /\bUP\b/"
+
+
+def test_regex_match_at_end_of_body():
+    decided, failure = evaluate([{"regex": r"\bUP$"}], ["status: ", "UP"])
+
+    assert decided
+    assert failure is None
+
+
+def test_regex_failure():
+    decided, failure = evaluate([{"regex": "^OK$"}], ["NOT OK"])
+
+    assert failure == "body does not match /^OK$/"
+
+
+def test_all_text_assertions_required():
+    decided, failure = evaluate(
+        [{"contains": "UP"}, {"regex": "db: (ok|degraded)"}], ["UP", " db: ok"]
+    )
+
+    assert decided
+    assert failure is None
+
+
+def test_json_path_equals():
+    document = {"status": "UP", "checks": [{"name": "db", "ok": True}]}
+
+    decided, failure = evaluate(
+        [
+            {"json_path": "$.status", "equals": "UP"},
+            {"json_path": "$.checks[0]['name']", "equals": "db"},
+            {"json_path": "$.checks[0].ok", "equals": True},
+        ],
+        ["{}"],
+        document,
+    )
+
+    assert not decided
+    assert failure is None
+
+
+def test_json_path_not_equal():
+    decided, failure = evaluate(
+        [{"json_path": "$.status", "equals": "UP"}], ["{}"], {"status": "DOWN"}
+    )
+
+    assert failure == '$.status is "DOWN", expected "UP"'
+
+
+def test_json_path_bool_is_not_number():
+    decided, failure = evaluate(
+        [{"json_path": "$.count", "equals": 1}], ["{}"], {"count": True}
+    )
+
+    assert failure == "$.count is true, expected 1"
+
+
+def test_json_path_exists():
+    assertions = [{"json_path": "$.checks[1]"}]
+
+    assert evaluate(assertions, ["{}"], {"checks": [1, 2]})[1] is None
+    assert evaluate(assertions, ["{}"], {"checks": [1]})[1] == "$.checks[1] not found"
+    assert (
+        evaluate(assertions, ["{}"], {"checks": {"1": 1}})[1] == "$.checks[1] not found"
+    )
+
+
+def test_json_error():
+    decided, failure = evaluate(
+        [{"json_path": "$.status"}], ["{"], json_error="response body is not valid JSON"
+    )
+
+    assert failure == "$.status: response body is not valid JSON"
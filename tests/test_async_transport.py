@@ -0,0 +1,142 @@
+from pi_monitor.async_transport import AsyncPooledSession
+from pi_monitor import HttpSettings
+from .fault_server import FaultServer
+from .local_server import CERT_FILE, LocalHandler, LocalServer
+import asyncio
+import http.client
+import pytest
+import requests
+import ssl
+import time
+
+
+class ChunkedHandler(LocalHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self.wfile.write(b"2;name=value\r\nOK\r\n3\r\n!!!\r\n0\r\nX-Trailer: 1\r\n\r\n")
+
+
+async def fetch(session, url, method="GET", **kwargs):
+    response = await session.request(method, url, **kwargs)
+    async with response:
+        body = b""
+        while True:
+            chunk = await response.read(1024)
+            if not chunk:
+                return response, body
+            body += chunk
+
+
+def run(coroutine_function, *args, **kwargs):
+    async def with_session():
+        async with AsyncPooledSession() as session:
+            return await coroutine_function(session, *args, **kwargs)
+
+    return asyncio.run(with_session())
+
+
+def test_reuses_connections():
+    async def fetch_all(session, url):
+        results = [await fetch(session, url) for _ in range(3)]
+        return session.stats, results
+
+    with LocalServer({"/": (200, b"OK", {"X-Test": "a"})}) as server:
+        stats, results = run(fetch_all, server.base_url + "/")
+
+    assert [body for _, body in results] == [b"OK", b"OK", b"OK"]
+    response = results[0][0]
+    assert response.status_code == 200
+    assert response.reason == "OK"
+    assert response.headers["x-test"] == "a"
+    assert [response.timings.reused for response, _ in results] == [
+        False,
+        True,
+        True,
+    ]
+    assert str(stats) == "3 requests, 1 new connections, 2 reused"
+
+
+def test_head_reuses_connection():
+    async def fetch_all(session, url):
+        results = [await fetch(session, url, "HEAD") for _ in range(2)]
+        return session.stats, results
+
+    with LocalServer({"/": (200, b"OK")}) as server:
+        stats, results = run(fetch_all, server.base_url + "/")
+
+    assert [body for _, body in results] == [b"", b""]
+    assert stats.new_connections == 1
+
+
+def test_chunked_body():
+    with LocalServer({}, ChunkedHandler) as server:
+        response, body = run(fetch, server.base_url + "/")
+
+    assert body == b"OK!!!"
+
+
+def test_redirect():
+    routes = {"/old": (303, b"", {"Location": "/new"}), "/new": (200, b"OK")}
+    with LocalServer(routes) as server:
+        response, body = run(fetch, server.base_url + "/old", "OPTIONS")
+
+    assert server.requests == [("OPTIONS", "/old"), ("GET", "/new")]
+    assert response.url == server.base_url + "/new"
+    assert body == b"OK"
+
+
+def test_too_many_redirects():
+    with FaultServer() as server:
+        with pytest.raises(requests.exceptions.TooManyRedirects):
+            run(fetch, server.url("redirect-loop"))
+
+
+def test_tls():
+    context = ssl.create_default_context(cafile=CERT_FILE)
+
+    async def fetch_tls(url):
+        async with AsyncPooledSession(ssl_context=context) as session:
+            return await fetch(session, url)
+
+    with LocalServer({"/": (200, b"OK")}, tls=True) as server:
+        response, body = asyncio.run(fetch_tls(server.base_url + "/"))
+
+    assert body == b"OK"
+    # The handshake is counted in the connection time
+    assert response.timings.connect > 0
+    assert response.timings.tls == 0
+
+
+def test_tls_unverified():
+    with LocalServer({"/": (200, b"OK")}, tls=True) as server:
+        with pytest.raises(ssl.SSLCertVerificationError):
+            run(fetch, server.base_url + "/")
+
+
+def test_incomplete_body():
+    with FaultServer() as server:
+        with pytest.raises(http.client.IncompleteRead):
+            run(fetch, server.url("short-body"))
+
+
+@pytest.mark.parametrize("fault", ["trickle-body", "trickle-headers"])
+def test_time_limit(fault):
+    with FaultServer() as server:
+        started = time.monotonic()
+        with pytest.raises(asyncio.TimeoutError):
+            run(fetch, server.url(fault), timeout=(0.5, 0.5), time_limit=0.6)
+        elapsed = time.monotonic() - started
+
+    assert 0.5 < elapsed < 1
+
+
+def test_from_settings():
+    settings = HttpSettings()
+    settings.pool_connections = 3
+    settings.pool_maxsize = 5
+    session = AsyncPooledSession.from_settings(settings, 20)
+
+    assert session.pool_connections == 3
+    assert session.pool_maxsize == 20
@@ -0,0 +1,117 @@
+from pi_monitor import CheckState, CheckStateStore, LatencyHistogram, OpLevel
+import pytest
+
+
+def test_first_success_confirmed():
+    state = CheckState()
+
+    assert state.record(OpLevel.Operational, 3, 3)
+    assert state.level == OpLevel.Operational
+    assert not state.record(OpLevel.Operational, 3, 3)
+
+
+def test_failures_to_open():
+    state = CheckState()
+    state.record(OpLevel.Operational)
+
+    assert not state.record(OpLevel.Full_Outage, 3)
+    assert not state.record(OpLevel.Full_Outage, 3)
+    assert state.record(OpLevel.Full_Outage, 3)
+    assert state.level == OpLevel.Full_Outage
+    assert not state.record(OpLevel.Full_Outage, 3)
+
+
+def test_transient_failure_ignored():
+    state = CheckState()
+    state.record(OpLevel.Operational)
+
+    for op_level in [OpLevel.Full_Outage, OpLevel.Full_Outage, OpLevel.Operational]:
+        assert not state.record(op_level, 3)
+    assert not state.record(OpLevel.Full_Outage, 3)
+
+    assert state.level == OpLevel.Operational
+    assert state.failures == 3
+    assert state.count == 5
+
+
+def test_successes_to_close():
+    state = CheckState()
+    state.record(OpLevel.Full_Outage, 1, 2)
+
+    assert not state.record(OpLevel.Operational, 1, 2)
+    assert not state.record(OpLevel.Full_Outage, 1, 2)
+    assert not state.record(OpLevel.Operational, 1, 2)
+    assert state.record(OpLevel.Operational, 1, 2)
+    assert state.level == OpLevel.Operational
+
+
+def test_failure_from_unknown_requires_threshold():
+    state = CheckState()
+
+    assert not state.record(OpLevel.Full_Outage, 2)
+    assert state.level is None
+    assert state.record(OpLevel.Full_Outage, 2)
+
+
+def test_window_is_bounded():
+    state = CheckState()
+    for _ in range(CheckState.WINDOW_SIZE + 10):
+        state.record(OpLevel.Full_Outage, CheckState.WINDOW_SIZE + 10)
+
+    assert state.count == CheckState.WINDOW_SIZE
+    assert state.failures == CheckState.WINDOW_SIZE
+    assert state.level == OpLevel.Full_Outage
+
+
+def test_store_get():
+    store = CheckStateStore()
+
+    assert store.get("Test") is store.get("Test")
+    assert store.get("Test") is not store.get("Other")
+
+
+def test_store_save_and_load(tmp_path):
+    file = tmp_path / "state.json"
+    store = CheckStateStore()
+    store.get("Test").record(OpLevel.Operational)
+    store.get("Test").record(OpLevel.Full_Outage, 2)
+    store.get("Unknown").record(OpLevel.Full_Outage, 2)
+    store.save(str(file))
+
+    loaded = CheckStateStore()
+    loaded.load(str(file))
+
+    assert loaded.get("Test").record(OpLevel.Full_Outage, 2)
+    assert loaded.get("Unknown").level is None
+    assert loaded.get("Unknown").failures == 1
+
+
+def test_store_load_missing(tmp_path):
+    store = CheckStateStore()
+    store.load(str(tmp_path / "missing.json"))
+
+    assert store.get("Test").count == 0
+
+
+def test_store_load_invalid(caplog, tmp_path):
+    file = tmp_path / "state.json"
+    file.write_text("not json")
+
+    store = CheckStateStore()
+    store.load(str(file))
+
+    assert caplog.records[0].message.startswith("Ignoring invalid check state")
+
+
+def test_store_save_and_load_latency(tmp_path):
+    file = tmp_path / "state.json"
+    store = CheckStateStore()
+    store.get("Test").latency = LatencyHistogram(10)
+    store.get("Test").latency.record(0.25)
+    store.save(str(file))
+
+    loaded = CheckStateStore()
+    loaded.load(str(file))
+
+    assert loaded.get("Test").latency.window == 10
+    assert loaded.get("Test").latency.percentile(50) == pytest.approx(0.25, rel=0.05)
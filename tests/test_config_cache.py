@@ -0,0 +1,98 @@
+import logging
+import os
+import pickle
+import pytest
+from pi_monitor import (
+    ConfigurationError,
+    HealthCheckSettings,
+    read_cached_configuration,
+    read_configuration,
+)
+from pi_monitor.config_cache import get_cache_file
+
+
+def build_config(**check) -> dict:
+    return {
+        "status_checks": [
+            {
+                "name": "My Site",
+                "url": "https://your.domain.com",
+                "assertions": [{"regex": "v\\d+"}],
+                **check,
+            }
+        ]
+    }
+
+
+def test_cache_matches_file(tmp_path, write_config, caplog):
+    file = write_config(build_config(interval=30))
+
+    with caplog.at_level(logging.DEBUG, logger="pi_monitor.config_cache"):
+        first = read_cached_configuration(file)
+        assert "Loaded configuration from cache" not in caplog.text
+        cached = read_cached_configuration(file)
+        assert "Loaded configuration from cache" in caplog.text
+
+    assert get_cache_file(file) == tmp_path / ".monitor.config.json.cache"
+    assert cached == first == read_configuration(file)
+    check = cached.status_checks[0]
+    assert check.interval == 30
+    assert check.method == HealthCheckSettings.method
+    # Compiled when the check first runs
+    assert first.status_checks[0].compiled_assertions is not None
+    assert check.compiled_assertions is None
+
+
+def test_cache_rebuilt_when_file_changes(write_config):
+    file = write_config(build_config(interval=30))
+    stat = os.stat(file)
+    read_cached_configuration(file)
+
+    # Same size and modification time, different contents
+    write_config(build_config(interval=45))
+    os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert read_cached_configuration(file).status_checks[0].interval == 45
+    assert read_cached_configuration(file).status_checks[0].interval == 45
+
+
+def test_invalid_cache_ignored(write_config, caplog):
+    file = write_config(build_config())
+    read_cached_configuration(file)
+    cache = get_cache_file(file)
+    key = pickle.loads(cache.read_bytes())
+    cache.write_bytes(pickle.dumps(key) + b"not a pickle")
+
+    with caplog.at_level(logging.WARNING):
+        settings = read_cached_configuration(file)
+
+    assert "Ignoring invalid configuration cache" in caplog.text
+    assert settings.status_checks[0].name == "My Site"
+    assert read_cached_configuration(file) == settings
+
+
+def test_cache_custom_file(tmp_path, write_config):
+    file = write_config(build_config())
+    cache = tmp_path / "cache" / "config.cache"
+    cache.parent.mkdir()
+
+    read_cached_configuration(file, cache_file=str(cache))
+
+    assert cache.exists()
+    assert not get_cache_file(file).exists()
+
+
+def test_invalid_configuration_not_cached(tmp_path):
+    file = tmp_path / "monitor.config.json"
+    file.write_text('{"status_checks": [{"name": "My Site"}]}')
+
+    with pytest.raises(ConfigurationError):
+        read_cached_configuration(str(file))
+
+    assert not get_cache_file(file).exists()
+
+
+def test_cache_missing_file(tmp_path):
+    default = object()
+
+    assert read_cached_configuration(str(tmp_path / "none.json"), default) is default
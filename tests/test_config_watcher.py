@@ -0,0 +1,120 @@
+import json
+import logging
+import pytest
+import sys
+from pathlib import Path
+from pi_monitor import (
+    CheckScheduler,
+    CheckStateStore,
+    ConfigReloader,
+    ConfigWatcher,
+    OpLevel,
+    read_configuration,
+)
+
+
+def build_config(*names, interval=60) -> dict:
+    return {
+        "status_checks": [
+            {"name": name, "url": f"http://{name}.test.com", "interval": interval}
+            for name in names
+        ]
+    }
+
+
+@pytest.fixture(params=[True, False], ids=["inotify", "polling"])
+def watcher(request, write_config):
+    file = write_config(build_config("a"))
+    watcher = ConfigWatcher(file, use_inotify=request.param)
+    yield watcher
+    watcher.close()
+
+
+def test_watcher_unchanged(watcher):
+    assert not watcher.changed()
+
+
+def test_watcher_detects_replace(watcher, write_config):
+    write_config(build_config("a", "b"))
+
+    assert watcher.changed()
+    assert not watcher.changed()
+
+
+def test_watcher_detects_write(watcher):
+    with open(watcher.file, "a") as f:
+        f.write("\n")
+
+    assert watcher.changed()
+
+
+def test_watcher_ignores_other_files(watcher):
+    (watcher.file.parent / "other.json").write_text("{}")
+
+    assert not watcher.changed()
+
+
+def test_watcher_uses_inotify(tmp_path):
+    watcher = ConfigWatcher(str(tmp_path / "monitor.config.json"))
+    watcher.close()
+
+    assert watcher.uses_inotify == sys.platform.startswith("linux")
+
+
+class Reload:
+    def __init__(self, write_config):
+        self.file = Path(write_config(build_config("a", "b")))
+        self.cycles = []
+        self.states = CheckStateStore()
+        settings = read_configuration(str(self.file))
+        self.scheduler = CheckScheduler(self.cycles.append, settings.status_checks)
+        self.reloader = ConfigReloader(
+            str(self.file), settings, self.scheduler, self.states
+        )
+
+
+def test_reload_applies_changes(write_config):
+    reload = Reload(write_config)
+    reload.scheduler.run_pending()
+    reload.states.get("a").record(OpLevel.Operational)
+    reload.states.get("b").record(OpLevel.Operational)
+    state = reload.states.get("a")
+
+    assert not reload.reloader.poll()
+    write_config(build_config("a", "c"))
+
+    assert reload.reloader.poll()
+    assert [check.name for check in reload.reloader.settings.status_checks] == [
+        "a",
+        "c",
+    ]
+    assert reload.scheduler.run_pending() == 1
+    assert [check.name for check in reload.cycles[-1]] == ["c"]
+    assert reload.states.get("a") is state
+    assert reload.states.get("b").level is None
+    reload.reloader.close()
+
+
+def test_reload_ignores_invalid_file(write_config, caplog):
+    reload = Reload(write_config)
+    reload.file.write_text('{"status_checks": [{"name": "a"}]}')
+
+    with caplog.at_level(logging.ERROR):
+        assert not reload.reloader.poll()
+
+    assert "status_checks[0].url: required setting missing" in caplog.text
+    assert reload.scheduler.run_pending() == 2
+    reload.reloader.close()
+
+
+def test_reload_warns_about_restart(write_config, caplog):
+    reload = Reload(write_config)
+    config = json.loads(reload.file.read_text())
+    config["http"] = {"pool_maxsize": 20}
+    reload.file.write_text(json.dumps(config))
+
+    with caplog.at_level(logging.WARNING):
+        assert reload.reloader.poll()
+
+    assert "Restart pi-monitor to apply changes to http" in caplog.text
+    reload.reloader.close()
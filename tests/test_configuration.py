@@ -1,5 +1,8 @@
 import logging
+import pytest
 from pi_monitor import (
+    ConfigurationError,
+    HealthCheckSettings,
     MonitorSettings,
     NotificationSettings,
     StatusPageSettings,
@@ -46,3 +49,229 @@ def test_return_defaults():
 
     assert settings.status_page.api_key == "api"
     assert settings.status_page.page_id == "page"
+
+
+def test_read_assertions(write_config):
+    config = build_config(
+        assertions=[{"contains": "UP"}, {"json_path": "$.status", "equals": "UP"}]
+    )
+
+    settings: MonitorSettings = read_configuration(write_config(config))
+
+    compiled = settings.status_checks[0].compiled_assertions
+    assert len(compiled) == 2
+    assert compiled.requires_json
+
+
+def test_read_invalid_assertions(write_config):
+    config = build_config(assertions=[{"contains": "UP"}, {"regex": "("}])
+
+    with pytest.raises(ConfigurationError) as e:
+        read_configuration(write_config(config))
+
+    assert e.value.path == "$.status_checks[0].assertions[1]"
+    assert str(e.value).startswith(
+        "$.status_checks[0].assertions[1]: Invalid regex '('"
+    )
+
+
+def test_read_assertion_not_an_object(write_config):
+    with pytest.raises(ConfigurationError) as e:
+        read_configuration(write_config(build_config(assertions=["UP"])))
+
+    assert e.value.path == "$.status_checks[0].assertions[0]"
+    assert str(e.value) == (
+        "$.status_checks[0].assertions[0]: assertion must be an object"
+    )
+
+
+def build_config(**check) -> dict:
+    return {
+        "status_checks": [
+            {"name": "My Site", "url": "https://your.domain.com", **check}
+        ]
+    }
+
+
+def test_read_component_id():
+    settings: MonitorSettings = read_configuration("tests/testfiles/basic.config.json")
+
+    check = settings.status_checks[0]
+    assert isinstance(check, HealthCheckSettings)
+    assert check.status_page.component_id == "12345"
+    assert check.interval == 60
+    assert check.latency is None
+    assert settings.http is None
+
+
+def test_settings_use_slots():
+    check = HealthCheckSettings(name="My Site", interval=30)
+
+    assert not hasattr(check, "__dict__")
+    assert check.interval == 30
+    assert check.connect_timeout == HealthCheckSettings.connect_timeout == 5
+    assert check.url is None
+    with pytest.raises(AttributeError):
+        check.statusPageComponentId = "12345"
+    with pytest.raises(TypeError):
+        HealthCheckSettings(intervall=30)
+
+
+@pytest.mark.parametrize(
+    "config, path, message",
+    [
+        (
+            build_config(statusPageComponentId="12345"),
+            "$.status_checks[0].statusPageComponentId",
+            "unknown setting",
+        ),
+        (
+            build_config(intervall=30),
+            "$.status_checks[0].intervall",
+            "unknown setting, did you mean 'interval'?",
+        ),
+        (
+            build_config(interval="30"),
+            "$.status_checks[0].interval",
+            "expected an integer, found a string",
+        ),
+        (
+            build_config(connect_timeout=True),
+            "$.status_checks[0].connect_timeout",
+            "expected a number, found a boolean",
+        ),
+        (
+            build_config(status_page="12345"),
+            "$.status_checks[0].status_page",
+            "expected an object, found a string",
+        ),
+        (
+            build_config(status_page={}),
+            "$.status_checks[0].status_page.component_id",
+            "required setting missing",
+        ),
+        (
+            build_config(expected_status=[200, "204"]),
+            "$.status_checks[0].expected_status[1]",
+            "expected an integer, found a string",
+        ),
+        (
+            build_config(name=None),
+            "$.status_checks[0].name",
+            "must not be null",
+        ),
+        (
+            build_config(method="POST"),
+            "$.status_checks[0].method",
+            "expected one of GET, HEAD, OPTIONS",
+        ),
+        (
+            build_config(read_timeout=0),
+            "$.status_checks[0].read_timeout",
+            "must be greater than 0",
+        ),
+        (
+            build_config(latency={"degraded": 0.5, "window": 0}),
+            "$.status_checks[0].latency.window",
+            "must be greater than 0",
+        ),
+        (
+            build_config(latency={"degraded": 2, "partial_outage": 1}),
+            "$.status_checks[0].latency.partial_outage",
+            "must be at least degraded",
+        ),
+        (
+            build_config(latency={"degraded": 0.5, "min_samples": 50}),
+            "$.status_checks[0].latency.min_samples",
+            "must be less than 28.4, the most response times counted with a window"
+            " of 20",
+        ),
+        (
+            build_config(latency={"degraded": 0.5, "window": 1}),
+            "$.status_checks[0].latency.min_samples",
+            "must be less than 1.0, the most response times counted with a window"
+            " of 1",
+        ),
+        (
+            build_config(compiled_assertions=[]),
+            "$.status_checks[0].compiled_assertions",
+            "unknown setting, did you mean 'assertions'?",
+        ),
+        (
+            {"status_checks": [{"name": "My Site"}]},
+            "$.status_checks[0].url",
+            "required setting missing",
+        ),
+        ({"notification": {}}, "$.status_checks", "required setting missing"),
+        (
+            {"status_checks": [], "notification": {"queue_size": 0}},
+            "$.notification.queue_size",
+            "must be greater than 0",
+        ),
+        (
+            {"status_checks": [], "notification": {"max_retries": -1}},
+            "$.notification.max_retries",
+            "must not be negative",
+        ),
+        (
+            {"status_checks": [], "status_page": {"rate_burst": 0}},
+            "$.status_page.rate_burst",
+            "must be greater than 0",
+        ),
+        (
+            {"status_checks": [], "notification": {"backend": "pigeon"}},
+            "$.notification.backend",
+            "expected one of sendgrid, smtp, webhook",
+        ),
+        (
+            {
+                "status_checks": [
+                    {"name": "My Site", "url": "https://one.domain.com"},
+                    {"name": "My Site", "url": "https://two.domain.com"},
+                ]
+            },
+            "$.status_checks[1].name",
+            "duplicate check name 'My Site'",
+        ),
+    ],
+)
+def test_read_invalid_settings(write_config, config, path, message):
+    with pytest.raises(ConfigurationError) as e:
+        read_configuration(write_config(config))
+
+    assert e.value.path == path
+    assert str(e.value) == f"{path}: {message}"
+
+
+def test_read_invalid_json(tmp_path):
+    file = tmp_path / "monitor.config.json"
+    file.write_text('{"status_checks": [}')
+
+    with pytest.raises(ConfigurationError) as e:
+        read_configuration(str(file))
+
+    assert str(e.value).startswith("$: invalid JSON at line 1, column 20")
+
+
+def test_read_many_checks(write_config):
+    config = {
+        "status_checks": [
+            {"name": f"Site {i}", "url": f"https://site{i}.domain.com"}
+            for i in range(10000)
+        ]
+    }
+
+    settings: MonitorSettings = read_configuration(write_config(config))
+
+    assert len(settings.status_checks) == 10000
+    assert settings.status_checks[-1].name == "Site 9999"
+
+
+def test_settings_equality(write_config):
+    first = read_configuration(write_config(build_config(interval=30)))
+    second = read_configuration(write_config(build_config(interval=30)))
+    third = read_configuration(write_config(build_config(interval=45)))
+
+    assert first.status_checks[0] == second.status_checks[0]
+    assert first.status_checks[0] != third.status_checks[0]
+    assert first.status_checks[0] != first
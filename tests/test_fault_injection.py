@@ -0,0 +1,264 @@
+from pi_monitor import (
+    AsyncHealthCheckExecutor,
+    HealthCheckExecutor,
+    HealthCheckSettings,
+    Notifier,
+    NotificationSettings,
+    PooledSession,
+    StatusPageOperator,
+    StatusPageSettings,
+)
+import asyncio
+import pytest
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from .fault_server import FaultServer, StalledListener
+
+# Far more than a check keeps of a body, which is 64KiB by default
+MEMORY_LIMIT = 4 * 2**20
+
+
+@pytest.fixture
+def test_operator():
+    settings: StatusPageSettings = StatusPageSettings()
+    settings.api_key = "apikey"
+    settings.page_id = "pageid"
+    return StatusPageOperator(settings)
+
+
+@pytest.fixture
+def test_notifier():
+    settings: NotificationSettings = NotificationSettings()
+    settings.sms_email = ""
+    return Notifier(settings)
+
+
+@pytest.fixture
+def test_executor(test_operator, test_notifier):
+    return HealthCheckExecutor(test_operator, test_notifier)
+
+
+@pytest.fixture
+def test_async_executor(test_operator, test_notifier):
+    executor = AsyncHealthCheckExecutor(test_operator, test_notifier)
+    yield executor
+    executor.close()
+
+
+@pytest.fixture
+def fault_server():
+    with FaultServer() as server:
+        yield server
+
+
+def build_check(url: str, name: str = "Test") -> HealthCheckSettings:
+    settings: HealthCheckSettings = HealthCheckSettings()
+    settings.name = name
+    settings.url = url
+    settings.status_page = None
+    return settings
+
+
+class PeakMemory:
+    def __enter__(self):
+        tracemalloc.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+
+FAILURES = [
+    ("reset", "Connection reset"),
+    ("reset-body", "Connection reset"),
+    ("short-body", "Incomplete response"),
+    ("redirect-loop", "Too many redirects"),
+    ("too-many-requests", "429 Too Many Requests"),
+]
+
+
+def get_http_async(executor, settings, timeout=None):
+    async def get_http():
+        async with executor.async_session:
+            return await executor._get_http_async(settings, timeout)
+
+    return asyncio.run(get_http())
+
+
+@pytest.mark.parametrize("fault, message", FAILURES)
+def test_get_http_failure(fault_server, test_executor, fault, message):
+    result = test_executor._get_http(build_check(fault_server.url(fault)))
+
+    assert not result.success
+    assert not result.timed_out
+    assert result.message == message
+
+
+@pytest.mark.parametrize("fault, message", FAILURES)
+def test_get_http_async_failure(fault_server, test_async_executor, fault, message):
+    result = get_http_async(test_async_executor, build_check(fault_server.url(fault)))
+
+    assert not result.success
+    assert not result.timed_out
+    assert result.message == message
+
+
+def test_get_http_too_many_requests_not_retried(fault_server, test_executor):
+    started = time.monotonic()
+    test_executor._get_http(build_check(fault_server.url("too-many-requests")))
+
+    assert time.monotonic() - started < 1
+    assert fault_server.requests == [("GET", "/too-many-requests")]
+
+
+@pytest.mark.parametrize("fault", ["trickle-body", "trickle-headers"])
+def test_get_http_trickle_times_out(fault_server, test_executor, fault):
+    # Every byte arrives well within the read timeout, so only the time limit of
+    # the whole response ends the request
+    started = time.monotonic()
+    result = test_executor._get_http(build_check(fault_server.url(fault)), (0.5, 0.5))
+    elapsed = time.monotonic() - started
+
+    assert not result.success
+    assert result.timed_out
+    assert result.message == "Request timed out"
+    assert 0.9 < elapsed < 2
+
+
+@pytest.mark.parametrize("fault", ["trickle-body", "trickle-headers"])
+def test_get_http_async_trickle_times_out(fault_server, test_async_executor, fault):
+    started = time.monotonic()
+    result = get_http_async(
+        test_async_executor, build_check(fault_server.url(fault)), (0.5, 0.5)
+    )
+    elapsed = time.monotonic() - started
+
+    assert result.timed_out
+    assert 0.9 < elapsed < 2
+
+
+def test_get_http_tls_stall_times_out(test_executor):
+    with StalledListener() as listener:
+        started = time.monotonic()
+        result = test_executor._get_http(build_check(listener.base_url + "/"), (0.3, 5))
+        elapsed = time.monotonic() - started
+
+    assert result.timed_out
+    assert elapsed < 1
+
+
+@pytest.mark.parametrize("fault", ["huge-body", "infinite-body"])
+def test_get_http_endless_body_bounded(fault_server, test_executor, fault):
+    settings = build_check(fault_server.url(fault))
+
+    with PeakMemory() as memory:
+        result = test_executor._get_http(settings)
+
+    assert result.success
+    assert result.truncated
+    assert len(result.raw_response) == settings.max_body_bytes
+    assert memory.peak < MEMORY_LIMIT
+
+
+@pytest.mark.parametrize("fault", ["huge-body", "infinite-body"])
+def test_get_http_async_endless_body_bounded(fault_server, test_async_executor, fault):
+    settings = build_check(fault_server.url(fault))
+
+    with PeakMemory() as memory:
+        result = get_http_async(test_async_executor, settings)
+
+    assert result.success
+    assert result.truncated
+    assert len(result.raw_response) == settings.max_body_bytes
+    assert memory.peak < MEMORY_LIMIT
+
+
+def test_process_response_endless_failure_bounded(fault_server, test_executor):
+    settings = build_check(fault_server.url("infinite-body"))
+    settings.expected_status = [204]
+    session = PooledSession()
+
+    with PeakMemory() as memory:
+        with session.get(settings.url, stream=True, timeout=5) as response:
+            result = test_executor._process_response(response, settings)
+    session.close()
+
+    assert not result.success
+    assert result.message.startswith("200 xxx")
+    assert len(result.message) == HealthCheckExecutor.MAX_MESSAGE_LENGTH
+    assert memory.peak < MEMORY_LIMIT
+
+
+FAULTS = [
+    "trickle-body",
+    "trickle-headers",
+    "reset",
+    "reset-body",
+    "short-body",
+    "huge-body",
+    "infinite-body",
+    "redirect-loop",
+    "too-many-requests",
+]
+
+
+def build_fault_checks(server, listener):
+    checks = [build_check(server.url(fault), fault) for fault in FAULTS]
+    checks.append(build_check(listener.base_url + "/", "tls-stall"))
+    return checks
+
+
+def assert_cycle_results(notify_mock):
+    messages = {call[0][0]: call[0][1] for call in notify_mock.call_args_list}
+    assert messages == {
+        "trickle-body": "Request timed out",
+        "trickle-headers": "Request timed out",
+        "reset": "Connection reset",
+        "reset-body": "Connection reset",
+        "short-body": "Incomplete response",
+        "redirect-loop": "Too many redirects",
+        "too-many-requests": "429 Too Many Requests",
+        "tls-stall": "Request timed out",
+    }
+
+
+@patch.object(Notifier, "notify", return_value=None)
+def test_cycle_bounded(notify_mock, fault_server, test_operator, test_notifier):
+    executor = HealthCheckExecutor(test_operator, test_notifier, cycle_deadline=0.5)
+
+    with StalledListener() as listener, PeakMemory() as memory:
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=len(FAULTS) + 1) as pool:
+            executor.execute_health_checks(
+                build_fault_checks(fault_server, listener), pool
+            )
+            cycle = time.monotonic() - started
+        # The time limit of each request frees its thread soon after the deadline
+        released = time.monotonic() - started
+
+    assert cycle < 0.8
+    assert released < 1.5
+    assert memory.peak < MEMORY_LIMIT
+    assert_cycle_results(notify_mock)
+
+
+@patch.object(Notifier, "notify", return_value=None)
+def test_async_cycle_bounded(notify_mock, fault_server, test_operator, test_notifier):
+    executor = AsyncHealthCheckExecutor(
+        test_operator, test_notifier, len(FAULTS) + 1, cycle_deadline=0.5
+    )
+
+    with StalledListener() as listener, PeakMemory() as memory:
+        started = time.monotonic()
+        executor.run_cycle(build_fault_checks(fault_server, listener))
+        cycle = time.monotonic() - started
+        executor.close()
+        released = time.monotonic() - started
+
+    assert cycle < 0.8
+    assert released < 1.5
+    assert memory.peak < MEMORY_LIMIT
+    assert_cycle_results(notify_mock)
@@ -0,0 +1,188 @@
+from pi_monitor import (
+    AsyncHealthCheckExecutor,
+    HealthCheckExecutor,
+    HealthCheckSettings,
+    HttpGetResult,
+    Notifier,
+    NotificationSettings,
+    StatusPageOperator,
+    StatusPageSettings,
+)
+from pi_monitor.async_transport import AsyncPooledSession
+import asyncio
+import logging
+import pytest
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from .local_server import DelayedServer, LocalServer
+
+TEST_URL = "http://test.com"
+
+
+@pytest.fixture
+def test_operator():
+    settings: StatusPageSettings = StatusPageSettings()
+    settings.api_key = "apikey"
+    settings.page_id = "pageid"
+    return StatusPageOperator(settings)
+
+
+@pytest.fixture
+def test_notifier():
+    settings: NotificationSettings = NotificationSettings()
+    settings.sms_email = ""
+    return Notifier(settings)
+
+
+def build_checks(count: int, base_url: str = TEST_URL):
+    checks = []
+    for index in range(count):
+        settings: HealthCheckSettings = HealthCheckSettings()
+        settings.name = f"Test {index}"
+        settings.url = f"{base_url}/{index}"
+        settings.status_page = None
+        checks.append(settings)
+    return checks
+
+
+def test_construct(test_operator, test_notifier):
+    executor = AsyncHealthCheckExecutor(test_operator, test_notifier, 10)
+
+    assert isinstance(executor, HealthCheckExecutor)
+    assert executor.concurrency == 10
+    assert isinstance(executor.async_session, AsyncPooledSession)
+    assert executor.async_session.pool_maxsize == 10
+    executor.close()
+
+
+def test_construct_invalid_concurrency(test_operator, test_notifier):
+    with pytest.raises(ValueError) as e:
+        AsyncHealthCheckExecutor(test_operator, test_notifier, 0)
+
+    assert str(e.value) == "concurrency must be at least 1"
+
+
+@patch.object(Notifier, "notify", return_value=None)
+def test_run_cycle(notify_mock, caplog, test_operator, test_notifier):
+    routes = {
+        "/0": (200, b"OK"),
+        "/1": (200, b"OK"),
+        "/2": (404, b"Page Not Found"),
+    }
+    executor = AsyncHealthCheckExecutor(test_operator, test_notifier, 2)
+    with LocalServer(routes) as server:
+        checks = build_checks(3, server.base_url)
+        with caplog.at_level(logging.INFO):
+            executor.run_cycle(checks)
+        executor.close()
+
+    assert sorted(server.requests) == [("GET", "/0"), ("GET", "/1"), ("GET", "/2")]
+    assert notify_mock.call_count == 1
+    assert notify_mock.call_args[0][0] == checks[2].name
+    assert notify_mock.call_args[0][1] == "404 Page Not Found"
+
+
+def test_connections_reused_between_cycles(test_operator, test_notifier):
+    executor = AsyncHealthCheckExecutor(test_operator, test_notifier, 1)
+    with LocalServer({"/0": (200, b"OK")}) as server:
+        checks = build_checks(1, server.base_url)
+        executor.run_cycle(checks)
+        executor.run_cycle(checks)
+        executor.close()
+
+    assert executor.async_session.stats.requests == 2
+    assert executor.async_session.stats.new_connections == 1
+
+
+def test_concurrency_is_bounded(test_operator, test_notifier):
+    in_flight = {"current": 0, "peak": 0}
+
+    async def slow_get(check_settings, timeout):
+        in_flight["current"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["current"])
+        await asyncio.sleep(0.05)
+        in_flight["current"] -= 1
+        return HttpGetResult(True)
+
+    executor = AsyncHealthCheckExecutor(test_operator, test_notifier, 3)
+    with patch.object(executor, "_get_http_async", side_effect=slow_get):
+        executor.run_cycle(build_checks(10))
+    executor.close()
+
+    assert in_flight["peak"] == 3
+
+
+def test_concurrency_is_shared_by_cycles(test_operator, test_notifier):
+    in_flight = {"current": 0, "peak": 0}
+
+    async def slow_get(check_settings, timeout):
+        in_flight["current"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["current"])
+        await asyncio.sleep(0.05)
+        in_flight["current"] -= 1
+        return HttpGetResult(True)
+
+    executor = AsyncHealthCheckExecutor(test_operator, test_notifier, 3)
+    with patch.object(executor, "_get_http_async", side_effect=slow_get):
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            for future in [
+                pool.submit(executor.run_cycle, build_checks(3)) for _ in range(4)
+            ]:
+                future.result()
+    executor.close()
+
+    assert in_flight["peak"] == 3
+
+
+@patch.object(Notifier, "notify", return_value=None)
+def test_cycle_takes_time_of_slowest_check(notify_mock, test_operator, test_notifier):
+    # Far more checks than threads wait on the site at once
+    checks = 1000
+    threads = threading.active_count()
+    executor = AsyncHealthCheckExecutor(test_operator, test_notifier, checks)
+    with DelayedServer(0.5) as server:
+        started = time.monotonic()
+        executor.run_cycle(build_checks(checks, server.base_url))
+        elapsed = time.monotonic() - started
+        # The server's own thread, and the executor's event loop
+        added_threads = threading.active_count() - threads - 2
+        executor.close()
+
+    assert server.requests == checks
+    assert notify_mock.call_count == 0
+    assert elapsed < 2
+    assert added_threads <= AsyncHealthCheckExecutor.RESULT_THREADS
+
+
+def test_check_exception_logged(caplog, test_operator, test_notifier):
+    executor = AsyncHealthCheckExecutor(test_operator, test_notifier, 2)
+    with patch.object(executor, "_get_http_async", side_effect=RuntimeError("boom")):
+        with caplog.at_level(logging.ERROR):
+            executor.run_cycle(build_checks(1))
+    executor.close()
+
+    assert caplog.records[0].message == "Health check failed: boom"
+
+
+@patch.object(Notifier, "notify", return_value=None)
+def test_cycle_deadline(notify_mock, test_operator, test_notifier):
+    async def get_http(check_settings, timeout):
+        if check_settings.url.endswith("/0"):
+            await asyncio.sleep(0.4)
+        return HttpGetResult(True)
+
+    executor = AsyncHealthCheckExecutor(
+        test_operator, test_notifier, 4, cycle_deadline=0.2
+    )
+    with patch.object(executor, "_get_http_async", side_effect=get_http):
+        started = time.monotonic()
+        executor.run_cycle(build_checks(3))
+        elapsed = time.monotonic() - started
+    executor.close()
+
+    assert elapsed < 0.35
+    assert notify_mock.call_count == 1
+    assert notify_mock.call_args[0][0] == "Test 0"
+    assert notify_mock.call_args[0][1] == "Request timed out"
@@ -6,18 +6,25 @@ from pi_monitor import (
     NotificationSettings,
     HealthCheckSettings,
     StatusPageComponentSettings,
+    OpLevel,
+    HttpGetResult,
+    LatencySettings,
 )
 import pytest
 import logging
 import requests
+import time
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch
 from types import SimpleNamespace
+from .local_server import LocalHandler, LocalServer
 
 TEST_API_KEY = "apikey"
 TEST_PAGE_ID = "pageid"
 TEST_URL = "http://test.com"
 TEST_RESULT_DICT = {
     "status_changed": True,
+    "applied": True,
     "incident_result": SimpleNamespace(
         **{
             "incident_created": True,
@@ -127,7 +134,7 @@ def test_execute_health_check_exception(
     settings.name = "Test"
     settings.url = TEST_URL
     settings.status_page = None
-    requests_mock.get(settings.url, exc=requests.exceptions.ConnectTimeout)
+    requests_mock.get(settings.url, exc=requests.exceptions.ConnectionError)
 
     with caplog.at_level(logging.INFO):
         test_executor.execute_health_check(settings)
@@ -173,3 +180,524 @@ def test_execute_health_check_status_page_notify(
     assert notify_mock.called
     assert notify_mock.call_args[0][0] == settings.name
     assert notify_mock.call_args[0][1] == "Incident Description"
+
+
+def test_execute_health_checks_reuses_connections(test_operator, test_notifier):
+    executor = HealthCheckExecutor(test_operator, test_notifier)
+    with LocalServer({"/a": (200, b"OK"), "/b": (200, b"OK")}) as server:
+        checks = []
+        for path in ["/a", "/b", "/a"]:
+            settings: HealthCheckSettings = HealthCheckSettings()
+            settings.name = path
+            settings.url = server.base_url + path
+            settings.status_page = None
+            checks.append(settings)
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            executor.execute_health_checks(checks, pool)
+
+    assert executor.session.stats.requests == 3
+    assert executor.session.stats.new_connections == 1
+
+
+@patch.object(StatusPageOperator, "end_cycle")
+@patch.object(StatusPageOperator, "begin_cycle")
+@patch.object(
+    StatusPageOperator,
+    "update_component_status",
+    return_value=SimpleNamespace(**TEST_RESULT_DICT),
+)
+@patch.object(Notifier, "notify", return_value=None)
+def test_execute_health_checks_single_snapshot(
+    notify_mock,
+    update_component_status,
+    begin_cycle_mock,
+    end_cycle_mock,
+    requests_mock,
+    test_executor,
+):
+    checks = []
+    for index in range(3):
+        status_page_setting = StatusPageComponentSettings()
+        status_page_setting.component_id = f"component-{index}"
+        settings: HealthCheckSettings = HealthCheckSettings()
+        settings.name = f"Test {index}"
+        settings.url = f"{TEST_URL}/{index}"
+        settings.status_page = status_page_setting
+        checks.append(settings)
+        requests_mock.get(settings.url, text="OK", status_code=200)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        test_executor.execute_health_checks(checks, pool)
+
+    begin_cycle_mock.assert_called_once_with(
+        ["component-0", "component-1", "component-2"]
+    )
+    assert end_cycle_mock.call_count == 1
+    assert update_component_status.call_count == 3
+
+
+@patch.object(StatusPageOperator, "begin_cycle")
+def test_execute_health_checks_no_status_page(
+    begin_cycle_mock, requests_mock, test_executor
+):
+    settings: HealthCheckSettings = HealthCheckSettings()
+    settings.name = "Test"
+    settings.url = TEST_URL
+    settings.status_page = None
+    requests_mock.get(settings.url, text="OK", status_code=200)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        test_executor.execute_health_checks([settings], pool)
+
+    assert begin_cycle_mock.called is False
+
+
+@patch.object(
+    StatusPageOperator,
+    "flush_pending",
+    return_value=[SimpleNamespace(**TEST_RESULT_DICT)],
+)
+@patch.object(Notifier, "notify", return_value=None)
+def test_flush_status_updates_notifies(notify_mock, flush_pending_mock, test_executor):
+    test_executor.flush_status_updates(True)
+
+    assert flush_pending_mock.call_args[0][0] is True
+    assert notify_mock.called
+    assert notify_mock.call_args[0][0] == "Test Incident"
+    assert notify_mock.call_args[0][1] == "Incident Description"
+
+
+@patch.object(
+    StatusPageOperator,
+    "update_component_status",
+    return_value=SimpleNamespace(**TEST_RESULT_DICT),
+)
+@patch.object(Notifier, "notify", return_value=None)
+def test_execute_health_check_failures_to_open(
+    notify_mock, update_component_status, requests_mock, test_executor
+):
+    status_page_setting = StatusPageComponentSettings()
+    status_page_setting.component_id = "component-id"
+
+    settings: HealthCheckSettings = HealthCheckSettings()
+    settings.name = "Test"
+    settings.url = TEST_URL
+    settings.status_page = status_page_setting
+    settings.failures_to_open = 3
+    requests_mock.get(
+        settings.url,
+        [
+            {"text": "OK", "status_code": 200},
+            {"text": "Page Not Found", "status_code": 404},
+            {"text": "Page Not Found", "status_code": 404},
+            {"text": "OK", "status_code": 200},
+            {"text": "Page Not Found", "status_code": 404},
+            {"text": "Page Not Found", "status_code": 404},
+            {"text": "Page Not Found", "status_code": 404},
+            {"text": "Page Not Found", "status_code": 404},
+        ],
+    )
+
+    for _ in range(8):
+        test_executor.execute_health_check(settings)
+
+    assert [call[0][1] for call in update_component_status.call_args_list] == [
+        OpLevel.Operational,
+        OpLevel.Full_Outage,
+    ]
+    assert notify_mock.call_count == 2
+
+
+@patch.object(Notifier, "notify", return_value=None)
+def test_execute_health_check_status_page_failure_retried(
+    notify_mock, requests_mock, test_executor
+):
+    client = test_executor.statuspage_operator.client
+    page_url = f"{client.STATUS_PAGE_BASE_URL}/{client.page_id}"
+    component_url = f"{page_url}/components/component-id"
+    requests_mock.get(component_url, json={"status": "operational"})
+    requests_mock.put(
+        component_url,
+        [
+            {"json": {"error": "rate limited"}, "status_code": 429},
+            {"json": {"status": "major_outage"}},
+        ],
+    )
+    requests_mock.get(f"{page_url}/incidents/unresolved", json=[])
+    requests_mock.post(f"{page_url}/incidents", json={"id": "incident-id"})
+    requests_mock.get(TEST_URL, text="Page Not Found", status_code=404)
+
+    status_page_setting = StatusPageComponentSettings()
+    status_page_setting.component_id = "component-id"
+    settings: HealthCheckSettings = HealthCheckSettings()
+    settings.name = "Test"
+    settings.url = TEST_URL
+    settings.status_page = status_page_setting
+
+    test_executor.execute_health_check(settings)
+    assert test_executor.states.get("Test").level is None
+
+    test_executor.execute_health_check(settings)
+    test_executor.execute_health_check(settings)
+
+    updates = [r for r in requests_mock.request_history if r.method == "PUT"]
+    incidents = [r for r in requests_mock.request_history if r.method == "POST"]
+    assert len(updates) == 2
+    assert len(incidents) == 1
+    assert notify_mock.call_count == 1
+    assert test_executor.states.get("Test").level == OpLevel.Full_Outage
+
+
+@patch.object(Notifier, "notify", return_value=None)
+def test_execute_health_checks_without_status_page_operator(
+    notify_mock, requests_mock, test_notifier
+):
+    executor = HealthCheckExecutor(None, test_notifier)
+    status_page_setting = StatusPageComponentSettings()
+    status_page_setting.component_id = "component-id"
+    settings: HealthCheckSettings = HealthCheckSettings()
+    settings.name = "Test"
+    settings.url = TEST_URL
+    settings.status_page = status_page_setting
+    requests_mock.get(TEST_URL, text="Page Not Found", status_code=404)
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        executor.execute_health_checks([settings], pool)
+    executor.flush_status_updates(True)
+
+    assert [request.url for request in requests_mock.request_history] == [
+        TEST_URL + "/"
+    ]
+    assert notify_mock.call_args[0] == ("Test", "404 Page Not Found")
+
+
+class SlowHandler(LocalHandler):
+    def do_GET(self):
+        time.sleep(0.5)
+        self._respond()
+
+
+@patch.object(Notifier, "notify", return_value=None)
+def test_execute_health_check_timeout(notify_mock, caplog, test_executor):
+    with LocalServer({"/": (200, b"OK")}, SlowHandler) as server:
+        settings: HealthCheckSettings = HealthCheckSettings()
+        settings.name = "Test"
+        settings.url = server.base_url + "/"
+        settings.status_page = None
+        settings.read_timeout = 0.1
+
+        with caplog.at_level(logging.INFO):
+            test_executor.execute_health_check(settings)
+
+    assert caplog.records[1].message.startswith("Request timed out")
+    assert notify_mock.call_args[0][1] == "Request timed out"
+
+
+def test_get_http_timeout_result(requests_mock, test_executor):
+    settings: HealthCheckSettings = HealthCheckSettings()
+    settings.url = TEST_URL
+    requests_mock.get(TEST_URL, exc=requests.exceptions.ReadTimeout)
+
+    result = test_executor._get_http(settings)
+
+    assert not result.success
+    assert result.timed_out
+    assert result.message == "Request timed out"
+
+
+def test_execute_health_check_uses_check_timeouts(requests_mock, test_executor):
+    settings: HealthCheckSettings = HealthCheckSettings()
+    settings.name = "Test"
+    settings.url = TEST_URL
+    settings.status_page = None
+    settings.connect_timeout = 2
+    requests_mock.get(settings.url, text="OK", status_code=200)
+
+    test_executor.execute_health_check(settings)
+
+    assert requests_mock.last_request.timeout == (2, 10)
+
+
+@patch.object(Notifier, "notify", return_value=None)
+def test_execute_health_checks_cycle_deadline(
+    notify_mock, test_operator, test_notifier
+):
+    executor = HealthCheckExecutor(test_operator, test_notifier, cycle_deadline=0.2)
+    checks = []
+    for index in range(3):
+        settings: HealthCheckSettings = HealthCheckSettings()
+        settings.name = f"Test {index}"
+        settings.url = f"{TEST_URL}/{index}"
+        settings.status_page = None
+        checks.append(settings)
+
+    def get_http(check_settings, timeout):
+        time.sleep(0.4)
+        return HttpGetResult(True)
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        with patch.object(executor, "_get_http", side_effect=get_http) as get_mock:
+            started = time.monotonic()
+            executor.execute_health_checks(checks, pool)
+            elapsed = time.monotonic() - started
+
+    assert elapsed < 0.35
+    assert get_mock.call_count == 1
+    assert get_mock.call_args[0][1][1] <= 0.2
+    assert sorted(call[0][0] for call in notify_mock.call_args_list) == [
+        "Test 0",
+        "Test 1",
+        "Test 2",
+    ]
+    assert {call[0][1] for call in notify_mock.call_args_list} == {"Request timed out"}
+
+
+class StalledBodyHandler(LocalHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "10")
+        self.end_headers()
+        self.wfile.write(b"OK")
+        self.wfile.flush()
+        time.sleep(0.5)
+
+
+def build_check(url: str) -> HealthCheckSettings:
+    settings: HealthCheckSettings = HealthCheckSettings()
+    settings.name = "Test"
+    settings.url = url
+    settings.status_page = None
+    return settings
+
+
+def test_get_http_body_truncated(test_executor):
+    with LocalServer({"/": (200, b"x" * 100000)}) as server:
+        settings = build_check(server.base_url + "/")
+        settings.max_body_bytes = 1000
+
+        result = test_executor._get_http(settings)
+
+    assert result.success
+    assert result.truncated
+    assert result.raw_response == "x" * 1000
+
+
+def test_get_http_body_within_limit(test_executor):
+    with LocalServer({"/": (200, b"OK")}) as server:
+        result = test_executor._get_http(build_check(server.base_url + "/"))
+
+    assert result.success
+    assert not result.truncated
+    assert result.raw_response == "OK"
+
+
+def test_get_http_discard_body(test_executor):
+    with LocalServer({"/": (404, b"x" * 100000)}) as server:
+        settings = build_check(server.base_url + "/")
+        settings.discard_body = True
+
+        result = test_executor._get_http(settings)
+
+    assert not result.success
+    assert result.message == "404 Not Found"
+
+
+def test_get_http_failure_message_limited(test_executor):
+    with LocalServer({"/": (500, b"x" * 100000)}) as server:
+        result = test_executor._get_http(build_check(server.base_url + "/"))
+
+    assert not result.success
+    assert len(result.message) == HealthCheckExecutor.MAX_MESSAGE_LENGTH
+    assert result.message.startswith("500 xxx")
+    assert result.message.endswith("...")
+
+
+def test_get_http_body_timeout(test_executor):
+    with LocalServer(handler=StalledBodyHandler) as server:
+        result = test_executor._get_http(build_check(server.base_url + "/"), (1, 0.1))
+
+    assert result.timed_out
+
+
+def test_get_http_head(test_executor):
+    with LocalServer({"/": (200, b"x" * 100000)}) as server:
+        settings = build_check(server.base_url + "/")
+        settings.method = "head"
+
+        result = test_executor._get_http(settings)
+        result_2 = test_executor._get_http(settings)
+
+    assert result.success
+    assert result.raw_response == ""
+    assert result_2.success
+    assert server.requests == [("HEAD", "/"), ("HEAD", "/")]
+    assert test_executor.session.stats.new_connections == 1
+
+
+def test_get_http_options(test_executor):
+    with LocalServer({"/": (204, b"")}) as server:
+        settings = build_check(server.base_url + "/")
+        settings.method = "OPTIONS"
+        settings.expected_status = [200, 204]
+
+        result = test_executor._get_http(settings)
+
+    assert result.success
+    assert server.requests == [("OPTIONS", "/")]
+
+
+def test_get_http_range(test_executor):
+    with LocalServer({"/": (206, b"x" * 16)}) as server:
+        settings = build_check(server.base_url + "/")
+        settings.range_bytes = 16
+
+        result = test_executor._get_http(settings)
+
+    assert result.success
+    assert server.headers[0]["Range"] == "bytes=0-15"
+
+
+def test_get_http_unexpected_status(test_executor):
+    with LocalServer({"/": (200, b"OK")}) as server:
+        settings = build_check(server.base_url + "/")
+        settings.expected_status = [204]
+
+        result = test_executor._get_http(settings)
+
+    assert not result.success
+    assert result.message == "200 OK"
+
+
+def test_get_http_unsupported_method(test_executor):
+    settings = build_check(TEST_URL)
+    settings.method = "DELETE"
+
+    result = test_executor._get_http(settings)
+
+    assert not result.success
+    assert result.message == "unsupported method DELETE"
+
+
+def test_get_http_assertions_stop_reading(test_executor):
+    body = b"UP" + b"x" * 100000
+    with LocalServer({"/": (200, body)}) as server:
+        settings = build_check(server.base_url + "/")
+        settings.assertions = [{"contains": "UP"}]
+        settings.max_body_bytes = 200000
+
+        result = test_executor._get_http(settings)
+
+    assert result.success
+    assert len(result.raw_response) < len(body)
+    assert not result.truncated
+
+
+def test_get_http_regex_at_chunk_boundary(test_executor):
+    # The first chunk of the body ends with "UP", the start of "UPGRADE"
+    with LocalServer({"/": (200, b" " * 8190 + b"UPGRADE FAILED")}) as server:
+        settings = build_check(server.base_url + "/")
+        settings.assertions = [{"regex": r"\bUP\b"}]
+
+        result = test_executor._get_http(settings)
+
+    assert not result.success
+    assert result.message == r"Assertion failed: body does not match /\bUP\b/"
+
+
+def test_get_http_assertion_failed(test_executor):
+    with LocalServer({"/": (200, b"status: DOWN")}) as server:
+        settings = build_check(server.base_url + "/")
+        settings.assertions = [{"contains": "UP"}]
+
+        result = test_executor._get_http(settings)
+
+    assert not result.success
+    assert result.message == 'Assertion failed: body does not contain "UP"'
+
+
+def test_get_http_json_response(test_executor):
+    with LocalServer(
+        {"/": (200, b'{"status": "UP"}', {"Content-Type": "application/json"})}
+    ) as server:
+        result = test_executor._get_http(build_check(server.base_url + "/"))
+
+    assert result.success
+    assert result.response == {"status": "UP"}
+
+
+def test_get_http_json_assertion(test_executor):
+    with LocalServer({"/": (200, b'{"status": "DOWN"}')}) as server:
+        settings = build_check(server.base_url + "/")
+        settings.assertions = [{"json_path": "$.status", "equals": "UP"}]
+
+        result = test_executor._get_http(settings)
+
+    assert not result.success
+    assert result.response == {"status": "DOWN"}
+    assert result.message == 'Assertion failed: $.status is "DOWN", expected "UP"'
+
+
+def test_get_http_json_assertion_truncated(test_executor):
+    with LocalServer({"/": (200, b'{"status": "UP", "pad": "' + b"x" * 100)}) as server:
+        settings = build_check(server.base_url + "/")
+        settings.assertions = [{"json_path": "$.status", "equals": "UP"}]
+        settings.max_body_bytes = 50
+
+        result = test_executor._get_http(settings)
+
+    assert not result.success
+    assert (
+        result.message
+        == "Assertion failed: $.status: response body exceeds max_body_bytes"
+    )
+
+
+def test_get_http_timings(test_executor):
+    with LocalServer({"/": (200, b"OK")}, SlowHandler) as server:
+        result = test_executor._get_http(build_check(server.base_url + "/"))
+
+    assert result.success
+    assert result.timings.ttfb >= 0.5
+    assert result.timings.total >= result.timings.ttfb
+    assert result.timings.transfer >= 0
+    assert not result.timings.reused
+
+
+@patch.object(
+    StatusPageOperator,
+    "update_component_status",
+    return_value=SimpleNamespace(**TEST_RESULT_DICT),
+)
+def test_execute_health_check_latency_degraded(
+    update_component_status, requests_mock, test_executor
+):
+    status_page_setting = StatusPageComponentSettings()
+    status_page_setting.component_id = "component-id"
+    latency = LatencySettings()
+    latency.degraded = 0.5
+    latency.partial_outage = 2
+    latency.min_samples = 3
+
+    settings = build_check(TEST_URL)
+    settings.status_page = status_page_setting
+    settings.latency = latency
+    requests_mock.get(settings.url, text="OK", status_code=200)
+
+    def check(seconds):
+        with patch("pi_monitor.healthchecks.time.perf_counter") as clock:
+            clock.side_effect = [0, seconds, seconds]
+            test_executor.execute_health_check(settings)
+
+    for seconds in [0.1, 0.1, 0.1]:
+        check(seconds)
+    for seconds in [1, 1, 1, 1]:
+        check(seconds)
+    for seconds in [5] * 10:
+        check(seconds)
+
+    assert [call[0][1] for call in update_component_status.call_args_list] == [
+        OpLevel.Operational,
+        OpLevel.Degraded,
+        OpLevel.Partial_Outage,
+    ]
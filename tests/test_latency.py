@@ -0,0 +1,64 @@
+from pi_monitor import LatencyHistogram
+import pytest
+
+
+def test_empty():
+    assert LatencyHistogram().percentile(95) is None
+
+
+def test_invalid_window():
+    with pytest.raises(ValueError) as e:
+        LatencyHistogram(0)
+
+    assert str(e.value) == "window must be at least 1"
+
+
+def test_percentiles():
+    histogram = LatencyHistogram(window=100000)
+    for index in range(1, 1001):
+        histogram.record(index / 1000)
+
+    assert histogram.percentile(50) == pytest.approx(0.5, rel=0.05)
+    assert histogram.percentile(95) == pytest.approx(0.95, rel=0.05)
+    assert histogram.percentile(99) == pytest.approx(0.99, rel=0.05)
+    assert histogram.percentile(100) == pytest.approx(1.0, rel=0.05)
+
+
+def test_out_of_range():
+    histogram = LatencyHistogram()
+    histogram.record(0)
+    histogram.record(10000)
+
+    assert histogram.percentile(0) == LatencyHistogram.MINIMUM
+    assert histogram.percentile(100) == pytest.approx(LatencyHistogram.MAXIMUM, 0.05)
+
+
+def test_old_samples_decay():
+    histogram = LatencyHistogram(window=5)
+    for _ in range(50):
+        histogram.record(2.0)
+    for _ in range(25):
+        histogram.record(0.1)
+
+    assert histogram.percentile(95) == pytest.approx(0.1, rel=0.05)
+    assert histogram.samples < 10
+
+
+def test_memory_is_bounded():
+    histogram = LatencyHistogram(window=1)
+    for index in range(100000):
+        histogram.record((index % 5000) / 100)
+
+    assert len(histogram.to_dict()["counts"]) <= LatencyHistogram.BUCKETS
+
+
+def test_to_dict_and_back():
+    histogram = LatencyHistogram(window=10)
+    for index in range(20):
+        histogram.record(index / 10)
+
+    restored = LatencyHistogram.from_dict(histogram.to_dict())
+
+    assert restored.window == 10
+    assert restored.samples == pytest.approx(histogram.samples)
+    assert restored.percentile(50) == histogram.percentile(50)
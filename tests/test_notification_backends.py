@@ -0,0 +1,199 @@
+import logging
+import smtplib
+import ssl
+from types import SimpleNamespace
+from unittest.mock import patch
+import pytest
+from .local_server import CERT_FILE, LocalServer
+from .local_smtp import LocalSmtpServer
+from pi_monitor import NotificationSettings, Notifier
+from pi_monitor.notification_backends import (
+    SendGridBackend,
+    SmtpBackend,
+    WebhookBackend,
+    create_backend,
+)
+
+
+def build_smtp_backend(server: LocalSmtpServer, password="secret") -> SmtpBackend:
+    return SmtpBackend(
+        "localhost",
+        server.port,
+        "sender@test.com",
+        password,
+        "test@test.com",
+        ssl_context=ssl.create_default_context(cafile=CERT_FILE),
+    )
+
+
+def test_smtp_sends_burst_over_one_session():
+    with LocalSmtpServer() as server:
+        backend = build_smtp_backend(server)
+        for i in range(5):
+            assert backend.send("Site A", f"Down {i}")
+        backend.close()
+
+    assert server.connections == 1
+    assert len(server.messages) == 5
+    user, message = server.messages[0]
+    assert user == "sender@test.com"
+    assert "Subject: Site A" in message
+    assert "To: test@test.com" in message
+    assert "Down 0" in message
+
+
+def test_smtp_reconnects_when_session_closed():
+    with LocalSmtpServer(close_after=2) as server:
+        backend = build_smtp_backend(server)
+        for i in range(5):
+            assert backend.send("Site A", f"Down {i}")
+        backend.close()
+
+    assert server.connections == 3
+    assert len(server.messages) == 5
+
+
+def test_smtp_authentication_failure():
+    with LocalSmtpServer() as server:
+        backend = build_smtp_backend(server, password="wrong")
+        with pytest.raises(smtplib.SMTPAuthenticationError):
+            backend.send("Site A", "Down")
+        backend.close()
+
+    assert server.messages == []
+
+
+def test_smtp_close_without_connection():
+    SmtpBackend("localhost", 25, "sender@test.com", None, "test@test.com").close()
+
+
+def test_webhook_posts_json():
+    with LocalServer({"/hook": (204, b"")}) as server:
+        backend = WebhookBackend(f"{server.base_url}/hook")
+        assert backend.send("Site A", "Down")
+        assert backend.send("Site B", "Down")
+        backend.close()
+
+    assert server.requests == [("POST", "/hook"), ("POST", "/hook")]
+    assert server.headers[0]["Content-Type"] == "application/json"
+
+
+def test_webhook_failure():
+    with LocalServer({"/hook": (500, b"Error")}) as server:
+        backend = WebhookBackend(f"{server.base_url}/hook")
+        assert backend.send("Site A", "Down") is False
+        backend.close()
+
+
+def test_notifier_with_webhook(caplog):
+    with LocalServer({"/hook": (200, b"OK")}) as server:
+        settings = NotificationSettings()
+        settings.backend = "webhook"
+        settings.webhook_url = f"{server.base_url}/hook"
+        notifier = Notifier(settings)
+
+        with caplog.at_level(logging.INFO):
+            assert notifier.notify("Site A", "Down")
+        notifier.close()
+
+    assert (
+        caplog.records[0].message == f"Sending Notification to {server.base_url}/hook"
+    )
+
+
+def test_notifier_webhook_error(caplog):
+    with LocalServer({}) as server:
+        url = f"{server.base_url}/hook"
+    settings = NotificationSettings()
+    settings.backend = "webhook"
+    settings.webhook_url = url
+    notifier = Notifier(settings)
+
+    with caplog.at_level(logging.ERROR):
+        assert notifier.notify("Site A", "Down") is False
+    notifier.close()
+
+    assert caplog.records[0].message.startswith(
+        "Error sending notification via webhook:"
+    )
+
+
+def test_notifier_without_webhook_url(caplog):
+    settings = NotificationSettings()
+    settings.backend = "webhook"
+    notifier = Notifier(settings)
+
+    with caplog.at_level(logging.INFO):
+        assert notifier.notify("Site A", "Down")
+    assert (
+        caplog.records[0].message
+        == "No webhook URL provided for notification.  Skipping..."
+    )
+
+
+def test_create_backend(email_settings):
+    email_settings.backend = "smtp"
+    smtp = create_backend(email_settings)
+    assert isinstance(smtp, SmtpBackend)
+    assert (smtp.host, smtp.port, smtp.starttls) == ("smtp.test.com", 587, True)
+
+    email_settings.backend = "sendgrid"
+    sendgrid = create_backend(email_settings)
+    assert isinstance(sendgrid, SendGridBackend)
+    assert sendgrid.destination == "test@test.com"
+    assert sendgrid.timeout == NotificationSettings.timeout
+
+    email_settings.backend = "smtp"
+    email_settings.sms_email = ""
+    assert create_backend(email_settings) is None
+
+
+def test_sendgrid_client_timeout(email_settings):
+    from sendgrid import SendGridAPIClient
+
+    email_settings.backend = "sendgrid"
+    email_settings.timeout = 5
+    backend = create_backend(email_settings)
+
+    with patch.object(
+        SendGridAPIClient, "send", return_value=SimpleNamespace(status_code=202)
+    ):
+        assert backend.send("Test", "Test")
+
+    assert backend._client.client.timeout == 5
+
+
+def test_create_backend_unknown(email_settings):
+    email_settings.backend = "pigeon"
+    with pytest.raises(ValueError) as e:
+        create_backend(email_settings)
+    assert str(e.value) == (
+        "Unknown notification backend 'pigeon': expected sendgrid, smtp, webhook"
+    )
+
+
+def test_webhook_payload():
+    payloads = []
+
+    class Session:
+        def post(self, url, json, timeout):
+            payloads.append((url, json, timeout))
+            return LocalResponse()
+
+        def close(self):
+            pass
+
+    class LocalResponse:
+        ok = True
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            pass
+
+    backend = WebhookBackend("http://hooks.test/notify", timeout=5, session=Session())
+    assert backend.send("Site A", "Down")
+    assert payloads == [
+        ("http://hooks.test/notify", {"subject": "Site A", "content": "Down"}, 5)
+    ]
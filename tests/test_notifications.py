@@ -1,8 +1,14 @@
 import logging
+import threading
 from sendgrid import SendGridAPIClient
 from types import SimpleNamespace
-from pi_monitor import Notifier, NotificationSettings
-from unittest.mock import patch
+from pi_monitor import (
+    NotificationDigest,
+    NotificationDispatcher,
+    Notifier,
+    NotificationSettings,
+)
+from unittest.mock import MagicMock, patch
 
 TEST_SUCCESS_RESPONSE = SimpleNamespace(status_code=202)
 
@@ -67,4 +73,248 @@ def test_email_exception(sendmail_send_mock, caplog):
 
     assert sendmail_send_mock.called
     assert result is False
-    assert caplog.records[0].message.startswith("Error sending mail:")
+    assert caplog.records[0].message == "Error sending notification via sendgrid: Test"
+
+
+@patch.object(SendGridAPIClient, "send", return_value=TEST_SUCCESS_RESPONSE)
+def test_email_reuses_client(sendmail_send_mock, email_settings):
+    notifier: Notifier = Notifier(email_settings)
+
+    with patch("sendgrid.SendGridAPIClient", wraps=SendGridAPIClient) as client_class:
+        assert notifier.notify("Test", "One")
+        assert notifier.notify("Test", "Two")
+
+    assert client_class.call_count == 1
+    assert sendmail_send_mock.call_count == 2
+
+
+def test_dispatcher_returns_before_sending():
+    release = threading.Event()
+    notifier = MagicMock()
+    notifier.notify.side_effect = lambda subject, content: release.wait(5)
+    dispatcher = NotificationDispatcher(notifier)
+
+    assert dispatcher.notify("Test", "One")
+    assert dispatcher.notify("Test", "Two")
+
+    release.set()
+    dispatcher.close()
+    assert [c.args for c in notifier.notify.call_args_list] == [
+        ("Test", "One"),
+        ("Test", "Two"),
+    ]
+
+
+def test_dispatcher_close_flushes_queue():
+    notifier = MagicMock()
+    notifier.notify.return_value = True
+    dispatcher = NotificationDispatcher(notifier)
+
+    for i in range(10):
+        dispatcher.notify("Test", str(i))
+    dispatcher.close()
+
+    assert notifier.notify.call_count == 10
+    assert dispatcher.notify("Test", "Late") is False
+
+
+def test_dispatcher_close_without_notifications():
+    dispatcher = NotificationDispatcher(MagicMock())
+    dispatcher.close()
+
+
+def test_dispatcher_close_is_bounded(caplog):
+    release = threading.Event()
+    notifier = MagicMock()
+    notifier.notify.side_effect = lambda subject, content: release.wait(5)
+    dispatcher = NotificationDispatcher(notifier, close_timeout=0.1)
+    dispatcher.notify("Test", "One")
+
+    with caplog.at_level(logging.ERROR):
+        dispatcher.close()
+    release.set()
+
+    assert not notifier.close.called
+    assert caplog.records[-1].message == (
+        "Notifications not sent within 0.1 seconds, abandoning them"
+    )
+
+
+def test_dispatcher_drops_when_full(caplog):
+    release = threading.Event()
+    started = threading.Event()
+    notifier = MagicMock()
+
+    def send(subject, content):
+        started.set()
+        return release.wait(5)
+
+    notifier.notify.side_effect = send
+    dispatcher = NotificationDispatcher(notifier, queue_size=1)
+
+    assert dispatcher.notify("Test", "Sending")
+    started.wait(5)
+    assert dispatcher.notify("Test", "Queued")
+    with caplog.at_level(logging.ERROR):
+        assert dispatcher.notify("Test", "Dropped") is False
+
+    release.set()
+    dispatcher.close()
+    assert notifier.notify.call_count == 2
+    assert caplog.records[0].message == "Notification queue is full, dropping: Test"
+
+
+def test_dispatcher_retries_with_backoff(caplog):
+    sleeps = []
+    notifier = MagicMock()
+    notifier.notify.side_effect = [False, Exception("Test"), True]
+    dispatcher = NotificationDispatcher(
+        notifier, max_retries=3, retry_backoff=0.5, sleep=sleeps.append
+    )
+
+    with caplog.at_level(logging.ERROR):
+        dispatcher.notify("Test", "Test")
+        dispatcher.flush()
+
+    assert notifier.notify.call_count == 3
+    assert sleeps == [0.5, 1.0]
+    assert caplog.records[0].message == "Error sending notification: Test"
+    dispatcher.close()
+
+
+def test_dispatcher_gives_up(caplog):
+    notifier = MagicMock()
+    notifier.notify.return_value = False
+    dispatcher = NotificationDispatcher(
+        notifier, max_retries=2, sleep=lambda seconds: None
+    )
+
+    with caplog.at_level(logging.ERROR):
+        dispatcher.notify("Test", "Test")
+        dispatcher.close()
+
+    assert notifier.notify.call_count == 3
+    assert (
+        caplog.records[-1].message == "Giving up on notification Test after 3 attempts"
+    )
+
+
+def test_dispatcher_from_settings(email_settings):
+    settings = email_settings
+    settings.queue_size = 5
+    settings.max_retries = 1
+    settings.retry_backoff = 2.0
+    notifier = Notifier(settings)
+
+    dispatcher = NotificationDispatcher.from_settings(notifier, settings)
+    assert dispatcher.notifier is notifier
+    assert dispatcher.max_retries == 1
+    assert dispatcher.retry_backoff == 2.0
+
+    defaults = NotificationDispatcher.from_settings(Notifier(None), None)
+    assert defaults.max_retries == NotificationSettings.max_retries
+
+
+def test_digest_without_window_sends_each_notification():
+    digest = NotificationDigest()
+
+    assert digest.add("Site A", "Down")
+    assert digest.delay() == 0
+    assert digest.take() == ("Site A", "Down")
+    assert digest.delay() is None
+    assert digest.take() is None
+
+
+def test_digest_first_alert_after_quiet_period_is_immediate(clock):
+    digest = NotificationDigest(window=60, clock=clock)
+
+    digest.add("Site A", "Down")
+    assert digest.delay() == 0
+    digest.take()
+
+    clock.now += 10
+    digest.add("Site B", "Down")
+    assert digest.delay() == 60
+    clock.now += 5
+    digest.add("Site C", "Degraded")
+    assert digest.delay() == 55
+
+    clock.now += 55
+    assert digest.take() == ("2 checks changed", "Site B: Down\nSite C: Degraded")
+
+    clock.now += 60
+    digest.add("Site D", "Down")
+    assert digest.delay() == 0
+
+
+def test_digest_cooldown_suppresses_repeats(caplog, clock):
+    digest = NotificationDigest(cooldown=300, clock=clock)
+
+    assert digest.add("Site A", "Down")
+    digest.take()
+    clock.now += 100
+    with caplog.at_level(logging.INFO):
+        assert digest.add("Site A", "Down") is False
+    assert digest.add("Site B", "Down")
+    assert caplog.records[0].message == (
+        "Suppressing notification for Site A during cooldown"
+    )
+
+    clock.now += 200
+    assert digest.add("Site A", "Down")
+
+
+def test_digest_cooldown_sends_recovery(clock):
+    digest = NotificationDigest(cooldown=300, clock=clock)
+
+    assert digest.add("Site A", "Major Service Outage")
+    clock.now += 10
+    assert digest.add("Site A", "Operating Normally")
+    clock.now += 10
+    assert digest.add("Site A", "Major Service Outage")
+    assert digest.add("Site A", "Major Service Outage") is False
+
+
+def test_dispatcher_sends_digest():
+    notifier = MagicMock()
+    notifier.notify.return_value = True
+    dispatcher = NotificationDispatcher(notifier, digest_window=60)
+
+    for name in ["Site A", "Site B", "Site C"]:
+        dispatcher.notify(name, "Down")
+    dispatcher.flush()
+
+    assert [c.args for c in notifier.notify.call_args_list] == [
+        ("Site A", "Down"),
+        ("2 checks changed", "Site B: Down\nSite C: Down"),
+    ]
+    dispatcher.close()
+
+
+def test_dispatcher_sends_digest_when_window_closes():
+    sent = threading.Event()
+    notifier = MagicMock()
+    notifier.notify.side_effect = lambda subject, content: sent.set() or True
+    dispatcher = NotificationDispatcher(notifier, digest_window=0.2)
+
+    dispatcher.notify("Site A", "Down")
+    dispatcher.flush()
+    sent.clear()
+    dispatcher.notify("Site B", "Down")
+
+    assert not sent.wait(0.05)
+    assert sent.wait(2)
+    assert notifier.notify.call_args.args == ("Site B", "Down")
+    dispatcher.close()
+
+
+def test_dispatcher_close_sends_held_digest():
+    notifier = MagicMock()
+    notifier.notify.return_value = True
+    dispatcher = NotificationDispatcher(notifier, digest_window=60)
+
+    dispatcher.notify("Site A", "Down")
+    dispatcher.notify("Site B", "Down")
+    dispatcher.close()
+
+    assert notifier.notify.call_count == 2
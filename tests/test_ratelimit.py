@@ -0,0 +1,105 @@
+import pytest
+import threading
+from pi_monitor import PriorityWriteQueue, TokenBucket
+
+
+def test_invalid_rate():
+    with pytest.raises(ValueError) as e:
+        TokenBucket(0)
+
+    assert str(e.value) == "rate must be greater than 0"
+
+
+def test_burst_then_rate(clock):
+    bucket = TokenBucket(2, 3, clock, clock.sleep)
+
+    waits = [bucket.acquire() for _ in range(5)]
+
+    assert waits == [0, 0, 0, 0.5, 0.5]
+    assert clock.now == 1.0
+
+
+def test_refill_capped_at_capacity(clock):
+    bucket = TokenBucket(1, 2, clock, clock.sleep)
+    bucket.acquire()
+    bucket.acquire()
+
+    clock.now += 100
+    waits = [bucket.acquire() for _ in range(3)]
+
+    assert waits == [0, 0, 1.0]
+
+
+def test_concurrent_callers_reserve_in_order(clock):
+    lock = threading.Lock()
+    waits = []
+
+    bucket = TokenBucket(10, 1, clock, lambda seconds: None)
+
+    def acquire():
+        wait_time = bucket.acquire()
+        with lock:
+            waits.append(wait_time)
+
+    threads = [threading.Thread(target=acquire) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(waits) == pytest.approx([0, 0.1, 0.2, 0.3, 0.4])
+
+
+def test_queue_runs_in_priority_order():
+    write_queue = PriorityWriteQueue()
+    started = threading.Event()
+    release = threading.Event()
+    order = []
+
+    def blocker():
+        started.set()
+        release.wait()
+
+    write_queue.submit(0, blocker)
+    started.wait()
+    futures = [
+        write_queue.submit(2, order.append, "resolve"),
+        write_queue.submit(1, order.append, "component-1"),
+        write_queue.submit(0, order.append, "create"),
+        write_queue.submit(1, order.append, "component-2"),
+    ]
+    release.set()
+    for future in futures:
+        future.result()
+    write_queue.close()
+
+    assert order == ["create", "component-1", "component-2", "resolve"]
+
+
+def test_queue_returns_results_and_exceptions():
+    write_queue = PriorityWriteQueue()
+
+    def fail():
+        raise RuntimeError("boom")
+
+    result = write_queue.submit(0, lambda a, b: a + b, 1, 2)
+    failure = write_queue.submit(0, fail)
+
+    assert result.result() == 3
+    with pytest.raises(RuntimeError):
+        failure.result()
+    write_queue.close()
+
+
+def test_queue_close_completes_pending_writes():
+    write_queue = PriorityWriteQueue()
+    results = []
+    for index in range(10):
+        write_queue.submit(1, results.append, index)
+    write_queue.close()
+
+    assert results == list(range(10))
+
+    write_queue.submit(1, results.append, 10).result()
+    write_queue.close()
+    assert results[-1] == 10
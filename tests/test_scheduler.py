@@ -0,0 +1,233 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pi_monitor import CheckScheduler, HealthCheckSettings
+
+
+def build_check(name: str, interval: int = None) -> HealthCheckSettings:
+    settings: HealthCheckSettings = HealthCheckSettings()
+    settings.name = name
+    settings.url = f"http://{name}.test.com"
+    settings.status_page = None
+    if interval is not None:
+        settings.interval = interval
+    return settings
+
+
+def test_all_checks_run_immediately(clock):
+    cycles = []
+    scheduler = CheckScheduler(
+        cycles.append, [build_check("a"), build_check("b")], clock=clock
+    )
+
+    assert scheduler.run_pending() == 2
+    assert [[check.name for check in cycle] for cycle in cycles] == [["a"], ["b"]]
+
+
+def test_checks_run_on_their_own_interval(clock):
+    cycles = []
+    scheduler = CheckScheduler(
+        cycles.append, [build_check("fast", 10), build_check("slow", 30)], clock=clock
+    )
+
+    ran = {}
+    for second in range(0, 61, 10):
+        clock.now = second
+        scheduler.run_pending()
+
+    for cycle in cycles:
+        for check in cycle:
+            ran[check.name] = ran.get(check.name, 0) + 1
+
+    assert ran == {"fast": 7, "slow": 3}
+
+
+def test_default_interval_used(clock):
+    cycles = []
+    scheduler = CheckScheduler(cycles.append, [build_check("a")], clock=clock)
+    scheduler.run_pending()
+
+    assert scheduler.seconds_until_next() == HealthCheckSettings.interval
+
+
+def test_overrun_does_not_catch_up(clock):
+    cycles = []
+
+    def slow_cycle(checks):
+        cycles.append(checks)
+        if len(cycles) == 1:
+            clock.now += 25
+
+    scheduler = CheckScheduler(slow_cycle, [build_check("a", 10)], clock=clock)
+    scheduler.run_pending()
+
+    assert clock.now == 25
+    assert scheduler.seconds_until_next() == 0
+    assert scheduler.run_pending() == 1
+    assert scheduler.run_pending() == 0
+    assert scheduler.seconds_until_next() == 10
+
+
+def test_cycle_exception_reschedules(caplog, clock):
+
+    def failing_cycle(checks):
+        raise RuntimeError("boom")
+
+    scheduler = CheckScheduler(failing_cycle, [build_check("a", 10)], clock=clock)
+    with caplog.at_level(logging.ERROR):
+        assert scheduler.run_pending() == 1
+
+    assert caplog.records[0].message == "Health check a failed: boom"
+    assert scheduler.seconds_until_next() == 10
+
+
+def test_run_stops_on_event():
+    stop_event = threading.Event()
+    cycles = []
+
+    def stopping_cycle(checks):
+        cycles.append(checks)
+        stop_event.set()
+
+    scheduler = CheckScheduler(stopping_cycle, [build_check("a")])
+    scheduler.run(stop_event)
+
+    assert len(cycles) == 1
+
+
+def test_update_checks_applies_differences(clock):
+    cycles = []
+    unchanged = build_check("unchanged", 10)
+    scheduler = CheckScheduler(
+        cycles.append,
+        [unchanged, build_check("removed", 10), build_check("changed", 10)],
+        clock=clock,
+    )
+    scheduler.run_pending()
+
+    clock.now = 5
+    changed = build_check("changed", 10)
+    changed.url = "http://changed.test.com/health"
+    added, removed, changes = scheduler.update_checks(
+        [build_check("unchanged", 10), changed, build_check("added", 10)]
+    )
+
+    assert (added, removed, changes) == (["added"], ["removed"], ["changed"])
+    assert scheduler.run_pending() == 1
+    assert [check.name for check in cycles[-1]] == ["added"]
+
+    clock.now = 10
+    assert scheduler.run_pending() == 2
+    assert cycles[-2] == [unchanged]
+    assert cycles[-1][0] is changed
+
+
+def test_update_checks_reschedules_interval(clock):
+    scheduler = CheckScheduler(lambda checks: None, [build_check("a", 60)], clock=clock)
+    scheduler.run_pending()
+
+    clock.now = 5
+    scheduler.update_checks([build_check("a", 20)])
+    assert scheduler.seconds_until_next() == 15
+
+    clock.now = 50
+    scheduler.update_checks([build_check("a", 30)])
+    assert scheduler.seconds_until_next() == 0
+
+
+def test_run_polls():
+    stop_event = threading.Event()
+    polls = []
+
+    def poll():
+        polls.append(len(polls))
+        if len(polls) == 3:
+            stop_event.set()
+
+    scheduler = CheckScheduler(lambda checks: None, [build_check("a")])
+    scheduler.run(stop_event, poll, poll_interval=0.01)
+
+    assert len(polls) == 3
+
+
+def test_slow_check_does_not_delay_others(clock):
+    release = threading.Event()
+    completed = threading.Event()
+    runs = []
+
+    def run_cycle(checks):
+        runs.append(checks[0].name)
+        if checks[0].name == "slow":
+            release.wait(5)
+        completed.set()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        scheduler = CheckScheduler(
+            run_cycle,
+            [build_check("slow", 10), build_check("fast", 10)],
+            clock=clock,
+            executor=executor,
+        )
+        assert scheduler.run_pending() == 2
+        assert completed.wait(5)
+
+        clock.now = 10
+        assert scheduler.run_pending() == 1
+        release.set()
+
+    assert runs.count("fast") == 2
+    assert runs.count("slow") == 1
+    # The slow check overran its interval, so it is due again at once
+    assert scheduler.seconds_until_next() == 0
+
+
+def test_update_checks_while_running(clock):
+    release = threading.Event()
+    started = threading.Semaphore(0)
+
+    def run_cycle(checks):
+        started.release()
+        release.wait(5)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        scheduler = CheckScheduler(
+            run_cycle,
+            [build_check("removed", 10), build_check("changed", 10)],
+            clock=clock,
+            executor=executor,
+        )
+        scheduler.run_pending()
+        started.acquire(timeout=5)
+        started.acquire(timeout=5)
+
+        changed = build_check("changed", 30)
+        added, removed, changes = scheduler.update_checks([changed])
+        assert (added, removed, changes) == ([], ["removed"], ["changed"])
+        assert scheduler.seconds_until_next() is None
+        release.set()
+
+    clock.now = 5
+    assert scheduler.seconds_until_next() == 25
+    assert scheduler.update_checks([changed]) == ([], [], [])
+
+
+def test_run_wakes_when_check_completes():
+    stop_event = threading.Event()
+    runs = []
+
+    def run_cycle(checks):
+        runs.append(checks[0].name)
+        if len(runs) == 1:
+            # Still running when the scheduler starts to wait
+            time.sleep(0.1)
+        else:
+            stop_event.set()
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        scheduler = CheckScheduler(
+            run_cycle, [build_check("a", 1)], default_interval=60, executor=executor
+        )
+        scheduler.run(stop_event)
+
+    assert runs == ["a", "a"]
@@ -0,0 +1,78 @@
+import json
+import subprocess
+import sys
+import pytest
+import pi_monitor
+from .local_server import LocalServer
+
+CHECK_MODULES = """
+import sys
+{statement}
+modules = ("asyncio", "aiohttp", "sendgrid", "smtplib", "requests")
+print(",".join(m for m in modules if m in sys.modules))
+"""
+
+
+def loaded_modules(statement: str) -> set:
+    result = subprocess.run(
+        [sys.executable, "-c", CHECK_MODULES.format(statement=statement)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(filter(None, result.stdout.strip().split(",")))
+
+
+def test_import_is_lazy():
+    assert loaded_modules("import pi_monitor") == set()
+
+
+def test_command_defers_optional_modules():
+    assert loaded_modules("from pi_monitor import main") == {"requests"}
+
+
+def test_lazy_attributes():
+    assert pi_monitor.Notifier is pi_monitor.notifications.Notifier
+    assert "HealthCheckExecutor" in dir(pi_monitor)
+    with pytest.raises(AttributeError):
+        pi_monitor.NotAName
+
+
+def test_main_without_status_page(tmp_path):
+    with LocalServer({"/": (200, b"OK")}) as server:
+        config = {"status_checks": [{"name": "Site", "url": server.base_url + "/"}]}
+        config_file = tmp_path / "monitor.config.json"
+        config_file.write_text(json.dumps(config))
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "from pi_monitor import main; main()",
+                "-c",
+                str(config_file),
+            ],
+            capture_output=True,
+            text=True,
+        )
+
+    assert result.returncode == 0, result.stderr
+    assert "statuspage.io will not be updated" in result.stderr
+    assert server.requests == [("GET", "/")]
+
+
+def test_main_without_configuration(tmp_path):
+    config_file = tmp_path / "monitor.config.json"
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "from pi_monitor import main; main()",
+            "-c",
+            str(config_file),
+        ],
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode == 1
+    assert f"Configuration file not found: {config_file}" in result.stderr
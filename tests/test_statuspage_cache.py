@@ -0,0 +1,142 @@
+import json
+import logging
+from types import SimpleNamespace
+from pi_monitor import ComponentStatusCache, IncidentIndex
+
+
+def test_get_missing():
+    cache = ComponentStatusCache()
+
+    assert cache.get("component-id") is None
+
+
+def test_set_and_get():
+    cache = ComponentStatusCache()
+    cache.set("component-id", "operational")
+
+    assert cache.get("component-id") == "operational"
+
+
+def test_entry_expires(clock):
+    cache = ComponentStatusCache(60, clock)
+    cache.set("component-id", "operational")
+
+    clock.now += 59
+    assert cache.get("component-id") == "operational"
+    clock.now += 1
+    assert cache.get("component-id") is None
+
+
+def test_zero_ttl_disables_cache():
+    cache = ComponentStatusCache(0)
+    cache.set("component-id", "operational")
+
+    assert cache.get("component-id") is None
+
+
+def test_invalidate():
+    cache = ComponentStatusCache()
+    cache.set("component-id", "operational")
+    cache.invalidate("component-id")
+    cache.invalidate("missing")
+
+    assert cache.get("component-id") is None
+
+
+def test_save_and_load(tmp_path, clock):
+    cache_file = tmp_path / "components.json"
+    cache = ComponentStatusCache(60, clock)
+    cache.set("component-id", "operational")
+    cache.set("component-id-2", "major_outage")
+    cache.save(str(cache_file))
+
+    loaded = ComponentStatusCache(60, clock)
+    loaded.load(str(cache_file))
+
+    assert loaded.get("component-id") == "operational"
+    assert loaded.get("component-id-2") == "major_outage"
+    assert list(tmp_path.iterdir()) == [cache_file]
+
+
+def test_load_skips_expired(tmp_path, clock):
+    cache_file = tmp_path / "components.json"
+    cache_file.write_text(
+        json.dumps(
+            {
+                "components": {
+                    "fresh": {"status": "operational", "updated": clock.now - 10},
+                    "stale": {"status": "operational", "updated": clock.now - 100},
+                }
+            }
+        )
+    )
+
+    cache = ComponentStatusCache(60, clock)
+    cache.load(str(cache_file))
+
+    assert cache.get("fresh") == "operational"
+    assert cache.get("stale") is None
+
+
+def test_load_missing_file(tmp_path):
+    cache = ComponentStatusCache()
+    cache.load(str(tmp_path / "missing.json"))
+
+    assert cache.get("component-id") is None
+
+
+def test_load_invalid_file(tmp_path, caplog):
+    cache_file = tmp_path / "components.json"
+    cache_file.write_text("not json")
+
+    cache = ComponentStatusCache()
+    with caplog.at_level(logging.WARNING):
+        cache.load(str(cache_file))
+
+    assert caplog.records[0].message.startswith(
+        f"Ignoring invalid component cache {cache_file}"
+    )
+
+
+def test_save_failure(tmp_path, caplog):
+    cache = ComponentStatusCache()
+    cache.set("component-id", "operational")
+    cache_file = tmp_path / "missing" / "components.json"
+
+    with caplog.at_level(logging.WARNING):
+        cache.save(str(cache_file))
+
+    assert caplog.records[0].message.startswith(
+        f"Failed to save component cache {cache_file}"
+    )
+
+
+def test_incident_index():
+    first = SimpleNamespace(
+        id="incident-id",
+        components=[
+            SimpleNamespace(id="component-id"),
+            SimpleNamespace(id="component-id-2"),
+        ],
+    )
+    second = SimpleNamespace(
+        id="incident-id-2", components=[SimpleNamespace(id="component-id-2")]
+    )
+    index = IncidentIndex([first, second])
+
+    assert index.get("component-id") == [first]
+    assert index.get("component-id-2") == [first, second]
+    assert index.get("component-id-3") == []
+
+
+def test_incident_index_add_remove():
+    index = IncidentIndex()
+    incident = SimpleNamespace(id="incident-id")
+    index.add(incident, ["component-id", "component-id-2"])
+
+    assert index.get("component-id") == [incident]
+
+    index.remove("incident-id")
+
+    assert index.get("component-id") == []
+    assert index.get("component-id-2") == []
@@ -1,7 +1,10 @@
-from pi_monitor import StatusPageClient
+from pi_monitor import PriorityWriteQueue, StatusPageClient, TokenBucket
 import logging
 import requests
 import pytest
+import time
+from unittest.mock import patch
+from .local_server import LocalServer
 
 TEST_PAGE_ID = "page-id"
 TEST_API_KEY = "api-key"
@@ -84,7 +87,8 @@ def test_get_component_not_found(caplog, requests_mock, test_statuspage_client):
         requests_mock.last_request.headers[test_statuspage_client.AUTH_HEADER]
         == f"OAuth {test_statuspage_client.api_key}"
     )
-    assert component.error == "Could not find component"
+    assert component is None
+    assert "Component component-id not found" in caplog.text
     assert (
         f"Retrieving component from StatusPage: {expected_url}"
         in caplog.records[0].message
@@ -175,6 +179,25 @@ def test_update_component_exception(caplog, requests_mock, test_statuspage_clien
     )
 
 
+def test_update_component_error_status(caplog, requests_mock, test_statuspage_client):
+    page_id = test_statuspage_client.page_id
+    expected_url: str = (
+        f"{test_statuspage_client.STATUS_PAGE_BASE_URL}"
+        f"/{page_id}/components/component-id"
+    )
+    requests_mock.put(expected_url, json={"error": "rate limited"}, status_code=429)
+    payload = {"component": {"status": "major_outage"}}
+    with caplog.at_level(logging.ERROR):
+        component: object = test_statuspage_client.update_component(
+            "component-id", payload
+        )
+
+    assert component is None
+    assert caplog.records[0].message.startswith(
+        test_statuspage_client.CLIENT_ERROR_MESSAGE
+    )
+
+
 def test_get_unresolved_incidents(caplog, requests_mock, test_statuspage_client):
     page_id = test_statuspage_client.page_id
     expected_url = (
@@ -219,6 +242,16 @@ def test_get_unresolved_incidents_exception(
     )
 
 
+def test_get_unresolved_incidents_error_status(requests_mock, test_statuspage_client):
+    page_id = test_statuspage_client.page_id
+    expected_url = (
+        f"{test_statuspage_client.STATUS_PAGE_BASE_URL}/{page_id}/incidents/unresolved"
+    )
+    requests_mock.get(expected_url, json={"error": "rate limited"}, status_code=429)
+
+    assert test_statuspage_client.get_unresolved_incidents() is None
+
+
 def test_create_incident(caplog, requests_mock, test_statuspage_client):
     page_id = test_statuspage_client.page_id
     expected_url = f"{test_statuspage_client.STATUS_PAGE_BASE_URL}/{page_id}/incidents"
@@ -335,3 +368,266 @@ def test_update_incident_exception(caplog, requests_mock, test_statuspage_client
     assert caplog.records[0].message.startswith(
         test_statuspage_client.CLIENT_ERROR_MESSAGE
     )
+
+
+def build_local_client(server: LocalServer) -> StatusPageClient:
+    client = StatusPageClient(TEST_API_KEY, TEST_PAGE_ID, backoff_factor=0)
+    client.STATUS_PAGE_BASE_URL = f"{server.base_url}/v1/pages"
+    return client
+
+
+def test_session_headers(test_statuspage_client):
+    headers = test_statuspage_client.session.headers
+
+    assert (
+        headers[test_statuspage_client.AUTH_HEADER]
+        == f"OAuth {test_statuspage_client.api_key}"
+    )
+    assert headers["Content-Type"] == "application/json"
+
+
+def test_connection_reused():
+    component_path = f"/v1/pages/{TEST_PAGE_ID}/components/component-id"
+    with LocalServer({component_path: (200, b'{"status": "operational"}')}) as server:
+        client = build_local_client(server)
+        for _ in range(3):
+            assert client.get_component("component-id").status == "operational"
+
+    assert client.session.stats.requests == 3
+    assert client.session.stats.new_connections == 1
+
+
+def test_base_url():
+    component_path = f"/stand-in/v1/pages/{TEST_PAGE_ID}/components/component-id"
+    with LocalServer({component_path: (200, b'{"status": "operational"}')}) as server:
+        client = StatusPageClient(
+            TEST_API_KEY, TEST_PAGE_ID, base_url=f"{server.base_url}/stand-in/v1/pages/"
+        )
+        component = client.get_component("component-id")
+
+    assert component.status == "operational"
+    assert server.requests == [("GET", component_path)]
+
+
+def test_retry_rate_limited_get():
+    component_path = f"/v1/pages/{TEST_PAGE_ID}/components/component-id"
+    routes = {
+        component_path: [
+            (429, b'{"error": "rate limited"}', {"Retry-After": "0"}),
+            (503, b'{"error": "unavailable"}'),
+            (200, b'{"status": "operational"}'),
+        ]
+    }
+    with LocalServer(routes) as server:
+        component = build_local_client(server).get_component("component-id")
+
+    assert component.status == "operational"
+    assert len(server.requests) == 3
+
+
+def test_retry_rate_limited_post():
+    incident_path = f"/v1/pages/{TEST_PAGE_ID}/incidents"
+    routes = {
+        incident_path: [
+            (429, b'{"error": "rate limited"}'),
+            (201, b'{"id": "incident-id"}'),
+        ]
+    }
+    with LocalServer(routes) as server:
+        incident = build_local_client(server).create_incident({"incident": {}})
+
+    assert incident.id == "incident-id"
+    assert server.requests == [("POST", incident_path), ("POST", incident_path)]
+
+
+def test_no_retry_server_error_post():
+    incident_path = f"/v1/pages/{TEST_PAGE_ID}/incidents"
+    routes = {
+        incident_path: [
+            (500, b'{"error": "server error"}'),
+            (201, b'{"id": "incident-id"}'),
+        ]
+    }
+    with LocalServer(routes) as server:
+        incident = build_local_client(server).create_incident({"incident": {}})
+
+    assert incident is None
+    assert len(server.requests) == 1
+
+
+def test_retry_server_error_patch():
+    incident_path = f"/v1/pages/{TEST_PAGE_ID}/incidents/incident-id"
+    routes = {
+        incident_path: [
+            (502, b'{"error": "bad gateway"}'),
+            (200, b'{"id": "incident-id"}'),
+        ]
+    }
+    with LocalServer(routes) as server:
+        incident = build_local_client(server).update_incident(
+            "incident-id", {"incident": {"status": "resolved"}}
+        )
+
+    assert incident.id == "incident-id"
+    assert len(server.requests) == 2
+
+
+def test_retries_exhausted():
+    component_path = f"/v1/pages/{TEST_PAGE_ID}/components/component-id"
+    routes = {component_path: (429, b'{"error": "rate limited"}')}
+    with LocalServer(routes) as server:
+        client = StatusPageClient(TEST_API_KEY, TEST_PAGE_ID, 2, 0)
+        client.STATUS_PAGE_BASE_URL = f"{server.base_url}/v1/pages"
+        component = client.get_component("component-id")
+
+    assert component is None
+    assert len(server.requests) == 3
+
+
+def test_retries_are_rate_limited():
+    component_path = f"/v1/pages/{TEST_PAGE_ID}/components/component-id"
+    routes = {
+        component_path: [
+            (429, b'{"error": "rate limited"}', {"Retry-After": "0"}),
+            (503, b'{"error": "unavailable"}'),
+            (200, b'{"status": "operational"}'),
+        ]
+    }
+    with LocalServer(routes) as server:
+        client = build_local_client(server)
+        with patch.object(
+            client.rate_limiter, "acquire", return_value=0
+        ) as acquire_mock:
+            client.get_component("component-id")
+
+    assert len(server.requests) == 3
+    assert acquire_mock.call_count == 3
+
+
+def test_long_retry_after_not_retried():
+    component_path = f"/v1/pages/{TEST_PAGE_ID}/components/component-id"
+    routes = {
+        component_path: [
+            (429, b'{"error": "rate limited"}', {"Retry-After": "3600"}),
+            (200, b'{"status": "operational"}'),
+        ]
+    }
+    with LocalServer(routes) as server:
+        client = build_local_client(server)
+        started = time.monotonic()
+        component = client.get_component("component-id")
+        elapsed = time.monotonic() - started
+
+    assert component is None
+    assert len(server.requests) == 1
+    assert elapsed < 1
+
+
+def test_short_retry_after_retried():
+    component_path = f"/v1/pages/{TEST_PAGE_ID}/components/component-id"
+    routes = {
+        component_path: [
+            (429, b'{"error": "rate limited"}', {"Retry-After": "1"}),
+            (200, b'{"status": "operational"}'),
+        ]
+    }
+    with LocalServer(routes) as server:
+        client = StatusPageClient(
+            TEST_API_KEY, TEST_PAGE_ID, backoff_factor=0, max_retry_after=1
+        )
+        client.STATUS_PAGE_BASE_URL = f"{server.base_url}/v1/pages"
+        component = client.get_component("component-id")
+
+    assert component.status == "operational"
+    assert len(server.requests) == 2
+
+
+def test_get_components(caplog, requests_mock, test_statuspage_client):
+    page_id = test_statuspage_client.page_id
+    expected_url = f"{test_statuspage_client.STATUS_PAGE_BASE_URL}/{page_id}/components"
+    requests_mock.get(
+        expected_url,
+        json=[
+            {"id": "component-id", "status": "operational"},
+            {"id": "component-id-2", "status": "major_outage"},
+        ],
+    )
+
+    with caplog.at_level(logging.DEBUG):
+        components = test_statuspage_client.get_components()
+
+    assert requests_mock.called
+    assert len(components) == 2
+    assert components[1].id == "component-id-2"
+    assert components[1].status == "major_outage"
+    assert (
+        f"Retrieving components from StatusPage: {expected_url}"
+        in caplog.records[0].message
+    )
+
+
+def test_get_components_error(caplog, requests_mock, test_statuspage_client):
+    page_id = test_statuspage_client.page_id
+    expected_url = f"{test_statuspage_client.STATUS_PAGE_BASE_URL}/{page_id}/components"
+    requests_mock.get(expected_url, json={"error": "Unauthorized"}, status_code=401)
+
+    with caplog.at_level(logging.ERROR):
+        components = test_statuspage_client.get_components()
+
+    assert components is None
+    assert caplog.records[0].message.startswith(
+        test_statuspage_client.CLIENT_ERROR_MESSAGE
+    )
+
+
+def test_requests_are_rate_limited(requests_mock, test_statuspage_client):
+    page_id = test_statuspage_client.page_id
+    component_url = (
+        f"{test_statuspage_client.STATUS_PAGE_BASE_URL}"
+        f"/{page_id}/components/component-id"
+    )
+    requests_mock.get(component_url, json={"status": "operational"})
+    requests_mock.put(component_url, json={"status": "operational"})
+
+    with patch.object(TokenBucket, "acquire", return_value=0) as acquire_mock:
+        test_statuspage_client.get_component("component-id")
+        test_statuspage_client.update_component("component-id", {})
+
+    assert acquire_mock.call_count == 2
+
+
+def test_writes_use_priority_queue(requests_mock, test_statuspage_client):
+    page_id = test_statuspage_client.page_id
+    base_url = f"{test_statuspage_client.STATUS_PAGE_BASE_URL}/{page_id}"
+    requests_mock.put(f"{base_url}/components/component-id", json={})
+    requests_mock.post(f"{base_url}/incidents", json={})
+    requests_mock.patch(f"{base_url}/incidents/incident-id", json={})
+
+    with patch.object(
+        PriorityWriteQueue,
+        "submit",
+        wraps=test_statuspage_client.write_queue.submit,
+    ) as submit_mock:
+        test_statuspage_client.create_incident({})
+        test_statuspage_client.update_component("component-id", {})
+        test_statuspage_client.update_incident("incident-id", {})
+    test_statuspage_client.close()
+
+    assert [call[0][0] for call in submit_mock.call_args_list] == [
+        StatusPageClient.PRIORITY_CREATE_INCIDENT,
+        StatusPageClient.PRIORITY_UPDATE_COMPONENT,
+        StatusPageClient.PRIORITY_UPDATE_INCIDENT,
+    ]
+    assert requests_mock.call_count == 3
+
+
+def test_requests_use_timeout(requests_mock):
+    client = StatusPageClient(TEST_API_KEY, TEST_PAGE_ID, connect_timeout=2)
+    requests_mock.get(
+        f"{client.STATUS_PAGE_BASE_URL}/{TEST_PAGE_ID}/components",
+        json=[],
+    )
+
+    client.get_components()
+
+    assert requests_mock.last_request.timeout == (2, 30)
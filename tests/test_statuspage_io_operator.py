@@ -8,6 +8,7 @@ from pi_monitor import (
     Incident,
 )
 from unittest.mock import patch
+from types import SimpleNamespace
 from .statuspage_io_operator_objects import TestObjects
 
 TEST_API_KEY = "apikey"
@@ -165,17 +166,14 @@ def test_update_component_status_to_outage_component_failed(
     assert update_mock.called
     assert update_mock.call_args[0][0] == component_id
 
-    assert unresolved_incident_mock.called
-
-    assert create_incident_mock.called
-    assert (
-        create_incident_mock.call_args[0][0]["incident"]["name"] == test_incident.name
-    )
-    assert create_incident_mock.call_args[0][0]["incident"]["status"] == "investigating"
-
+    # The incident is left to the retry of the status
+    assert unresolved_incident_mock.called is False
+    assert create_incident_mock.called is False
     assert update_incident_mock.called is False
 
     assert result.status_changed is True
+    assert result.applied is False
+    assert result.incident_result.incident_created is False
     assert caplog.records[0].message == f"Failed to update component {component_id}"
 
 
@@ -254,3 +252,583 @@ def test_update_component_status_operational(
     assert update_incident_mock.call_args[0][0] == TestObjects.EXISTING_INCIDENT.id
 
     assert result.status_changed
+
+
+@patch.object(
+    StatusPageClient, "get_component", return_value=TestObjects.GET_WORKING_COMPONENT
+)
+@patch.object(
+    StatusPageClient, "update_component", return_value=TestObjects.UPDATE_RETURN
+)
+def test_update_component_status_cached(update_mock, get_mock, test_operator):
+    test_operator.update_component_status("component-id", OpLevel.Operational)
+    result = test_operator.update_component_status("component-id", OpLevel.Operational)
+
+    assert get_mock.call_count == 1
+    assert update_mock.called is False
+    assert result.status_changed is False
+
+
+@patch.object(StatusPageClient, "update_incident", return_value=None)
+@patch.object(StatusPageClient, "create_incident", return_value=[])
+@patch.object(StatusPageClient, "get_unresolved_incidents", return_value=[])
+@patch.object(
+    StatusPageClient, "get_component", return_value=TestObjects.GET_WORKING_COMPONENT
+)
+@patch.object(
+    StatusPageClient, "update_component", return_value=TestObjects.UPDATE_RETURN
+)
+def test_update_component_status_cache_write_through(
+    update_mock,
+    get_mock,
+    unresolved_incident_mock,
+    create_incident_mock,
+    update_incident_mock,
+    test_operator,
+    test_incident,
+):
+    component_id = "component-id"
+    test_operator.cache.set(component_id, "operational")
+
+    result = test_operator.update_component_status(
+        component_id, OpLevel.Full_Outage, test_incident
+    )
+
+    assert get_mock.call_count == 1
+    assert result.status_changed is True
+    assert test_operator.cache.get(component_id) == "major_outage"
+
+    result = test_operator.update_component_status(
+        component_id, OpLevel.Full_Outage, test_incident
+    )
+    assert get_mock.call_count == 1
+    assert update_mock.call_count == 1
+    assert result.status_changed is False
+
+
+@patch.object(
+    StatusPageClient, "get_component", return_value=TestObjects.GET_WORKING_COMPONENT
+)
+@patch.object(StatusPageClient, "update_component", return_value=None)
+@patch.object(StatusPageClient, "get_unresolved_incidents", return_value=None)
+@patch.object(StatusPageClient, "create_incident", return_value=None)
+def test_update_component_status_failed_write_invalidates(
+    create_incident_mock,
+    unresolved_incident_mock,
+    update_mock,
+    get_mock,
+    test_operator,
+    test_incident,
+):
+    component_id = "component-id"
+    test_operator.update_component_status(
+        component_id, OpLevel.Full_Outage, test_incident
+    )
+
+    assert test_operator.cache.get(component_id) is None
+
+
+@patch.object(
+    StatusPageClient, "get_component", return_value=TestObjects.NOT_FOUND_COMPONENT
+)
+def test_update_component_status_not_found(get_mock, test_operator, caplog):
+    component_id = "component-id"
+    with caplog.at_level(logging.WARNING):
+        result = test_operator.update_component_status(
+            component_id, OpLevel.Operational
+        )
+
+    assert result.status_changed is False
+    assert f"Failed to retrieve component {component_id}" == caplog.records[0].message
+
+
+def test_cache_file(test_settings, tmp_path):
+    cache_file = tmp_path / "components.json"
+    test_settings.cache_file = str(cache_file)
+    operator = StatusPageOperator(test_settings)
+    operator.cache.set("component-id", "operational")
+    operator.save_cache()
+
+    loaded = StatusPageOperator(test_settings)
+    assert loaded.cache.get("component-id") == "operational"
+
+
+@patch.object(
+    StatusPageClient, "get_components", return_value=TestObjects.COMPONENT_LIST
+)
+@patch.object(
+    StatusPageClient, "get_component", return_value=TestObjects.GET_WORKING_COMPONENT
+)
+@patch.object(
+    StatusPageClient, "update_component", return_value=TestObjects.UPDATE_RETURN
+)
+@patch.object(StatusPageClient, "get_unresolved_incidents", return_value=[])
+@patch.object(StatusPageClient, "create_incident", return_value=[])
+def test_update_component_status_from_snapshot(
+    create_incident_mock,
+    unresolved_incident_mock,
+    update_mock,
+    get_mock,
+    get_components_mock,
+    test_operator,
+    test_incident,
+):
+    test_operator.cache.ttl = 0
+    test_operator.begin_cycle()
+
+    unchanged = test_operator.update_component_status(
+        "component-id", OpLevel.Operational
+    )
+    changed = test_operator.update_component_status(
+        "component-id-2", OpLevel.Full_Outage, test_incident
+    )
+    repeated = test_operator.update_component_status(
+        "component-id-2", OpLevel.Full_Outage, test_incident
+    )
+    test_operator.end_cycle()
+
+    assert get_components_mock.call_count == 1
+    assert get_mock.called is False
+    assert unchanged.status_changed is False
+    assert changed.status_changed is True
+    assert repeated.status_changed is False
+    assert update_mock.call_count == 1
+
+
+@patch.object(
+    StatusPageClient, "get_unresolved_incidents", return_value=SimpleNamespace()
+)
+@patch.object(
+    StatusPageClient, "create_incident", return_value=TestObjects.CREATED_INCIDENT
+)
+@patch.object(
+    StatusPageClient, "get_component", return_value=TestObjects.GET_WORKING_COMPONENT
+)
+@patch.object(
+    StatusPageClient, "update_component", return_value=TestObjects.UPDATE_RETURN
+)
+def test_update_component_status_incidents_unavailable(
+    update_mock,
+    get_mock,
+    create_incident_mock,
+    unresolved_incident_mock,
+    test_operator,
+    test_incident,
+    caplog,
+):
+    with caplog.at_level(logging.WARNING):
+        result = test_operator.update_component_status(
+            "component-id", OpLevel.Full_Outage, test_incident
+        )
+
+    assert result.applied is True
+    assert result.incident_result.incident_created is True
+    assert "Failed to retrieve unresolved incidents" in caplog.text
+
+
+@patch.object(StatusPageClient, "get_unresolved_incidents", return_value=[])
+@patch.object(StatusPageClient, "create_incident", return_value=None)
+@patch.object(
+    StatusPageClient, "get_component", return_value=TestObjects.GET_WORKING_COMPONENT
+)
+@patch.object(
+    StatusPageClient, "update_component", return_value=TestObjects.UPDATE_RETURN
+)
+def test_update_component_status_incident_not_created(
+    update_mock,
+    get_mock,
+    create_incident_mock,
+    unresolved_incident_mock,
+    test_operator,
+    test_incident,
+):
+    result = test_operator.update_component_status(
+        "component-id", OpLevel.Full_Outage, test_incident
+    )
+
+    assert create_incident_mock.called
+    assert result.incident_result.incident_created is False
+
+
+@patch.object(StatusPageClient, "update_incident", return_value=None)
+@patch.object(
+    StatusPageClient,
+    "get_unresolved_incidents",
+    return_value=TestObjects.UNRESOLVED_INCIDENTS,
+)
+@patch.object(
+    StatusPageClient, "get_component", return_value=TestObjects.GET_DOWN_COMPONENT
+)
+@patch.object(
+    StatusPageClient, "update_component", return_value=TestObjects.UPDATE_RETURN
+)
+def test_update_component_status_incident_not_resolved(
+    update_mock,
+    get_mock,
+    unresolved_incident_mock,
+    update_incident_mock,
+    test_operator,
+):
+    result = test_operator.update_component_status("component-id", OpLevel.Operational)
+
+    assert update_incident_mock.called
+    assert result.incident_result.incident_resolved is False
+
+
+@patch.object(
+    StatusPageClient, "get_components", return_value=TestObjects.COMPONENT_LIST
+)
+@patch.object(StatusPageClient, "get_unresolved_incidents", return_value=[])
+@patch.object(StatusPageClient, "create_incident", return_value=[])
+def test_update_component_status_rate_limited(
+    create_incident_mock,
+    unresolved_incident_mock,
+    get_components_mock,
+    requests_mock,
+    test_operator,
+    test_incident,
+):
+    client = test_operator.client
+    requests_mock.put(
+        f"{client.STATUS_PAGE_BASE_URL}/{client.page_id}/components/component-id",
+        json={"error": "rate limited"},
+        status_code=429,
+    )
+    test_operator.begin_cycle()
+    test_operator.update_component_status(
+        "component-id", OpLevel.Full_Outage, test_incident
+    )
+
+    assert test_operator._get_snapshot_status("component-id") == "operational"
+    assert test_operator.cache.get("component-id") is None
+    test_operator.end_cycle()
+
+
+@patch.object(StatusPageClient, "get_components", return_value=None)
+@patch.object(
+    StatusPageClient, "get_component", return_value=TestObjects.GET_WORKING_COMPONENT
+)
+def test_update_component_status_snapshot_failed(
+    get_mock, get_components_mock, test_operator, caplog
+):
+    with caplog.at_level(logging.WARNING):
+        test_operator.begin_cycle()
+    result = test_operator.update_component_status("component-id", OpLevel.Operational)
+
+    assert caplog.records[0].message == "Failed to retrieve components"
+    assert get_mock.called
+    assert result.status_changed is False
+
+
+@patch.object(
+    StatusPageClient, "get_components", return_value=TestObjects.COMPONENT_LIST
+)
+@patch.object(
+    StatusPageClient, "get_component", return_value=TestObjects.GET_WORKING_COMPONENT
+)
+def test_update_component_status_not_in_snapshot(
+    get_mock, get_components_mock, test_operator
+):
+    test_operator.begin_cycle()
+    result = test_operator.update_component_status(
+        "component-id-3", OpLevel.Operational
+    )
+
+    assert get_mock.called
+    assert result.status_changed is False
+
+
+@patch.object(
+    StatusPageClient, "get_components", return_value=TestObjects.COMPONENT_LIST
+)
+@patch.object(StatusPageClient, "get_component")
+def test_begin_cycle_uses_fresh_cache(get_mock, get_components_mock, test_operator):
+    test_operator.cache.set("component-id", "operational")
+    test_operator.begin_cycle(["component-id"])
+    result = test_operator.update_component_status("component-id", OpLevel.Operational)
+
+    assert not get_components_mock.called
+    assert not get_mock.called
+    assert result.status_changed is False
+    test_operator.end_cycle()
+
+
+@patch.object(
+    StatusPageClient, "get_components", return_value=TestObjects.COMPONENT_LIST
+)
+def test_begin_cycle_reads_components_not_cached(get_components_mock, test_operator):
+    test_operator.cache.set("component-id", "operational")
+    test_operator.begin_cycle(["component-id", "component-id-2"])
+
+    assert get_components_mock.call_count == 1
+    assert test_operator._get_snapshot_status("component-id-2") == "operational"
+    test_operator.end_cycle()
+
+
+@patch.object(
+    StatusPageClient, "get_components", return_value=TestObjects.COMPONENT_LIST
+)
+@patch.object(StatusPageClient, "get_unresolved_incidents", return_value=[])
+def test_overlapping_cycles_share_snapshot(
+    unresolved_incident_mock, get_components_mock, test_operator
+):
+    test_operator.begin_cycle(["component-id"])
+    test_operator._get_incident_index()
+    test_operator.begin_cycle(["component-id-2"])
+    test_operator.end_cycle()
+    test_operator._get_incident_index()
+
+    assert get_components_mock.call_count == 1
+    assert unresolved_incident_mock.call_count == 1
+    assert test_operator._get_snapshot_status("component-id-2") == "operational"
+
+    test_operator.end_cycle()
+    assert test_operator._get_snapshot_status("component-id-2") is None
+
+
+@patch.object(
+    StatusPageClient, "get_components", return_value=TestObjects.COMPONENT_LIST
+)
+def test_end_cycle_discards_snapshot(get_components_mock, test_operator):
+    test_operator.begin_cycle()
+    test_operator.end_cycle()
+
+    assert test_operator._get_snapshot_status("component-id") is None
+    assert test_operator.cache.get("component-id") == "operational"
+
+
+@patch.object(
+    StatusPageClient, "create_incident", return_value=TestObjects.CREATED_INCIDENT
+)
+@patch.object(StatusPageClient, "get_unresolved_incidents", return_value=[])
+@patch.object(
+    StatusPageClient, "get_components", return_value=TestObjects.COMPONENT_LIST
+)
+@patch.object(
+    StatusPageClient, "update_component", return_value=TestObjects.UPDATE_RETURN
+)
+def test_incidents_read_once_per_cycle(
+    update_mock,
+    get_components_mock,
+    unresolved_incident_mock,
+    create_incident_mock,
+    test_operator,
+    test_incident,
+):
+    test_operator.begin_cycle()
+    first = test_operator.update_component_status(
+        "component-id", OpLevel.Full_Outage, test_incident
+    )
+    second = test_operator.update_component_status(
+        "component-id-2", OpLevel.Full_Outage, test_incident
+    )
+
+    assert unresolved_incident_mock.call_count == 1
+    assert create_incident_mock.call_count == 2
+    assert first.incident_result.incident_created
+    assert second.incident_result.incident_created
+    assert test_operator._get_associated_incident("component-id") == [
+        TestObjects.CREATED_INCIDENT
+    ]
+
+    test_operator.end_cycle()
+    test_operator._get_associated_incident("component-id")
+    assert unresolved_incident_mock.call_count == 2
+
+
+@patch.object(
+    StatusPageClient, "update_incident", return_value=TestObjects.RESOLVED_INCIDENT
+)
+@patch.object(
+    StatusPageClient,
+    "get_unresolved_incidents",
+    return_value=TestObjects.UNRESOLVED_INCIDENTS,
+)
+@patch.object(
+    StatusPageClient, "get_components", return_value=TestObjects.DOWN_COMPONENT_LIST
+)
+@patch.object(
+    StatusPageClient, "update_component", return_value=TestObjects.UPDATE_RETURN
+)
+def test_resolved_incident_removed_from_index(
+    update_mock,
+    get_components_mock,
+    unresolved_incident_mock,
+    update_incident_mock,
+    test_operator,
+    test_incident,
+):
+    test_operator.begin_cycle()
+    first = test_operator.update_component_status(
+        "component-id", OpLevel.Operational, test_incident
+    )
+    second = test_operator.update_component_status(
+        "component-id-2", OpLevel.Operational, test_incident
+    )
+    test_operator.end_cycle()
+
+    assert unresolved_incident_mock.call_count == 1
+    assert first.incident_result.incident_resolved
+    assert second.incident_result.incident_resolved
+    assert [call[0][0] for call in update_incident_mock.call_args_list] == [
+        TestObjects.EXISTING_INCIDENT.id,
+        TestObjects.EXISTING_INCIDENT_2.id,
+    ]
+
+
+@pytest.fixture
+def write_behind_operator(test_settings, clock):
+    test_settings.write_behind_window = 10
+    return StatusPageOperator(test_settings, clock)
+
+
+@patch.object(StatusPageClient, "get_unresolved_incidents", return_value=[])
+@patch.object(
+    StatusPageClient, "create_incident", return_value=TestObjects.CREATED_INCIDENT
+)
+@patch.object(
+    StatusPageClient, "get_component", return_value=TestObjects.GET_WORKING_COMPONENT
+)
+@patch.object(
+    StatusPageClient, "update_component", return_value=TestObjects.UPDATE_RETURN
+)
+def test_write_behind_applies_final_status(
+    update_mock,
+    get_mock,
+    create_incident_mock,
+    unresolved_incident_mock,
+    write_behind_operator,
+    clock,
+    test_incident,
+):
+    component_id = "component-id"
+    result = write_behind_operator.update_component_status(
+        component_id, OpLevel.Full_Outage, test_incident
+    )
+    clock.now = 5
+    write_behind_operator.update_component_status(
+        component_id, OpLevel.Full_Outage, test_incident
+    )
+
+    assert result.status_changed is False
+    assert write_behind_operator.flush_pending() == []
+    assert update_mock.called is False
+
+    clock.now = 10
+    results = write_behind_operator.flush_pending()
+
+    assert len(results) == 1
+    assert results[0].status_changed
+    assert results[0].incident_result.incident_created
+    assert update_mock.call_count == 1
+    assert create_incident_mock.call_count == 1
+    assert write_behind_operator.flush_pending(True) == []
+
+
+@patch.object(StatusPageClient, "create_incident")
+@patch.object(
+    StatusPageClient, "get_component", return_value=TestObjects.GET_WORKING_COMPONENT
+)
+@patch.object(StatusPageClient, "update_component")
+def test_write_behind_drops_superseded_status(
+    update_mock, get_mock, create_incident_mock, write_behind_operator, clock
+):
+    component_id = "component-id"
+    write_behind_operator.update_component_status(component_id, OpLevel.Full_Outage)
+    clock.now = 3
+    write_behind_operator.update_component_status(component_id, OpLevel.Operational)
+    clock.now = 6
+    write_behind_operator.update_component_status(component_id, OpLevel.Full_Outage)
+    clock.now = 9
+    write_behind_operator.update_component_status(component_id, OpLevel.Operational)
+
+    clock.now = 10
+    results = write_behind_operator.flush_pending()
+
+    assert len(results) == 1
+    assert results[0].status_changed is False
+    assert update_mock.called is False
+    assert create_incident_mock.called is False
+
+
+@patch.object(StatusPageClient, "get_unresolved_incidents", return_value=[])
+@patch.object(
+    StatusPageClient, "create_incident", return_value=TestObjects.CREATED_INCIDENT
+)
+@patch.object(
+    StatusPageClient, "get_component", return_value=TestObjects.GET_WORKING_COMPONENT
+)
+@patch.object(
+    StatusPageClient,
+    "update_component",
+    side_effect=[None, TestObjects.UPDATE_RETURN],
+)
+def test_write_behind_retries_failed_status(
+    update_mock,
+    get_mock,
+    create_incident_mock,
+    unresolved_incident_mock,
+    write_behind_operator,
+    clock,
+    test_incident,
+):
+    write_behind_operator.update_component_status(
+        "component-id", OpLevel.Full_Outage, test_incident
+    )
+    clock.now = 10
+    failed = write_behind_operator.flush_pending()
+    retried = write_behind_operator.flush_pending()
+
+    assert failed[0].applied is False
+    assert retried[0].applied is True
+    assert update_mock.call_count == 2
+    assert write_behind_operator.flush_pending(True) == []
+
+
+@patch.object(
+    StatusPageClient, "get_component", return_value=TestObjects.GET_WORKING_COMPONENT
+)
+def test_write_behind_force_flush(get_mock, write_behind_operator):
+    write_behind_operator.update_component_status("component-id", OpLevel.Operational)
+
+    assert len(write_behind_operator.flush_pending(True)) == 1
+    assert get_mock.called
+
+
+@patch.object(
+    StatusPageClient, "create_incident", return_value=TestObjects.CREATED_INCIDENT
+)
+@patch.object(StatusPageClient, "get_unresolved_incidents", return_value=[])
+@patch.object(
+    StatusPageClient, "get_component", return_value=TestObjects.GET_WORKING_COMPONENT
+)
+@patch.object(
+    StatusPageClient, "update_component", return_value=TestObjects.UPDATE_RETURN
+)
+@pytest.mark.parametrize(
+    "op_level,component_status",
+    [
+        (OpLevel.Degraded, "degraded_performance"),
+        (OpLevel.Partial_Outage, "partial_outage"),
+    ],
+)
+def test_update_component_status_to_degraded(
+    update_mock,
+    get_mock,
+    unresolved_incident_mock,
+    create_incident_mock,
+    op_level,
+    component_status,
+    test_operator,
+    test_incident,
+):
+    result = test_operator.update_component_status(
+        "component-id", op_level, test_incident
+    )
+
+    assert update_mock.call_args[0][1] == {"component": {"status": component_status}}
+    assert create_incident_mock.called
+    incident = create_incident_mock.call_args[0][0]["incident"]
+    assert incident["components"] == {"component-id": component_status}
+    assert result.status_changed is True
+    assert result.incident_result.incident_created is True
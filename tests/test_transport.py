@@ -0,0 +1,179 @@
+from pi_monitor import ConnectionStats, HttpSettings, PooledSession, RequestTimings
+from .fault_server import FaultServer
+from .local_server import CERT_FILE, LocalHandler, LocalServer
+import pytest
+import requests
+import time
+
+
+class SlowHandler(LocalHandler):
+    def do_GET(self):
+        time.sleep(0.1)
+        self._respond()
+
+
+def test_connection_stats():
+    stats = ConnectionStats()
+    stats.record_request()
+    stats.record_request()
+    stats.record_new_connection()
+
+    assert stats.requests == 2
+    assert stats.new_connections == 1
+    assert stats.reused_connections == 1
+    assert str(stats) == "2 requests, 1 new connections, 1 reused"
+
+    stats.reset()
+    assert stats.requests == 0
+    assert stats.new_connections == 0
+
+
+def test_session_reuses_connections():
+    session = PooledSession()
+    with LocalServer({"/": (200, b"OK")}) as server:
+        for _ in range(5):
+            response = session.get(server.base_url + "/")
+            assert response.status_code == 200
+            assert response.text == "OK"
+
+    assert session.stats.requests == 5
+    assert session.stats.new_connections == 1
+    assert session.stats.reused_connections == 4
+
+
+def test_session_counts_reconnects():
+    # The server closes each connection, so the pooled connection reconnects
+    session = PooledSession()
+    with LocalServer({"/": (200, b"OK", {"Connection": "close"})}) as server:
+        for _ in range(3):
+            response = session.get(server.base_url + "/")
+            assert not response.raw.timings.reused
+
+    assert session.stats.requests == 3
+    assert session.stats.new_connections == 3
+    assert session.stats.reused_connections == 0
+
+
+def test_session_pools_per_host():
+    session = PooledSession()
+    with LocalServer({"/": (200, b"OK")}) as first, LocalServer(
+        {"/": (200, b"OK")}
+    ) as second:
+        for _ in range(3):
+            session.get(first.base_url + "/")
+            session.get(second.base_url + "/")
+
+    assert session.stats.requests == 6
+    assert session.stats.new_connections == 2
+
+
+def test_from_settings_defaults():
+    session = PooledSession.from_settings(None)
+    adapter = session.get_adapter("https://test.com")
+
+    assert adapter._pool_connections == HttpSettings.pool_connections
+    assert adapter._pool_maxsize == HttpSettings.pool_maxsize
+
+
+def test_from_settings_min_pool_maxsize():
+    settings = HttpSettings()
+    settings.pool_connections = 3
+    settings.pool_maxsize = 5
+    session = PooledSession.from_settings(settings, 20)
+    adapter = session.get_adapter("https://test.com")
+
+    assert adapter._pool_connections == 3
+    assert adapter._pool_maxsize == 20
+
+
+def timed_get(session: PooledSession, url: str):
+    started = time.monotonic()
+    timings = session.get(url).raw.timings
+    return timings, time.monotonic() - started
+
+
+def test_request_timings():
+    session = PooledSession()
+    with LocalServer({"/": (200, b"OK")}, SlowHandler) as server:
+        first, first_elapsed = timed_get(session, server.base_url + "/")
+        second, second_elapsed = timed_get(session, server.base_url + "/")
+
+    assert not first.reused
+    assert first.connect > 0
+    assert first.tls == 0
+    assert 0 < first.ttfb <= first_elapsed
+    assert second.reused
+    assert second.dns == 0
+    assert second.connect == 0
+    assert 0 < second.ttfb <= second_elapsed
+
+
+def test_request_timings_tls():
+    session = PooledSession()
+    with LocalServer({"/": (200, b"OK")}, tls=True) as server:
+        first = session.get(server.base_url + "/", verify=CERT_FILE).raw.timings
+        second = session.get(server.base_url + "/", verify=CERT_FILE).raw.timings
+
+    assert first.tls > 0
+    assert second.reused
+    assert second.tls == 0
+
+
+def test_connect_by_host_name():
+    session = PooledSession()
+    with LocalServer({"/": (200, b"OK")}) as server:
+        port = server.httpd.server_address[1]
+        response = session.get(f"http://localhost:{port}/")
+
+    assert response.status_code == 200
+    assert not response.raw.timings.reused
+
+
+def test_name_resolution_error():
+    session = PooledSession()
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        session.get("http://pi-monitor.invalid/")
+
+
+def test_request_timings_str():
+    timings = RequestTimings()
+    timings.dns = 0.001
+    timings.total = 0.25
+
+    assert str(timings) == (
+        "dns 1.0ms, connect 0.0ms, tls 0.0ms, ttfb 0.0ms, transfer 0.0ms, "
+        "total 250.0ms, reused connection"
+    )
+
+
+def test_time_limit_headers():
+    session = PooledSession()
+    with FaultServer() as server:
+        started = time.monotonic()
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            session.get(server.url("trickle-headers"), timeout=5, time_limit=0.3)
+
+    assert time.monotonic() - started < 1
+
+
+def test_time_limit_body():
+    session = PooledSession()
+    with FaultServer() as server:
+        started = time.monotonic()
+        with pytest.raises(requests.exceptions.ConnectionError):
+            session.get(server.url("trickle-body"), timeout=5, time_limit=0.3)
+
+    assert time.monotonic() - started < 1
+
+
+def test_time_limit_met():
+    session = PooledSession()
+    with LocalServer({"/": (200, b"OK")}) as server:
+        for _ in range(2):
+            response = session.get(server.base_url + "/", time_limit=5)
+            assert response.text == "OK"
+        response = session.get(server.base_url + "/")
+
+    assert response.text == "OK"
+    assert session.stats.new_connections == 1